@@ -0,0 +1,198 @@
+"""
+冷启动基准
+
+在全新的子进程中分别测量：
+  - dify_plugin 的导入耗时（插件运行时本身的开销，作为参照）
+  - provider 与全部工具模块的导入耗时，以及导入后COS SDK是否已被加载
+  - 首次快速失败调用的延迟（缺少必填参数，不应触发COS SDK导入）
+  - 首次真实调用的延迟（对本地COS替身服务上传一个小文件，包含SDK导入和客户端创建）
+
+多次运行取中位数，与预算比较；超出预算或SDK被提前加载时以非零状态码退出，
+便于在CI中作为回归检查。
+
+用法:
+    python bench/bench_startup.py [--runs 5] [--max-module-import-ms 150]
+                                  [--max-fail-fast-ms 50] [--max-first-invoke-ms 1000]
+                                  [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+# 首次真实调用上传的文件大小
+UPLOAD_SIZE = 64 * 1024
+
+CREDENTIALS = {
+    'region': 'ap-bench',
+    'bucket': 'bench-1250000000',
+    'secret_id': 'bench-secret-id',
+    'secret_key': 'bench-secret-key'
+}
+
+SDK_MODULES = ('qcloud_cos', 'crcmod')
+
+
+def sdk_loaded() -> bool:
+    return any(name in sys.modules for name in SDK_MODULES)
+
+
+# ---- 子进程：测量一次冷启动 ----
+
+def run_probe(port: int) -> dict:
+    sys.path.insert(0, ROOT_DIR)
+    # dify_plugin导入时会执行gevent monkey patch（移除select.epoll），
+    # 先导入httpcore，避免其可选的trio后端在补丁后导入失败
+    begin = time.perf_counter()
+    import httpcore  # noqa: F401
+    import dify_plugin  # noqa: F401
+    dify_plugin_ms = (time.perf_counter() - begin) * 1000
+
+    begin = time.perf_counter()
+    import provider.tencent_cos  # noqa: F401
+    from tools.get_file_by_url import GetFileByUrlTool  # noqa: F401
+    from tools.multi_upload_files import MultiUploadFilesTool  # noqa: F401
+    from tools.upload_file import UploadFileTool
+    module_import_ms = (time.perf_counter() - begin) * 1000
+    sdk_loaded_after_import = sdk_loaded()
+
+    tool = UploadFileTool.from_credentials(CREDENTIALS)
+    begin = time.perf_counter()
+    try:
+        # 失败时工具先输出失败消息再抛出异常
+        list(tool.invoke({}))
+    except ValueError:
+        pass
+    else:
+        raise RuntimeError('fail-fast invocation unexpectedly succeeded')
+    fail_fast_ms = (time.perf_counter() - begin) * 1000
+    sdk_loaded_after_fail_fast = sdk_loaded()
+
+    from dify_plugin.file.entities import FileType
+    from dify_plugin.file.file import File
+    file = File(url=f"http://127.0.0.1:{port}/_fixture/{UPLOAD_SIZE}", filename='startup.bin', extension='.bin',
+                mime_type='application/octet-stream', size=UPLOAD_SIZE, type=FileType.DOCUMENT)
+    # 预先下载文件内容，不计入首次调用延迟
+    file.blob
+    begin = time.perf_counter()
+    messages = list(tool.invoke({'file': file, 'directory': 'startup'}))
+    first_invoke_ms = (time.perf_counter() - begin) * 1000
+    for message in messages:
+        text = getattr(message.message, 'text', None)
+        if isinstance(text, str) and text.startswith('Failed'):
+            raise RuntimeError(text)
+
+    return {
+        'dify_plugin_import_ms': round(dify_plugin_ms, 3),
+        'module_import_ms': round(module_import_ms, 3),
+        'fail_fast_ms': round(fail_fast_ms, 3),
+        'first_invoke_ms': round(first_invoke_ms, 3),
+        'sdk_loaded_after_import': sdk_loaded_after_import,
+        'sdk_loaded_after_fail_fast': sdk_loaded_after_fail_fast
+    }
+
+
+# ---- 主进程：启动替身服务、汇总并比较预算 ----
+
+def start_server() -> tuple:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, 'fake_cos_server.py'), '--port', '0'],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith('listening '):
+        process.kill()
+        raise RuntimeError(f"fake COS server failed to start: {line!r}")
+    return process, int(line.split()[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-module-import-ms', type=float, default=150)
+    parser.add_argument('--max-fail-fast-ms', type=float, default=50)
+    parser.add_argument('--max-first-invoke-ms', type=float, default=1000)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--probe-port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe_port:
+        try:
+            result = run_probe(args.probe_port)
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}"}
+        json.dump(result, sys.stdout)
+        sys.stdout.write('\n')
+        return
+
+    server, port = start_server()
+    env = dict(os.environ, COS_IP='127.0.0.1', COS_PORT=str(port), COS_SCHEME='http')
+    runs = []
+    try:
+        for index in range(max(1, args.runs)):
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--probe-port', str(port)],
+                env=env, capture_output=True, text=True
+            )
+            output = completed.stdout.strip().splitlines()
+            try:
+                result = json.loads(output[-1])
+            except (IndexError, ValueError):
+                result = {'error': f"probe exited with code {completed.returncode}"}
+            if 'error' in result:
+                raise SystemExit(f"startup probe failed: {result['error']}")
+            runs.append(result)
+            sys.stderr.write(f"run {index + 1} done\n")
+    finally:
+        server.terminate()
+        server.wait()
+
+    def median(field: str) -> float:
+        return round(statistics.median(run[field] for run in runs), 3)
+
+    summary = {
+        'dify_plugin_import_ms': median('dify_plugin_import_ms'),
+        'module_import_ms': median('module_import_ms'),
+        'fail_fast_ms': median('fail_fast_ms'),
+        'first_invoke_ms': median('first_invoke_ms'),
+        'sdk_loaded_after_import': any(run['sdk_loaded_after_import'] for run in runs),
+        'sdk_loaded_after_fail_fast': any(run['sdk_loaded_after_fail_fast'] for run in runs)
+    }
+    budget = {
+        'module_import_ms': args.max_module_import_ms,
+        'fail_fast_ms': args.max_fail_fast_ms,
+        'first_invoke_ms': args.max_first_invoke_ms
+    }
+    violations = [f"{field} {summary[field]} > {limit}" for field, limit in budget.items() if summary[field] > limit]
+    if summary['sdk_loaded_after_import']:
+        violations.append('COS SDK loaded at module import time')
+    if summary['sdk_loaded_after_fail_fast']:
+        violations.append('COS SDK loaded by a fail-fast invocation')
+
+    report = {
+        'benchmark': 'cold_start',
+        'runs': len(runs),
+        'median': summary,
+        'budget': budget,
+        'within_budget': not violations,
+        'violations': violations,
+        'samples': runs
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
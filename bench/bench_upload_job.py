@@ -0,0 +1,107 @@
+"""
+上传任务解析的CPU与内存分配基准
+
+对比旧实现（每个文件最多三次 read() 获取大小、多次推断文件类型）与
+UploadJob（名称、扩展名、类型、大小和对象键只解析一次）在不同文件大小下
+的单文件CPU耗时与内存分配峰值，结果以JSON输出，便于回归跟踪。
+
+用法:
+    python bench/bench_upload_job.py [--iterations 200] [--sizes 1024,1048576,16777216]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.upload_job import build_upload_job, generate_object_key  # noqa: E402
+from tools.utils import get_extension_from_content_type, get_file_type_from_content_type  # noqa: E402
+
+
+def legacy_extension(file) -> str:
+    # 旧实现的扩展名推断：依次尝试name、filename，最后按内容类型推断
+    for name in (getattr(file, 'name', None), getattr(file, 'filename', None)):
+        if name and os.path.splitext(name)[1]:
+            return os.path.splitext(name)[1].lower()
+    if getattr(file, 'content_type', None):
+        return get_extension_from_content_type(file.content_type)
+    return '.dat'
+
+
+def legacy_file_type(file) -> str:
+    # 旧实现的文件类型推断，与扩展名推断分别进行
+    for name in (getattr(file, 'name', None), getattr(file, 'filename', None)):
+        if name and os.path.splitext(name)[1]:
+            return os.path.splitext(name)[1].lower()[1:]
+    if getattr(file, 'content_type', None):
+        return get_file_type_from_content_type(file.content_type)
+    return 'unknown'
+
+
+def legacy_resolve(file) -> dict:
+    # 旧实现：上传前单独推断扩展名，成功输出与文本消息各读取一次文件内容获取大小
+    base_name, _ = os.path.splitext(os.path.basename(file.name))
+    object_key = generate_object_key('bench', 'no_subdirectory', f"{base_name}{legacy_extension(file)}")
+    result = {}
+    for _ in range(2):
+        current_pos = file.tell()
+        content = file.read()
+        file_size = len(content)
+        file.seek(current_pos)
+        result = {'object_key': object_key, 'size': file_size, 'file_type': legacy_file_type(file)}
+    return result
+
+
+def unified_resolve(file) -> dict:
+    job = build_upload_job(file, 'bench', 'no_subdirectory')
+    return job.to_file_info('https://bench.cos.ap-beijing.myqcloud.com/' + job.object_key)
+
+
+def measure(func, path: str, iterations: int) -> dict:
+    with open(path, 'rb') as file:
+        # 预热（如mimetypes表初始化）
+        func(file)
+
+        # CPU耗时
+        start = time.process_time()
+        for _ in range(iterations):
+            func(file)
+        cpu_per_file = (time.process_time() - start) / iterations
+
+        # 单次调用的内存分配峰值
+        tracemalloc.start()
+        func(file)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {'cpu_us_per_file': round(cpu_per_file * 1e6, 2), 'peak_alloc_bytes': peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sizes', default='1024,1048576,16777216')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(value) for value in args.sizes.split(',')):
+            path = os.path.join(workdir, 'report.json')
+            with open(path, 'wb') as file:
+                file.write(os.urandom(size))
+            iterations = max(1, args.iterations if size <= 1024 * 1024 else args.iterations // 20)
+            results.append({
+                'size_bytes': size,
+                'legacy': measure(legacy_resolve, path, iterations),
+                'unified': measure(unified_resolve, path, iterations)
+            })
+    json.dump({'benchmark': 'upload_job', 'results': results}, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
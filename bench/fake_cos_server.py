@@ -0,0 +1,383 @@
+"""
+本地COS替身服务
+
+实现基准测试所需的COS XML API子集：PUT/GET/HEAD对象（支持Range与
+If-None-Match，保存Content-Type、Content-Encoding和x-cos-meta-*元数据）、分块上传（initiate / upload part / complete / abort）、
+服务端复制（PUT Object - Copy / Upload Part - Copy）、列出对象（GET Bucket，支持prefix、delimiter、
+marker和max-keys）以及HEAD存储桶。
+存储桶取自请求的Host头（bucket.cos.region.myqcloud.com），不校验签名。
+可注入固定延迟、带宽限制和随机的503 SlowDown错误，模拟真实网络和服务端限流。
+
+另外提供 GET /_fixture/<bytes> 返回指定大小的固定内容，用作Dify文件下载地址。
+
+用法:
+    python bench/fake_cos_server.py [--port 0] [--latency-ms 0] [--bandwidth-mb-per-s 0] [--error-rate 0]
+启动后在标准输出打印一行 "listening <port>"。
+"""
+import argparse
+import hashlib
+import random
+import sys
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+from xml.sax.saxutils import escape
+
+# 读写请求体时每次处理的字节数
+IO_CHUNK_SIZE = 64 * 1024
+
+
+class ObjectStore:
+    """线程安全的内存对象存储"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (bucket, key) -> (内容, ETag, Last-Modified, 对象元数据响应头)
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str, str, Dict[str, str]]] = {}
+        # upload_id -> {'bucket', 'key', 'headers', 'parts': {编号: 内容}}
+        self.uploads: Dict[str, dict] = {}
+        self.fixtures: Dict[int, bytes] = {}
+
+    def fixture(self, size: int) -> bytes:
+        with self.lock:
+            data = self.fixtures.get(size)
+            if data is None:
+                block = hashlib.sha256(str(size).encode()).digest() * 2048
+                data = (block * (size // len(block) + 1))[:size]
+                self.fixtures[size] = data
+            return data
+
+
+class FakeCosHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeCOS/1.0'
+    # 响应头与响应体分开写出，关闭Nagle算法避免小响应出现延迟确认等待
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # 基准测试期间不输出访问日志
+        pass
+
+    # ---- 请求分发 ----
+
+    def do_HEAD(self):
+        self._delay()
+        if self._inject_error(head_only=True):
+            return
+        bucket, key, query = self._parse()
+        if not key:
+            self._send(200, b'', head_only=True)
+            return
+        obj = self._get_object(bucket, key)
+        if obj is None:
+            self._send(404, b'', head_only=True)
+            return
+        data, etag, last_modified, object_headers = obj
+        self._send(200, b'', head_only=True, content_length=len(data), headers={
+            'ETag': etag, 'Last-Modified': last_modified, **object_headers})
+
+    def do_GET(self):
+        self._delay()
+        path = urlparse(self.path).path
+        if path.startswith('/_fixture/'):
+            data = self.server.store.fixture(int(path.rsplit('/', 1)[1]))
+            self._send(200, data, headers={'Content-Type': 'application/octet-stream'})
+            return
+        if self._inject_error():
+            return
+        bucket, key, query = self._parse()
+        if not key:
+            self._list_objects(bucket, query)
+            return
+        obj = self._get_object(bucket, key)
+        if obj is None:
+            self._send_error(404, 'NoSuchKey')
+            return
+        data, etag, last_modified, object_headers = obj
+        headers = {'ETag': etag, 'Last-Modified': last_modified, **object_headers}
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', headers=headers)
+            return
+        byte_range = self._parse_range(self.headers.get('Range'), len(data))
+        if byte_range is not None:
+            start, end = byte_range
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(data)}"
+            self._send(206, data[start:end + 1], headers=headers)
+            return
+        self._send(200, data, headers=headers)
+
+    def do_PUT(self):
+        self._delay()
+        if self._inject_error():
+            return
+        bucket, key, query = self._parse()
+        body = self._read_body()
+        store = self.server.store
+        if self.headers.get('x-cos-copy-source'):
+            self._copy(bucket, key, query)
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if 'uploadId' in query:
+            with store.lock:
+                upload = store.uploads.get(query['uploadId'][0])
+                if upload is None:
+                    self._send_error(404, 'NoSuchUpload')
+                    return
+                upload['parts'][int(query['partNumber'][0])] = body
+            self._send(200, b'', headers={'ETag': etag})
+            return
+        with store.lock:
+            store.objects[(bucket, key)] = (body, etag, formatdate(usegmt=True), self._object_headers())
+        self._send(200, b'', headers={'ETag': etag})
+
+    def do_POST(self):
+        self._delay()
+        if self._inject_error():
+            return
+        bucket, key, query = self._parse()
+        self._read_body()
+        store = self.server.store
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            with store.lock:
+                store.uploads[upload_id] = {
+                    'bucket': bucket, 'key': key, 'parts': {}, 'headers': self._object_headers()
+                }
+            xml = ('<InitiateMultipartUploadResult><Bucket>%s</Bucket><Key>%s</Key>'
+                   '<UploadId>%s</UploadId></InitiateMultipartUploadResult>') % (bucket, key, upload_id)
+            self._send(200, xml.encode(), headers={'Content-Type': 'application/xml'})
+            return
+        if 'uploadId' in query:
+            with store.lock:
+                upload = store.uploads.pop(query['uploadId'][0], None)
+                if upload is None:
+                    self._send_error(404, 'NoSuchUpload')
+                    return
+                data = b''.join(upload['parts'][number] for number in sorted(upload['parts']))
+                etag = '"%s-%d"' % (hashlib.md5(data).hexdigest(), len(upload['parts']))
+                store.objects[(bucket, key)] = (data, etag, formatdate(usegmt=True), upload['headers'])
+            xml = ('<CompleteMultipartUploadResult><Bucket>%s</Bucket><Key>%s</Key>'
+                   '<ETag>%s</ETag></CompleteMultipartUploadResult>') % (bucket, key, etag)
+            self._send(200, xml.encode(), headers={'Content-Type': 'application/xml'})
+            return
+        self._send_error(400, 'InvalidRequest')
+
+    def do_DELETE(self):
+        self._delay()
+        if self._inject_error():
+            return
+        bucket, key, query = self._parse()
+        store = self.server.store
+        with store.lock:
+            if 'uploadId' in query:
+                store.uploads.pop(query['uploadId'][0], None)
+            else:
+                store.objects.pop((bucket, key), None)
+        self._send(204, b'')
+
+    def _copy(self, bucket: str, key: str, query: dict):
+        # 服务端复制：x-cos-copy-source 为 <bucket>.cos.<region>.myqcloud.com/<key>
+        host, _, source_key = self.headers['x-cos-copy-source'].partition('/')
+        source = self._get_object(host.split('.', 1)[0], unquote(source_key))
+        if source is None:
+            self._send_error(404, 'NoSuchKey')
+            return
+        data, _, _, object_headers = source
+        store = self.server.store
+        if 'uploadId' in query:
+            byte_range = self._parse_range(self.headers.get('x-cos-copy-source-range'), len(data))
+            if byte_range is not None:
+                data = data[byte_range[0]:byte_range[1] + 1]
+            etag = '"%s"' % hashlib.md5(data).hexdigest()
+            with store.lock:
+                upload = store.uploads.get(query['uploadId'][0])
+                if upload is None:
+                    self._send_error(404, 'NoSuchUpload')
+                    return
+                upload['parts'][int(query['partNumber'][0])] = data
+            xml = '<CopyPartResult><ETag>%s</ETag></CopyPartResult>' % etag
+        else:
+            etag = '"%s"' % hashlib.md5(data).hexdigest()
+            last_modified = formatdate(usegmt=True)
+            with store.lock:
+                store.objects[(bucket, key)] = (data, etag, last_modified, object_headers)
+            xml = '<CopyObjectResult><ETag>%s</ETag><LastModified>%s</LastModified></CopyObjectResult>' % (
+                etag, last_modified)
+        self._send(200, xml.encode(), headers={'Content-Type': 'application/xml'})
+
+    # ---- 辅助方法 ----
+
+    def _parse(self) -> Tuple[str, str, dict]:
+        parsed = urlparse(self.path)
+        bucket = (self.headers.get('Host') or '').split('.', 1)[0]
+        return bucket, unquote(parsed.path.lstrip('/')), parse_qs(parsed.query, keep_blank_values=True)
+
+    def _object_headers(self) -> Dict[str, str]:
+        # 上传请求中随对象保存、GET/HEAD时原样返回的请求头
+        headers = {'Content-Type': self.headers.get('Content-Type', 'application/octet-stream')}
+        for name, value in self.headers.items():
+            if name.lower() in ('content-encoding', 'cache-control') or name.lower().startswith('x-cos-meta-'):
+                headers[name] = value
+        return headers
+
+    def _get_object(self, bucket: str, key: str):
+        with self.server.store.lock:
+            return self.server.store.objects.get((bucket, key))
+
+    def _list_objects(self, bucket: str, query: dict):
+        # GET Bucket：按键排序，delimiter之后的部分合并为公共前缀；encoding-type=url时对键和前缀编码
+        prefix = query.get('prefix', [''])[0]
+        delimiter = query.get('delimiter', [''])[0]
+        marker = query.get('marker', [''])[0]
+        max_keys = int(query.get('max-keys', ['1000'])[0] or 1000)
+        encode = (lambda value: quote(value, safe='/')) if query.get('encoding-type', [''])[0] == 'url' else escape
+        with self.server.store.lock:
+            objects = sorted((key, obj) for (name, key), obj in self.server.store.objects.items()
+                             if name == bucket and key.startswith(prefix) and key > marker)
+        entries = []
+        seen_prefixes = set()
+        for key, obj in objects:
+            if delimiter and delimiter in key[len(prefix):]:
+                common_prefix = key[:key.index(delimiter, len(prefix)) + len(delimiter)]
+                if common_prefix == marker or common_prefix in seen_prefixes:
+                    continue
+                seen_prefixes.add(common_prefix)
+                entries.append((common_prefix, None))
+            else:
+                entries.append((key, obj))
+        truncated = len(entries) > max_keys
+        entries = entries[:max_keys]
+        xml = ['<ListBucketResult><Name>%s</Name><Prefix>%s</Prefix><Marker>%s</Marker><MaxKeys>%d</MaxKeys>'
+               '<Delimiter>%s</Delimiter><IsTruncated>%s</IsTruncated>'
+               % (bucket, encode(prefix), encode(marker), max_keys, encode(delimiter), str(truncated).lower())]
+        if truncated:
+            xml.append('<NextMarker>%s</NextMarker>' % encode(entries[-1][0]))
+        for name, obj in entries:
+            if obj is None:
+                xml.append('<CommonPrefixes><Prefix>%s</Prefix></CommonPrefixes>' % encode(name))
+            else:
+                data, etag, last_modified, _ = obj
+                xml.append('<Contents><Key>%s</Key><LastModified>%s</LastModified><ETag>%s</ETag><Size>%d</Size>'
+                           '<StorageClass>STANDARD</StorageClass></Contents>'
+                           % (encode(name), last_modified, escape(etag), len(data)))
+        xml.append('</ListBucketResult>')
+        self._send(200, ''.join(xml).encode(), headers={'Content-Type': 'application/xml'})
+
+    def _parse_range(self, header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+        if not header or not header.startswith('bytes='):
+            return None
+        start, _, end = header[6:].partition('-')
+        start = int(start or 0)
+        end = min(int(end), size - 1) if end else size - 1
+        return start, end
+
+    def _read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                self._throttle(size)
+            return b''.join(chunks)
+        remaining = int(self.headers.get('Content-Length') or 0)
+        chunks = []
+        while remaining > 0:
+            chunk = self.rfile.read(min(IO_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            chunks.append(chunk)
+            self._throttle(len(chunk))
+        return b''.join(chunks)
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None, head_only: bool = False,
+              content_length: Optional[int] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('x-cos-request-id', uuid.uuid4().hex)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body) if content_length is None else content_length))
+        self.end_headers()
+        if head_only or status == 304:
+            return
+        view = memoryview(body)
+        for offset in range(0, len(view), IO_CHUNK_SIZE):
+            chunk = view[offset:offset + IO_CHUNK_SIZE]
+            self.wfile.write(chunk)
+            self._throttle(len(chunk))
+
+    def _send_error(self, status: int, code: str):
+        xml = '<Error><Code>%s</Code><Message>%s</Message></Error>' % (code, code)
+        self._send(status, xml.encode(), headers={'Content-Type': 'application/xml'})
+
+    def _delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _inject_error(self, head_only: bool = False) -> bool:
+        # 按error_rate随机返回503 SlowDown，读完请求体以保持长连接可用
+        if not self.server.error_rate or random.random() >= self.server.error_rate:
+            return False
+        self._read_body()
+        if head_only:
+            self._send(503, b'', head_only=True)
+        else:
+            self._send_error(503, 'SlowDown')
+        return True
+
+    def _throttle(self, size: int):
+        if self.server.bytes_per_second:
+            time.sleep(size / self.server.bytes_per_second)
+
+
+class FakeCosServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端提前关闭连接（如并发分段下载关闭首个GET响应）属于正常情况，不输出堆栈
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def __init__(self, address: Tuple[str, int], latency_ms: float = 0, bandwidth_mb_per_s: float = 0,
+                 error_rate: float = 0):
+        super().__init__(address, FakeCosHandler)
+        self.store = ObjectStore()
+        self.latency = latency_ms / 1000.0
+        # 按每个连接限速（MB/s）
+        self.bytes_per_second = bandwidth_mb_per_s * 1024 * 1024
+        # 对象请求返回503 SlowDown的概率
+        self.error_rate = error_rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--bandwidth-mb-per-s', type=float, default=0, help='per-connection MB/s, 0 means unlimited')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of object requests failed with 503 SlowDown')
+    args = parser.parse_args()
+
+    server = FakeCosServer((args.host, args.port), args.latency_ms, args.bandwidth_mb_per_s, args.error_rate)
+    sys.stdout.write(f"listening {server.server_address[1]}\n")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
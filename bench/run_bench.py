@@ -0,0 +1,221 @@
+"""
+端到端吞吐与延迟基准
+
+启动本地COS替身服务（bench/fake_cos_server.py），通过 COS_IP/COS_PORT/COS_SCHEME
+将插件的COS客户端指向该服务，然后按文件大小和批量大小矩阵驱动
+UploadFileTool、MultiUploadFilesTool 和 GetFileByUrlTool。
+
+每个场景在独立的子进程中运行，以便单独统计峰值RSS。待上传文件的内容在计时前
+预先下载（与Dify文件服务的交互不计入结果）。结果以JSON输出，包括 ops/s、MB/s、
+p50/p99 延迟和峰值RSS，便于回归跟踪。
+
+用法:
+    python bench/run_bench.py [--sizes 65536,1048576,8388608,33554432] [--batch-sizes 1,4,10]
+                              [--iterations 5] [--latency-ms 0] [--bandwidth-mb-per-s 0]
+                              [--tools upload_file,multi_upload_files,get_file_by_url]
+                              [--output results.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+ALL_TOOLS = ('upload_file', 'multi_upload_files', 'get_file_by_url')
+
+CREDENTIALS = {
+    'region': 'ap-bench',
+    'bucket': 'bench-1250000000',
+    'secret_id': 'bench-secret-id',
+    'secret_key': 'bench-secret-key'
+}
+
+
+def percentile(values: list, ratio: float) -> float:
+    # 最近秩法计算百分位
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(ratio * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+# ---- 子进程：运行单个场景 ----
+
+def run_scenario(spec: dict) -> dict:
+    sys.path.insert(0, ROOT_DIR)
+    # dify_plugin导入时会执行gevent monkey patch（移除select.epoll），
+    # 先导入httpcore，避免其可选的trio后端在补丁后导入失败
+    import httpcore  # noqa: F401
+    from dify_plugin.file.entities import FileType
+    from dify_plugin.file.file import File
+
+    from tools.client_pool import get_cos_client
+    from tools.get_file_by_url import GetFileByUrlTool
+    from tools.multi_upload_files import MultiUploadFilesTool
+    from tools.upload_file import UploadFileTool
+
+    tool_name = spec['tool']
+    size = spec['size_bytes']
+    batch_size = spec['batch_size']
+    fixture_url = f"http://127.0.0.1:{spec['port']}/_fixture/{size}"
+
+    def make_file(index: int) -> File:
+        file = File(url=fixture_url, filename=f"bench_{index}.bin", extension='.bin',
+                    mime_type='application/octet-stream', size=size, type=FileType.DOCUMENT)
+        file.blob
+        return file
+
+    if tool_name == 'upload_file':
+        tool = UploadFileTool.from_credentials(CREDENTIALS)
+        parameters = {'file': make_file(0), 'directory': 'bench'}
+    elif tool_name == 'multi_upload_files':
+        tool = MultiUploadFilesTool.from_credentials(CREDENTIALS)
+        parameters = {'files': [make_file(index) for index in range(batch_size)], 'directory': 'bench'}
+    else:
+        tool = GetFileByUrlTool.from_credentials(CREDENTIALS)
+        object_key = f"bench/download_{size}.bin"
+        get_cos_client(CREDENTIALS).put_object(
+            Bucket=CREDENTIALS['bucket'], Key=object_key, Body=make_file(0).blob
+        )
+        parameters = {
+            'file_url': f"https://{CREDENTIALS['bucket']}.cos.{CREDENTIALS['region']}.myqcloud.com/{object_key}"
+        }
+        parameters.update(spec.get('extra_parameters') or {})
+
+    def invoke_once() -> None:
+        messages = list(tool.invoke(dict(parameters)))
+        for message in messages:
+            text = getattr(message.message, 'text', None)
+            if isinstance(text, str) and text.startswith('Failed'):
+                raise RuntimeError(text)
+
+    # 预热：建立连接、初始化客户端
+    invoke_once()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(spec['iterations']):
+        begin = time.perf_counter()
+        invoke_once()
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+
+    total_bytes = size * batch_size * spec['iterations']
+    return {
+        'tool': tool_name,
+        'size_bytes': size,
+        'batch_size': batch_size,
+        'iterations': spec['iterations'],
+        'ops_per_s': round(spec['iterations'] / elapsed, 3),
+        'mb_per_s': round(total_bytes / elapsed / (1024 * 1024), 3),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3)
+        },
+        # Linux下ru_maxrss单位为KB
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+# ---- 主进程：启动替身服务并调度场景 ----
+
+def start_server(latency_ms: float, bandwidth: float) -> tuple:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, 'fake_cos_server.py'), '--port', '0',
+         '--latency-ms', str(latency_ms), '--bandwidth-mb-per-s', str(bandwidth)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith('listening '):
+        process.kill()
+        raise RuntimeError(f"fake COS server failed to start: {line!r}")
+    return process, int(line.split()[1])
+
+
+def build_scenarios(args: argparse.Namespace, port: int) -> list:
+    sizes = [int(value) for value in args.sizes.split(',')]
+    batch_sizes = [int(value) for value in args.batch_sizes.split(',')]
+    tools = [name.strip() for name in args.tools.split(',') if name.strip()]
+    scenarios = []
+    for tool_name in tools:
+        if tool_name not in ALL_TOOLS:
+            raise SystemExit(f"unknown tool: {tool_name}")
+        for size in sizes:
+            for batch_size in (batch_sizes if tool_name == 'multi_upload_files' else [1]):
+                scenarios.append({
+                    'tool': tool_name,
+                    'size_bytes': size,
+                    'batch_size': batch_size,
+                    'iterations': args.iterations,
+                    'port': port
+                })
+    return scenarios
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='65536,1048576,8388608,33554432')
+    parser.add_argument('--batch-sizes', default='1,4,10')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--bandwidth-mb-per-s', type=float, default=0)
+    parser.add_argument('--tools', default=','.join(ALL_TOOLS))
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        try:
+            result = run_scenario(json.loads(args.scenario))
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}"}
+        json.dump(result, sys.stdout)
+        sys.stdout.write('\n')
+        return
+
+    server, port = start_server(args.latency_ms, args.bandwidth_mb_per_s)
+    env = dict(os.environ, COS_IP='127.0.0.1', COS_PORT=str(port), COS_SCHEME='http')
+    results = []
+    try:
+        for scenario in build_scenarios(args, port):
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--scenario', json.dumps(scenario)],
+                env=env, capture_output=True, text=True
+            )
+            output = completed.stdout.strip().splitlines()
+            try:
+                result = json.loads(output[-1])
+            except (IndexError, ValueError):
+                result = {'error': f"scenario exited with code {completed.returncode}"}
+            if 'error' in result:
+                result = {key: scenario[key] for key in ('tool', 'size_bytes', 'batch_size')} | result
+            results.append(result)
+            sys.stderr.write(f"{scenario['tool']} size={scenario['size_bytes']} batch={scenario['batch_size']} done\n")
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        'benchmark': 'end_to_end',
+        'config': {
+            'latency_ms': args.latency_ms,
+            'bandwidth_mb_per_s': args.bandwidth_mb_per_s,
+            'iterations': args.iterations
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
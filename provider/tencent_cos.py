@@ -1,10 +1,13 @@
 from typing import Any, Dict
-from qcloud_cos import CosConfig, CosS3Client
-from qcloud_cos.cos_exception import CosServiceError
 
 from dify_plugin.interfaces.tool import ToolProvider
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from tools import cos_sdk
+from tools.client_pool import get_cos_client
+from tools.credential_cache import get_validation_cache, is_definitive_failure
+from tools.retry import RetryContext
+
 
 class TencentCosProvider(ToolProvider):
     def _validate_credentials(self, credentials: Dict[str, Any]) -> None:
@@ -26,26 +29,34 @@ class TencentCosProvider(ToolProvider):
                 if file_value.startswith((' ', '/', '\\')):
                     raise ToolProviderCredentialValidationError("filename不能以空格、/或\\开头")
 
-            # 3. 创建腾讯云COS客户端
-            config = CosConfig(
-                Region=credentials['region'],
-                SecretId=credentials['secret_id'],
-                SecretKey=credentials['secret_key']
-            )
-            client = CosS3Client(config)
+            # 3. 命中缓存的校验结果时不再发起远程请求
+            validation_cache = get_validation_cache()
+            cached = validation_cache.get(credentials)
+            if cached is not None:
+                if cached[0]:
+                    return
+                raise ToolProviderCredentialValidationError(cached[1])
+
+            # 4. 从进程级注册表获取腾讯云COS客户端（复用长连接）
+            client = get_cos_client(credentials)
 
-            # 4. 进行远程校验，获取Bucket信息
+            # 5. 进行远程校验，获取Bucket信息；明确的失败结果（如403/404）也会短暂缓存，限流等临时错误不缓存
             try:
-                response = client.head_bucket(Bucket=credentials['bucket'])
-            except CosServiceError as e:
+                # 客户端关闭了SDK内置的重试，限流、5xx和网络错误按重试策略重试
+                response = RetryContext().call(client.head_bucket, Bucket=credentials['bucket'])
+            except cos_sdk.CosServiceError as e:
                 if e.get_status_code() == 403:
-                    raise ToolProviderCredentialValidationError("无效的SecretId或SecretKey")
+                    error_message = "无效的SecretId或SecretKey"
                 elif e.get_status_code() == 404:
-                    raise ToolProviderCredentialValidationError("Bucket不存在")
+                    error_message = "Bucket不存在"
                 else:
-                    raise ToolProviderCredentialValidationError(f"COS验证失败: {str(e)}")
+                    error_message = f"COS验证失败: {str(e)}"
+                if is_definitive_failure(e.get_status_code(), e.get_error_code()):
+                    validation_cache.put_failure(credentials, error_message)
+                raise ToolProviderCredentialValidationError(error_message)
+            validation_cache.put_success(credentials)
 
-        except CosServiceError as e:
+        except cos_sdk.CosServiceError as e:
             error_code = e.get_status_code()
             if error_code == 403:
                 raise ToolProviderCredentialValidationError("无效的SecretId或SecretKey")
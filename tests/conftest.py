@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入 tools 包，不经过 main.py（不启动插件进程）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,30 @@
+import pytest
+import requests
+from qcloud_cos import CosConfig
+from qcloud_cos import cos_auth
+
+from tools.async_transport import sign_request
+
+NOW = 1700000000
+
+
+@pytest.mark.parametrize('method, key, params, headers', [
+    ('GET', 'report.pdf', {}, {'Range': 'bytes=0-99'}),
+    ('PUT', 'dir/a b+c/中文.txt', {'partNumber': 2, 'uploadId': 'upload/1'},
+     {'Content-Type': 'text/plain; charset=utf-8', 'Content-MD5': 'XrY7u+Ae7tCTyyK7j1rNww==',
+      'x-cos-meta-Name': '值 1', 'x-ci-process': 'info', 'User-Agent': 'not-signed'}),
+    ('HEAD', 'dir/', {'versionId': 'v1'}, {'If-None-Match': '"etag"', 'Accept': '*/*'}),
+])
+def test_signature_matches_cos_sdk(monkeypatch, method, key, params, headers):
+    # 相同的输入和签名时间下，本地签名与COS SDK（CosS3Auth）得到的Authorization头逐字相同
+    monkeypatch.setattr(cos_auth.time, 'time', lambda: NOW)
+    config = CosConfig(Region='ap-guangzhou', SecretId='AKIDexample', SecretKey='secret/key+value')
+    request = requests.Request(method, 'https://test-1250000000.cos.ap-guangzhou.myqcloud.com/' + key,
+                               headers=headers, params=params).prepare()
+    request.headers['Host'] = 'test-1250000000.cos.ap-guangzhou.myqcloud.com'
+    # requests为PUT补充的Content-Length等请求头也一并传给本地签名
+    signed_headers = dict(request.headers)
+    expected = cos_auth.CosS3Auth(config, key, params, expire=600)(request).headers['Authorization']
+
+    assert sign_request('AKIDexample', 'secret/key+value', method, '/' + key, params, signed_headers,
+                        expire=600, now=NOW) == expected
@@ -0,0 +1,68 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from tools import compression
+from tools.compression import DecompressingStream, compress_payload
+
+
+class ChunkedStream(io.BytesIO):
+    """每次最多返回chunk_size字节的原始响应流"""
+
+    def __init__(self, data, chunk_size):
+        super().__init__(data)
+        self.chunk_size = chunk_size
+        self.closed_by_caller = False
+
+    def read(self, size=-1):
+        return super().read(self.chunk_size if size is None or size < 0 else min(size, self.chunk_size))
+
+    def close(self):
+        self.closed_by_caller = True
+        super().close()
+
+
+def test_compress_payload_round_trip_from_bytes_and_file(tmp_path):
+    data = b'tencent cos ' * 10000
+    path = tmp_path / 'data.txt'
+    path.write_bytes(data)
+    for payload in (data, str(path), io.BytesIO(data)):
+        assert gzip.decompress(compress_payload(payload, 'gzip', chunk_size=4096)) == data
+
+
+def test_compress_payload_gives_up_at_max_size():
+    data = os.urandom(64 * 1024)
+    assert compress_payload(data, 'gzip', chunk_size=4096, max_size=len(data)) is None
+    assert compress_payload(b'a' * 4096, 'gzip', max_size=4096) is not None
+
+
+def test_decompressing_stream_reads_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(compression, 'DECOMPRESS_READ_SIZE', 1024)
+    data = os.urandom(8 * 1024) + b'x' * 100000
+    stream = DecompressingStream(ChunkedStream(gzip.compress(data), 1024), 'gzip')
+    parts = []
+    while True:
+        part = stream.read(5000)
+        if not part:
+            break
+        assert len(part) <= 5000
+        parts.append(part)
+    assert b''.join(parts) == data
+    stream.close()
+    assert stream._raw_stream.closed_by_caller
+
+
+def test_decompressing_stream_read_all():
+    data = b'hello ' * 1000
+    stream = DecompressingStream(ChunkedStream(gzip.compress(data), 100), 'gzip')
+    assert stream.read(6) == b'hello '
+    assert stream.read() == data[6:]
+    assert stream.read() == b''
+
+
+def test_decompressing_stream_reports_corrupt_content():
+    stream = DecompressingStream(ChunkedStream(b'not gzip content', 1024), 'gzip')
+    with pytest.raises(ValueError, match='Failed to decompress content'):
+        stream.read()
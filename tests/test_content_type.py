@@ -0,0 +1,50 @@
+import pytest
+
+from tools.utils import get_content_type_from_extension, resolve_content_type, sniff_content_type
+
+
+@pytest.mark.parametrize('head, expected', [
+    (b'\xff\xd8\xff\xe0' + b'\x00' * 16, 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n' + b'\x00' * 16, 'image/png'),
+    (b'GIF89a' + b'\x00' * 16, 'image/gif'),
+    (b'RIFF\x00\x00\x00\x00WEBPVP8 ', 'image/webp'),
+    (b'RIFF\x00\x00\x00\x00WAVEfmt ', 'audio/wav'),
+    (b'%PDF-1.7\n', 'application/pdf'),
+    (b'\x1f\x8b\x08\x00', 'application/gzip'),
+    (b'\xef\xbb\xbf  <?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg">', 'image/svg+xml'),
+    (b'<?xml version="1.0"?><root/>', 'application/xml'),
+    (b'<!DOCTYPE html><html></html>', 'text/html'),
+    (b'hello, world\n', 'text/plain'),
+    ('中文'.encode('utf-8')[:-1], 'text/plain'),
+])
+def test_sniff_known_signatures(head, expected):
+    assert sniff_content_type(head) == expected
+
+
+@pytest.mark.parametrize('head', [None, b'', b'\x00\x01\x02\x03binary', b'\xfe\xfe\xfe\xfe\xfe\xfe\xfe\xfe'])
+def test_sniff_unknown_content(head):
+    assert sniff_content_type(head) is None
+
+
+def test_tar_signature_at_offset():
+    head = b'\x00' * 257 + b'ustar' + b'\x00' * 250
+    assert sniff_content_type(head) == 'application/x-tar'
+
+
+@pytest.mark.parametrize('extension, expected', [
+    ('.mp4', 'video/mp4'),
+    ('.MOV', 'video/quicktime'),
+    ('.avi', 'video/x-msvideo'),
+    ('.json', 'application/json'),
+    ('.unknownext', 'application/octet-stream'),
+])
+def test_extension_lookup(extension, expected):
+    assert get_content_type_from_extension(extension) == expected
+
+
+def test_resolve_prefers_declared_then_extension_then_sniffing():
+    png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+    assert resolve_content_type('text/plain; charset=utf-8', '.png', png) == 'text/plain; charset=utf-8'
+    assert resolve_content_type('application/octet-stream', '.png', b'') == 'image/png'
+    assert resolve_content_type(None, '', png) == 'image/png'
+    assert resolve_content_type(None, '', None) == 'application/octet-stream'
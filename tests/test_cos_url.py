@@ -0,0 +1,22 @@
+from tools.cos_url import parse_cos_url, resolve_cos_url
+
+
+def test_standard_url():
+    url = 'https://examplebucket-1250000000.cos.ap-guangzhou.myqcloud.com/dir/a%20b.txt'
+    assert parse_cos_url(url) == ('examplebucket-1250000000', 'ap-guangzhou', 'dir/a b.txt')
+
+
+def test_custom_domain_has_no_bucket_or_region():
+    assert parse_cos_url('https://files.example.com/dir/file.txt') == (None, None, 'dir/file.txt')
+
+
+def test_other_myqcloud_host_is_not_parsed():
+    assert parse_cos_url('https://example.myqcloud.com/file.txt') == (None, None, 'file.txt')
+
+
+def test_resolve_falls_back_to_credentials():
+    credentials = {'bucket': 'default-1250000000', 'region': 'ap-beijing'}
+    assert resolve_cos_url('https://cdn.example.com/a.txt', credentials) == ('default-1250000000', 'ap-beijing',
+                                                                              'a.txt')
+    assert resolve_cos_url('https://b-1250000000.cos.ap-shanghai.myqcloud.com/a.txt', credentials) == (
+        'b-1250000000', 'ap-shanghai', 'a.txt')
@@ -0,0 +1,32 @@
+from tools.credential_cache import ValidationCache, is_definitive_failure
+
+CREDENTIALS = {'secret_id': 'id', 'secret_key': 'key', 'region': 'ap-beijing', 'bucket': 'bucket-1250000000'}
+
+
+def test_only_definitive_failures_are_cacheable():
+    assert is_definitive_failure(403, 'AccessDenied')
+    assert is_definitive_failure(404, 'NoSuchBucket')
+    assert is_definitive_failure(400, 'InvalidAccessKeyId')
+    assert not is_definitive_failure(429, 'TooManyRequests')
+    assert not is_definitive_failure(403, 'SlowDown')
+    assert not is_definitive_failure(403, 'RequestTimeTooSkewed')
+    assert not is_definitive_failure(400, 'InvalidArgument')
+    assert not is_definitive_failure(503, 'ServiceUnavailable')
+
+
+def test_success_and_failure_use_separate_ttls():
+    cache = ValidationCache(ttl=60, negative_ttl=-1)
+    cache.put_failure(CREDENTIALS, 'invalid')
+    assert cache.get(CREDENTIALS) is None
+    cache.put_success(CREDENTIALS)
+    assert cache.get(CREDENTIALS) == (True, None)
+
+
+def test_new_secret_key_invalidates_previous_result():
+    cache = ValidationCache(ttl=60, negative_ttl=60)
+    cache.put_failure(CREDENTIALS, 'invalid')
+    rotated = dict(CREDENTIALS, secret_key='new-key')
+    cache.put_success(rotated)
+    assert cache.get(CREDENTIALS) is None
+    assert cache.get(rotated) == (True, None)
+    assert cache.stats()['size'] == 1
@@ -0,0 +1,98 @@
+import io
+import random
+import subprocess
+
+import pytest
+
+from tools import image_optimization
+from tools.image_optimization import ImageOptions, optimize_image
+from tools.image_worker import transform_image
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Pillow是可选依赖，未安装时跳过需要真实编解码的测试
+requires_pillow = pytest.mark.skipif(Image is None, reason="Pillow is not installed")
+
+
+def encode(image, image_format, **options):
+    output = io.BytesIO()
+    image.save(output, format=image_format, **options)
+    return output.getvalue()
+
+
+def noisy_image(width, height):
+    # 随机噪声不易压缩，重新编码后的大小与尺寸相关
+    return Image.frombytes('RGB', (width, height), random.Random(0).randbytes(width * height * 3))
+
+
+@requires_pillow
+def test_transform_resizes_to_max_dimension():
+    data = encode(noisy_image(400, 200), 'JPEG', quality=95)
+    result = transform_image(data, 'JPEG', 100, 80)
+    assert result['original_dimensions'] == [400, 200]
+    assert result['dimensions'] == [100, 50]
+    with Image.open(io.BytesIO(result['data'])) as image:
+        assert image.format == 'JPEG' and image.size == (100, 50)
+
+
+@requires_pillow
+def test_transform_converts_to_webp_and_keeps_alpha():
+    data = encode(Image.new('RGBA', (64, 32), (255, 0, 0, 128)), 'PNG')
+    result = transform_image(data, 'WEBP', 0, 80)
+    assert result['format'] == 'webp'
+    assert result['dimensions'] == [64, 32]
+    with Image.open(io.BytesIO(result['data'])) as image:
+        assert image.format == 'WEBP' and image.mode == 'RGBA'
+
+
+@requires_pillow
+def test_transform_rejects_animated_images():
+    frames = [Image.new('RGB', (16, 16), color) for color in ('red', 'blue')]
+    data = encode(frames[0], 'GIF', save_all=True, append_images=frames[1:])
+    with pytest.raises(ValueError, match='animated'):
+        transform_image(data, 'WEBP', 0, 80)
+
+
+@requires_pillow
+def test_optimize_in_subprocess_reports_savings():
+    data = encode(noisy_image(400, 400), 'PNG')
+    result = optimize_image(data, 'image/png', ImageOptions('webp', 100, 80))
+    assert result.report['status'] == 'optimized'
+    assert result.content_type == 'image/webp' and result.extension == '.webp'
+    assert result.report['optimized_size_bytes'] == len(result.data) < len(data)
+    assert result.report['saved_bytes'] == len(data) - len(result.data)
+
+
+def test_larger_result_is_skipped(monkeypatch):
+    monkeypatch.setattr(image_optimization, '_run_worker', lambda data, *args: {
+        'data': data + b'!', 'format': 'jpeg', 'original_dimensions': [1, 1], 'dimensions': [1, 1]
+    })
+    result = optimize_image(b'jpeg', 'image/jpeg', ImageOptions('original', 0, 85))
+    assert result.data is None and result.content_type == 'image/jpeg'
+    assert result.report['status'] == 'skipped'
+    assert result.report['original_size_bytes'] == 4
+
+
+def test_worker_failure_keeps_original(monkeypatch):
+    def run(args, **kwargs):
+        return subprocess.CompletedProcess(args, 1, b'', b'Traceback\ncannot identify image file')
+
+    monkeypatch.setattr(image_optimization.subprocess, 'run', run)
+    result = optimize_image(b'not an image', 'image/png', ImageOptions('webp', 0, 85))
+    assert result.data is None and result.content_type == 'image/png'
+    assert result.report['status'] == 'failed'
+    assert result.report['reason'] == 'Cannot optimize image: cannot identify image file'
+
+
+def test_worker_timeout_keeps_original(monkeypatch):
+    def run(args, **kwargs):
+        raise subprocess.TimeoutExpired(args, kwargs['timeout'])
+
+    monkeypatch.setattr(image_optimization.subprocess, 'run', run)
+    result = optimize_image(b'jpeg', 'image/jpeg', ImageOptions('original', 0, 85))
+    assert result.data is None
+    assert result.report['status'] == 'failed'
+    assert 'timed out' in result.report['reason']
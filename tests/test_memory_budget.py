@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from tools.memory_budget import MemoryBudget
+
+
+def test_release_is_idempotent_and_context_manager_releases():
+    budget = MemoryBudget(100, max_wait=0)
+    reservation = budget.acquire(60)
+    reservation.release()
+    reservation.release()
+    assert budget.snapshot()['in_use_bytes'] == 0
+    with pytest.raises(RuntimeError):
+        with budget.acquire(100):
+            raise RuntimeError('transfer failed')
+    assert budget.snapshot()['in_use_bytes'] == 0
+
+
+def test_timeout_rejects_and_leaves_no_waiter():
+    budget = MemoryBudget(100, max_wait=0)
+    held = budget.acquire(80)
+    with pytest.raises(ValueError, match='Memory budget exhausted'):
+        budget.acquire(30, timeout=0.05)
+    snapshot = budget.snapshot()
+    assert snapshot['rejected'] == 1 and snapshot['waiting'] == 0 and snapshot['in_use_bytes'] == 80
+    held.release()
+    budget.acquire(30).release()
+
+
+def test_oversized_request_is_capped_at_limit():
+    budget = MemoryBudget(100, max_wait=0)
+    with budget.acquire(1000) as reservation:
+        assert reservation.nbytes == 100
+
+
+def test_unlimited_budget_never_blocks():
+    budget = MemoryBudget(0)
+    reservation = budget.acquire(10 ** 12)
+    assert reservation.nbytes == 0
+    reservation.extend(10 ** 12)
+    assert reservation.nbytes == 0
+    assert budget.try_acquire(10 ** 12) is not None
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    budget = MemoryBudget(100, max_wait=5)
+    held = budget.acquire(100)
+    order = []
+
+    def worker(name, nbytes):
+        with budget.acquire(nbytes):
+            order.append(name)
+
+    large = threading.Thread(target=worker, args=('large', 90))
+    large.start()
+    while budget.snapshot()['waiting'] < 1:
+        time.sleep(0.01)
+    small = threading.Thread(target=worker, args=('small', 10))
+    small.start()
+    while budget.snapshot()['waiting'] < 2:
+        time.sleep(0.01)
+    # 排在前面的大请求不会被后来的小请求插队
+    held.release()
+    large.join(5)
+    small.join(5)
+    assert order == ['large', 'small']
+    assert budget.snapshot()['in_use_bytes'] == 0
+
+
+def test_try_acquire_does_not_queue_or_jump_the_queue():
+    budget = MemoryBudget(100, max_wait=5)
+    held = budget.acquire(90)
+    assert budget.try_acquire(20) is None
+    assert budget.snapshot()['rejected'] == 0
+    window = budget.try_acquire(10)
+    assert window is not None
+    window.release()
+
+    waiter = threading.Thread(target=lambda: budget.acquire(50).release())
+    waiter.start()
+    while budget.snapshot()['waiting'] < 1:
+        time.sleep(0.01)
+    # 已有等待者时即使剩余预算足够也不放行
+    assert budget.try_acquire(5) is None
+    held.release()
+    waiter.join(5)
+    assert budget.snapshot()['in_use_bytes'] == 0
+
+
+def test_extend_is_released_with_reservation_and_capped():
+    budget = MemoryBudget(100, max_wait=0)
+    reservation = budget.acquire(40)
+    reservation.extend(30)
+    assert reservation.nbytes == 70
+    reservation.extend(1000)
+    assert reservation.nbytes == 100
+    reservation.release()
+    assert budget.snapshot()['in_use_bytes'] == 0
+    reservation.extend(10)
+    assert budget.snapshot()['in_use_bytes'] == 0
+
+
+def test_failed_extend_keeps_original_reservation():
+    budget = MemoryBudget(100, max_wait=0)
+    other = budget.acquire(50)
+    reservation = budget.acquire(40)
+    with pytest.raises(ValueError):
+        reservation.extend(30, timeout=0)
+    assert reservation.nbytes == 40
+    reservation.release()
+    other.release()
+    assert budget.snapshot()['in_use_bytes'] == 0
@@ -0,0 +1,131 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from qcloud_cos.cos_exception import CosServiceError
+
+from tools import multi_upload_files
+from tools.multi_upload_files import MultiUploadFilesTool
+
+CREDENTIALS = {'region': 'ap-test', 'bucket': 'test-1250000000', 'secret_id': 'id', 'secret_key': 'key'}
+
+
+def service_error(status_code, code=''):
+    message = {'code': code, 'message': code, 'resource': '', 'requestid': '', 'traceid': ''}
+    return CosServiceError('PUT', message, status_code)
+
+
+class FakeClient:
+    """按对象键记录上传请求的COS客户端，failures 为每个文件名依次抛出的异常"""
+
+    def __init__(self, failures=None, before_upload=None):
+        self.failures = {name: list(errors) for name, errors in (failures or {}).items()}
+        self.before_upload = before_upload
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def upload_file(self, Bucket, LocalFilePath, Key, **kwargs):
+        name = Key.rsplit('/', 1)[-1]
+        if self.before_upload:
+            self.before_upload(name)
+        with self.lock:
+            self.calls.append(name)
+            errors = self.failures.get(name)
+            error = errors.pop(0) if errors else None
+        if error is not None:
+            raise error
+        return {'ETag': '"etag"'}
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 100)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def tool(monkeypatch):
+    monkeypatch.setattr('tools.retry.time.sleep', lambda seconds: None)
+    monkeypatch.setattr(multi_upload_files, 'validate_credentials', lambda credentials: None)
+    return MultiUploadFilesTool(runtime=SimpleNamespace(credentials=CREDENTIALS), session=None)
+
+
+def use_client(monkeypatch, client):
+    monkeypatch.setattr(multi_upload_files, 'get_cos_client', lambda credentials: client)
+
+
+def upload(tool, files, **parameters):
+    parameters = {'files': files, 'directory': 'batch', **parameters}
+    return list(tool._upload_files(parameters, CREDENTIALS))
+
+
+def test_results_stream_in_completion_order_with_input_index(tool, files, monkeypatch):
+    # a.txt 等到 b.txt 上传完成后才开始，先完成的文件先返回
+    b_done = threading.Event()
+
+    def before_upload(name):
+        if name == 'a.txt':
+            assert b_done.wait(5)
+
+    client = FakeClient(before_upload=before_upload)
+    original = client.upload_file
+
+    def upload_file(**kwargs):
+        result = original(**kwargs)
+        if kwargs['Key'].endswith('b.txt'):
+            b_done.set()
+        return result
+
+    client.upload_file = upload_file
+    use_client(monkeypatch, client)
+
+    results = upload(tool, files[:2], concurrency=2)
+    assert [index for index, _ in results] == [1, 0]
+    assert [result['object_key'] for _, result in results] == ['batch/b.txt', 'batch/a.txt']
+
+
+def test_summary_lists_files_in_input_order(tool, files, monkeypatch):
+    use_client(monkeypatch, FakeClient())
+    messages = list(tool._invoke({'files': files, 'directory': 'batch', 'concurrency': 3}))
+    json_messages = [message.message.json_object for message in messages
+                     if message.type == message.MessageType.JSON]
+    assert [message['status'] for message in json_messages] == ['in_progress'] * 3 + ['completed']
+    assert sorted(message['index'] for message in json_messages[:3]) == [0, 1, 2]
+    assert [file_info['filename'] for file_info in json_messages[-1]['files']] == ['a.txt', 'b.txt', 'c.txt']
+
+
+def test_failed_file_does_not_fail_the_others(tool, files, monkeypatch):
+    client = FakeClient(failures={'b.txt': [service_error(403, 'AccessDenied')]})
+    use_client(monkeypatch, client)
+
+    results = dict(upload(tool, files, concurrency=3))
+    assert [results[i]['status'] for i in range(3)] == ['success', 'failed', 'success']
+    assert 'AccessDenied' in results[1]['error']
+    assert sorted(client.calls) == ['a.txt', 'b.txt', 'c.txt']
+
+
+def test_transient_failure_is_retried(tool, files, monkeypatch):
+    client = FakeClient(failures={'a.txt': [service_error(503, 'ServiceUnavailable')]})
+    use_client(monkeypatch, client)
+
+    results = dict(upload(tool, files[:1]))
+    assert results[0]['status'] == 'success'
+    assert results[0]['retries'] == 1
+    assert client.calls == ['a.txt', 'a.txt']
+
+
+def test_retry_budget_is_shared_across_files(tool, files, monkeypatch):
+    # 预算按文件数量放宽到3次，三个文件一直失败时总重试次数不超过预算
+    monkeypatch.setattr(MultiUploadFilesTool, 'RETRY_BUDGET', 1)
+    always_failing = [service_error(503, 'ServiceUnavailable')] * 10
+    client = FakeClient(failures={name: always_failing for name in ('a.txt', 'b.txt', 'c.txt')})
+    use_client(monkeypatch, client)
+
+    results = dict(upload(tool, files, concurrency=1))
+    assert all(result['status'] == 'failed' for result in results.values())
+    assert sum(result['retries'] for result in results.values()) == 3
+    assert len(client.calls) == 3 + 3
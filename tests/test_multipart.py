@@ -0,0 +1,24 @@
+from tools.multipart import MAX_PART_COUNT, MIN_PART_SIZE, resolve_part_size
+
+MB = 1024 * 1024
+
+
+def test_part_size_raised_to_minimum():
+    assert resolve_part_size(10 * MB, 1) == MIN_PART_SIZE
+    assert resolve_part_size(0, 0) == MIN_PART_SIZE
+
+
+def test_part_size_kept_when_within_part_count():
+    assert resolve_part_size(100 * MB, 8 * MB) == 8 * MB
+
+
+def test_exactly_max_part_count_is_allowed():
+    total = MAX_PART_COUNT * 8 * MB
+    assert resolve_part_size(total, 8 * MB) == 8 * MB
+
+
+def test_part_size_grows_when_part_count_exceeded():
+    total = MAX_PART_COUNT * 8 * MB + 1
+    part_size = resolve_part_size(total, 8 * MB)
+    assert part_size > 8 * MB
+    assert (total + part_size - 1) // part_size <= MAX_PART_COUNT
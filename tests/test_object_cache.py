@@ -0,0 +1,90 @@
+import pytest
+
+from tools.object_cache import ObjectCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        kwargs.setdefault('cache_dir', str(tmp_path))
+        cache = ObjectCache(**kwargs)
+        caches.append(cache)
+        return cache
+    yield make
+    for cache in caches:
+        cache.clear()
+
+
+def key(name):
+    return ('bucket-1250000000', 'ap-beijing', name)
+
+
+def put(cache, name, size):
+    return cache.put(key(name), name.encode()[:1] * size, f'etag-{name}', None, 'text/plain')
+
+
+def test_put_and_get_returns_snapshot(make_cache):
+    cache = make_cache(memory_bytes=100, disk_bytes=0)
+    assert put(cache, 'a', 10)
+    entry = cache.get(key('a'))
+    assert entry.data == b'a' * 10 and entry.etag == 'etag-a'
+    assert cache.get(key('missing')) is None
+
+
+def test_rejects_oversized_objects_and_missing_etag(make_cache):
+    cache = make_cache(memory_bytes=100, disk_bytes=0, max_object_bytes=50)
+    assert not put(cache, 'a', 51)
+    assert not cache.put(key('b'), b'b', '', None, 'text/plain')
+    assert cache.stats()['memory_entries'] == 0
+
+
+def test_lru_demotes_to_disk_and_promotes_on_hit(make_cache):
+    cache = make_cache(memory_bytes=20, disk_bytes=100)
+    put(cache, 'a', 10)
+    put(cache, 'b', 10)
+    # 访问a后b成为最久未使用，写入c时b被降级到磁盘
+    cache.get(key('a'))
+    put(cache, 'c', 10)
+    stats = cache.stats()
+    assert stats['memory_bytes'] == 20 and stats['disk_entries'] == 1 and stats['disk_bytes'] == 10
+    assert cache.get(key('b')).data == b'b' * 10
+    stats = cache.stats()
+    assert stats['disk_entries'] == 1 and stats['memory_bytes'] == 20
+
+
+def test_evicts_when_disk_budget_exceeded(make_cache):
+    cache = make_cache(memory_bytes=10, disk_bytes=15)
+    put(cache, 'a', 10)
+    put(cache, 'b', 10)
+    put(cache, 'c', 10)
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['disk_bytes'] <= 15
+    assert cache.get(key('a')) is None
+
+
+def test_without_disk_demotion_evicts(make_cache):
+    cache = make_cache(memory_bytes=10, disk_bytes=0)
+    put(cache, 'a', 10)
+    put(cache, 'b', 10)
+    assert cache.get(key('a')) is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_evicted(make_cache):
+    cache = make_cache(memory_bytes=100, disk_bytes=0, ttl=-1)
+    put(cache, 'a', 10)
+    assert cache.get(key('a')) is None
+    assert cache.stats()['memory_bytes'] == 0
+
+
+def test_invalidate_and_replace_keep_accounting(make_cache):
+    cache = make_cache(memory_bytes=100, disk_bytes=0)
+    put(cache, 'a', 10)
+    cache.put(key('a'), b'x' * 30, 'etag-2', None, 'text/plain')
+    assert cache.stats()['memory_bytes'] == 30
+    cache.invalidate(key('a'))
+    assert cache.get(key('a')) is None
+    assert cache.stats()['memory_bytes'] == 0
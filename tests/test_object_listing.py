@@ -0,0 +1,119 @@
+import pytest
+
+from tools.object_listing import PrefixIndex, list_cos_page, paginate
+
+BUCKET = 'bucket-1250000000'
+REGION = 'ap-beijing'
+
+
+class FakeListClient:
+    """按GET Bucket语义返回列举结果的客户端"""
+
+    def __init__(self, keys):
+        self.objects = {key: index for index, key in enumerate(keys)}
+        self.requests = 0
+
+    def list_objects(self, Bucket, Prefix='', Delimiter='', Marker='', MaxKeys=1000):
+        self.requests += 1
+        contents, prefixes = [], []
+        truncated = False
+        for key in sorted(self.objects):
+            if not key.startswith(Prefix) or key <= Marker:
+                continue
+            separator = key.find(Delimiter, len(Prefix)) if Delimiter else -1
+            common_prefix = key[:separator + len(Delimiter)] if separator >= 0 else None
+            if common_prefix is not None and (common_prefix == Marker or common_prefix in prefixes):
+                continue
+            if len(contents) + len(prefixes) >= MaxKeys:
+                truncated = True
+                break
+            if common_prefix is not None:
+                prefixes.append(common_prefix)
+            else:
+                contents.append({'Key': key, 'Size': str(self.objects[key]), 'ETag': f'"{key}"',
+                                 'LastModified': '2024-01-01T00:00:00.000Z'})
+        response = {'Contents': contents, 'CommonPrefixes': [{'Prefix': p} for p in prefixes],
+                    'IsTruncated': 'true' if truncated else 'false'}
+        if truncated:
+            response['NextMarker'] = max([c['Key'] for c in contents[-1:]] + prefixes[-1:])
+        return response
+
+
+KEYS = ['a.txt', 'logs/2024/01/a.log', 'logs/2024/01/b.log', 'logs/2024/02/a.log', 'logs/b.log',
+        'logs/c/', 'logs/c/d.txt', 'logs/e.txt', 'logsx.txt', 'z.txt']
+
+
+def entries_for(keys):
+    return {key: (index, key, '2024-01-01T00:00:00.000Z') for index, key in enumerate(keys)}
+
+
+def collect(list_page, prefix, delimiter, max_keys):
+    pages, marker = [], ''
+    while True:
+        page = list_page(prefix, delimiter, marker, max_keys)
+        pages.append(([obj['key'] for obj in page.objects], page.common_prefixes, page.is_truncated))
+        if not page.is_truncated:
+            return pages
+        marker = page.next_marker
+
+
+@pytest.mark.parametrize('prefix', ['', 'logs/', 'logs', 'logs/2024/', 'missing/'])
+@pytest.mark.parametrize('delimiter', ['', '/'])
+@pytest.mark.parametrize('max_keys', [1, 2, 3, 1000])
+def test_paginate_matches_get_bucket(prefix, delimiter, max_keys):
+    keys = sorted(KEYS)
+    entries = entries_for(keys)
+    client = FakeListClient(keys)
+    expected = collect(lambda p, d, m, n: list_cos_page(client, BUCKET, p, d, m, n), prefix, delimiter, max_keys)
+    actual = collect(lambda p, d, m, n: paginate(keys, entries, p, d, m, n), prefix, delimiter, max_keys)
+    assert actual == expected
+
+
+def test_markers_are_interchangeable():
+    keys = sorted(KEYS)
+    client = FakeListClient(keys)
+    cos_page = list_cos_page(client, BUCKET, 'logs/', '/', '', 2)
+    local_page = paginate(keys, entries_for(keys), 'logs/', '/', cos_page.next_marker, 1000)
+    assert cos_page.common_prefixes == ['logs/2024/']
+    assert [obj['key'] for obj in cos_page.objects] == ['logs/b.log']
+    assert [obj['key'] for obj in local_page.objects] == ['logs/e.txt']
+    assert local_page.common_prefixes == ['logs/c/']
+
+
+def test_prefix_index_full_scan_then_tail_scan():
+    client = FakeListClient(['p/1', 'p/2'])
+    index = PrefixIndex(ttl=60, max_keys=100)
+    assert index.list_page(BUCKET, REGION, 'p/') is None
+    assert index.refresh(client, BUCKET, REGION, 'p/') == 'full_scan'
+    client.objects['p/3'] = 3
+    assert index.refresh(client, BUCKET, REGION, 'p/sub') == 'tail_scan'
+    page = index.list_page(BUCKET, REGION, 'p/')
+    assert [obj['key'] for obj in page.objects] == ['p/1', 'p/2', 'p/3']
+    assert index.stats()['keys'] == 3
+
+
+def test_prefix_index_records_writes_and_deletes():
+    index = PrefixIndex(ttl=60, max_keys=100)
+    index.refresh(FakeListClient(['p/1']), BUCKET, REGION, 'p/')
+    index.record_put(BUCKET, REGION, 'p/0', 5, 'etag')
+    index.record_put(BUCKET, REGION, 'q/0', 5, 'etag')
+    index.record_delete(BUCKET, REGION, 'p/1')
+    page = index.list_page(BUCKET, REGION, 'p/')
+    assert [obj['key'] for obj in page.objects] == ['p/0']
+    assert page.objects[0]['size'] == 5
+    assert index.stats()['keys'] == 1
+
+
+def test_prefix_index_skips_prefix_over_capacity():
+    index = PrefixIndex(ttl=60, max_keys=2)
+    assert index.refresh(FakeListClient(['p/1', 'p/2', 'p/3']), BUCKET, REGION, 'p/') is None
+    assert index.list_page(BUCKET, REGION, 'p/') is None
+
+
+def test_expired_index_is_rescanned():
+    client = FakeListClient(['p/1', 'p/2'])
+    index = PrefixIndex(ttl=-1, max_keys=100)
+    index.refresh(client, BUCKET, REGION, 'p/')
+    del client.objects['p/1']
+    assert index.refresh(client, BUCKET, REGION, 'p/') == 'full_scan'
+    assert [obj['key'] for obj in index.list_page(BUCKET, REGION, 'p/').objects] == ['p/2']
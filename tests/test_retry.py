@@ -0,0 +1,98 @@
+import pytest
+import requests
+from qcloud_cos.cos_exception import CosClientError, CosServiceError
+
+from tools.retry import RetryBudget, RetryContext, is_retryable
+
+
+def service_error(status_code, code=''):
+    message = {'code': code, 'message': code, 'resource': '', 'requestid': '', 'traceid': ''}
+    return CosServiceError('GET', message, status_code)
+
+
+@pytest.mark.parametrize('status_code, code', [(429, ''), (503, ''), (400, 'SlowDown'), (400, 'TooManyRequests')])
+def test_throttling_retried_even_when_not_idempotent(status_code, code):
+    assert is_retryable(service_error(status_code, code), idempotent=True)
+    assert is_retryable(service_error(status_code, code), idempotent=False)
+
+
+@pytest.mark.parametrize('status_code, code', [(408, ''), (500, ''), (502, ''), (504, ''), (400, 'RequestTimeout')])
+def test_server_errors_retried_only_when_idempotent(status_code, code):
+    assert is_retryable(service_error(status_code, code), idempotent=True)
+    assert not is_retryable(service_error(status_code, code), idempotent=False)
+
+
+@pytest.mark.parametrize('status_code', [400, 403, 404, 412])
+def test_client_errors_not_retried(status_code):
+    assert not is_retryable(service_error(status_code, 'NoSuchKey'))
+
+
+def test_network_errors_retried_only_when_idempotent():
+    for error in (ConnectionResetError(), TimeoutError(), CosClientError('timeout')):
+        assert is_retryable(error, idempotent=True)
+        assert not is_retryable(error, idempotent=False)
+    assert not is_retryable(ValueError('bad'))
+
+
+def wrapped_client_error(cause):
+    # 与SDK相同：在except块中将底层异常转换为CosClientError
+    try:
+        raise cause
+    except Exception as e:
+        try:
+            raise CosClientError(str(e))
+        except CosClientError as client_error:
+            return client_error
+
+
+def test_client_errors_retried_only_for_connection_failures():
+    assert is_retryable(wrapped_client_error(requests.ConnectionError('Connection aborted')))
+    assert is_retryable(wrapped_client_error(requests.ReadTimeout('Read timed out')))
+    assert not is_retryable(wrapped_client_error(ValueError('Bucket format error')))
+    assert not is_retryable(CosClientError('Bucket is required'))
+    assert is_retryable(CosClientError('Connection reset by peer'))
+
+
+def test_retry_budget_exhausts():
+    budget = RetryBudget(2)
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.remaining == 0
+    assert RetryBudget(-1).limit == 0
+
+
+def flaky(failures, error):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return 'ok'
+    return func, calls
+
+
+def test_call_retries_until_success_and_counts_in_parent():
+    parent = RetryContext(RetryBudget(5), max_retries=3, base_delay=0)
+    child = parent.child()
+    func, calls = flaky(2, ConnectionResetError())
+    assert child.call(func) == 'ok'
+    assert len(calls) == 3
+    assert child.retries == 2 and parent.retries == 2
+    assert parent.budget.remaining == 3
+
+
+def test_call_stops_when_budget_exhausted():
+    context = RetryContext(RetryBudget(1), max_retries=5, base_delay=0)
+    func, calls = flaky(3, service_error(503))
+    with pytest.raises(CosServiceError):
+        context.call(func)
+    assert len(calls) == 2
+
+
+def test_call_does_not_retry_non_idempotent_server_error():
+    context = RetryContext(RetryBudget(5), base_delay=0)
+    func, calls = flaky(1, service_error(500))
+    with pytest.raises(CosServiceError):
+        context.call(func, idempotent=False)
+    assert len(calls) == 1
@@ -0,0 +1,598 @@
+"""
+基于asyncio的COS传输层
+
+在插件进程内共享一个后台事件循环，使用 httpx.AsyncClient 发起 PUT/GET/HEAD/
+分块上传请求，请求签名（COS XML API签名v5）在本地计算，不经过COS SDK。
+大量并发传输复用少量连接和一个事件循环线程，等待网络时不占用线程。
+
+AsyncTransportClient 是同步外观，提供工具所用的CosS3Client接口子集，
+通过 COS_TRANSPORT=async 启用后现有工具无需修改即可使用。外观的每次调用都会阻塞调用线程
+直到请求完成，工具中由线程池发起的并发请求仍各占一个线程；只有 upload_file 的分块在事件循环内
+并发上传，不占用额外的线程。
+
+注意：dify_plugin 导入时会执行 gevent monkey patch，此时“后台线程”实际是
+greenlet，事件循环通过被替换的 select 与其他greenlet协作调度，功能不变。
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlencode
+
+import httpx
+
+from . import cos_sdk
+from .multipart import resolve_part_size
+
+# 每个传输实例的最大连接数
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('COS_ASYNC_MAX_CONNECTIONS', '100'))
+
+# 单个请求的超时时间（秒）
+ASYNC_TIMEOUT = float(os.environ.get('COS_ASYNC_TIMEOUT', '60'))
+
+# 签名有效期（秒）
+SIGN_EXPIRE = 10000
+
+# 从本地文件流式上传时每次读取的字节数
+FILE_CHUNK_SIZE = 256 * 1024
+
+# 参与签名的请求头（另外包括所有 x-cos- 和 x-ci- 开头的请求头），与COS SDK一致
+SIGNED_HEADERS = frozenset((
+    'cache-control', 'content-disposition', 'content-encoding', 'content-type', 'content-md5',
+    'content-length', 'expect', 'expires', 'host', 'if-match', 'if-modified-since', 'if-none-match',
+    'if-unmodified-since', 'origin', 'range', 'transfer-encoding', 'pic-operations'
+))
+
+# CosS3Client风格的参数名 -> 请求头
+HEADER_PARAMETERS = {
+    'ContentType': 'Content-Type',
+    'ContentEncoding': 'Content-Encoding',
+    'ContentDisposition': 'Content-Disposition',
+    'ContentLanguage': 'Content-Language',
+    'ContentMD5': 'Content-MD5',
+    'CacheControl': 'Cache-Control',
+    'Expires': 'Expires',
+    'Range': 'Range',
+    'IfMatch': 'If-Match',
+    'IfNoneMatch': 'If-None-Match',
+    'IfModifiedSince': 'If-Modified-Since',
+    'IfUnmodifiedSince': 'If-Unmodified-Since',
+    'ACL': 'x-cos-acl',
+    'StorageClass': 'x-cos-storage-class',
+    'TrafficLimit': 'x-cos-traffic-limit'
+}
+
+
+def _encode(value: Any) -> str:
+    return quote(str(value).encode('utf-8'), safe='-_.~')
+
+
+def sign_request(secret_id: str, secret_key: str, method: str, path: str, params: Dict[str, Any],
+                 headers: Dict[str, Any], expire: int = SIGN_EXPIRE, now: Optional[int] = None) -> str:
+    """
+    计算COS请求的Authorization头
+
+    Args:
+        secret_id: 腾讯云SecretId
+        secret_key: 腾讯云SecretKey
+        method: HTTP方法
+        path: 未编码的对象路径（以/开头）
+        params: 查询参数
+        headers: 请求头，只有SIGNED_HEADERS和x-cos-、x-ci-开头的请求头参与签名
+        expire: 签名有效期（秒）
+        now: 签名起始时间戳，默认为当前时间
+
+    Returns:
+        Authorization头的值
+    """
+    now = int(time.time()) if now is None else now
+    sign_time = f"{now - 60};{now + expire}"
+    signed_headers = {
+        _encode(name).lower(): _encode(value) for name, value in headers.items()
+        if name.lower() in SIGNED_HEADERS or name.lower().startswith(('x-cos-', 'x-ci-'))
+    }
+    signed_params = {_encode(name).lower(): _encode(value) for name, value in params.items()}
+    http_string = '\n'.join((
+        method.lower(),
+        path,
+        '&'.join(f"{name}={value}" for name, value in sorted(signed_params.items())),
+        '&'.join(f"{name}={value}" for name, value in sorted(signed_headers.items())),
+        ''
+    ))
+    string_to_sign = f"sha1\n{sign_time}\n{hashlib.sha1(http_string.encode('utf-8')).hexdigest()}\n"
+    sign_key = hmac.new(secret_key.encode('utf-8'), sign_time.encode('utf-8'), hashlib.sha1).hexdigest()
+    signature = hmac.new(sign_key.encode('utf-8'), string_to_sign.encode('utf-8'), hashlib.sha1).hexdigest()
+    return (f"q-sign-algorithm=sha1&q-ak={secret_id}&q-sign-time={sign_time}&q-key-time={sign_time}"
+            f"&q-header-list={';'.join(sorted(signed_headers))}&q-url-param-list={';'.join(sorted(signed_params))}"
+            f"&q-signature={signature}")
+
+
+class _EventLoopThread:
+    """进程内共享的后台事件循环，首次使用时启动"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                thread = threading.Thread(target=self._run, args=(loop, ready), name='cos-async-transport',
+                                          daemon=True)
+                thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop())
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """在共享事件循环中执行协程并阻塞等待结果"""
+        return self.submit(coroutine).result()
+
+
+_event_loop = _EventLoopThread()
+
+
+def get_event_loop() -> _EventLoopThread:
+    """返回进程级共享的后台事件循环"""
+    return _event_loop
+
+
+class AsyncCosTransport:
+    """
+    单个地域和凭据对应的异步COS传输
+
+    所有协程都必须在同一个事件循环中执行（通常是共享的后台事件循环）。
+    """
+
+    def __init__(self, region: str, secret_id: str, secret_key: str, endpoint: Optional[str] = None,
+                 scheme: Optional[str] = None, ip: Optional[str] = None, port: Optional[int] = None,
+                 max_connections: int = ASYNC_MAX_CONNECTIONS, timeout: float = ASYNC_TIMEOUT):
+        self.region = region
+        self._secret_id = secret_id
+        self._secret_key = secret_key
+        self._endpoint = endpoint or f"cos.{region}.myqcloud.com"
+        self._scheme = scheme or 'https'
+        # 设置IP时直连该地址，Host头仍为存储桶域名
+        self._ip = ip
+        self._port = port
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = httpx.Timeout(timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # 在事件循环中首次使用时创建，保证连接池绑定到该循环
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+        return self._client
+
+    async def request(self, method: str, bucket: str, key: str = '', params: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None, content: Any = None,
+                      stream: bool = False) -> httpx.Response:
+        """
+        发送签名后的请求，状态码不小于400时抛出CosServiceError
+
+        Args:
+            method: HTTP方法
+            bucket: 存储桶名称
+            key: 对象键
+            params: 查询参数
+            headers: 请求头
+            content: 请求体
+            stream: 是否以流方式返回响应体，调用方负责关闭
+
+        Returns:
+            httpx响应
+        """
+        params = params or {}
+        url, host = self._object_url(bucket, key)
+        request_headers = dict(headers or {})
+        request_headers['Host'] = host
+        request_headers['Authorization'] = sign_request(self._secret_id, self._secret_key, method, '/' + key,
+                                                        params, request_headers)
+        client = self._get_client()
+        request = client.build_request(method, url, params=params, headers=request_headers, content=content)
+        response = await client.send(request, stream=stream)
+        if response.status_code >= 400:
+            await self._raise_for_status(method, url, response)
+        return response
+
+    def _object_url(self, bucket: str, key: str) -> Tuple[str, str]:
+        # 返回对象的请求URL和Host头；设置IP时URL指向该地址
+        host = f"{bucket}.{self._endpoint}"
+        netloc = self._ip or host
+        if self._port:
+            netloc = f"{netloc}:{self._port}"
+        return f"{self._scheme}://{netloc}/{quote(key.encode('utf-8'), safe='/-_.~')}", host
+
+    def get_presigned_url(self, method: str, bucket: str, key: str, expire: int,
+                          params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        生成预签名URL，签名以查询参数的形式附加，本地计算不发起请求
+
+        Args:
+            method: HTTP方法
+            bucket: 存储桶名称
+            key: 对象键
+            expire: 签名有效期（秒）
+            params: 参与签名的查询参数
+            headers: 参与签名的请求头，使用URL时必须携带相同的请求头
+
+        Returns:
+            预签名URL
+        """
+        params = params or {}
+        url, host = self._object_url(bucket, key)
+        sign_headers = dict(headers or {})
+        sign_headers['Host'] = host
+        authorization = sign_request(self._secret_id, self._secret_key, method, '/' + key, params, sign_headers,
+                                     expire=expire)
+        query = urlencode(dict(item.split('=', 1) for item in authorization.split('&')))
+        if params:
+            query += '&' + urlencode(params)
+        return f"{url}?{query}"
+
+    async def _raise_for_status(self, method: str, url: str, response: httpx.Response) -> None:
+        # 与COS SDK一致：HEAD无响应体时使用请求ID等信息构造错误
+        body = await response.aread()
+        await response.aclose()
+        if method == 'HEAD' or not body:
+            message = {
+                'code': 'NoSuchResource' if response.status_code == 404 else str(response.status_code),
+                'message': 'The Resource You Head Not Exist' if response.status_code == 404 else response.reason_phrase,
+                'resource': url,
+                'requestid': response.headers.get('x-cos-request-id', ''),
+                'traceid': response.headers.get('x-cos-trace-id', '')
+            }
+        else:
+            message = body.decode('utf-8', errors='replace')
+        raise cos_sdk.CosServiceError(method, message, response.status_code)
+
+    async def put_object(self, bucket: str, key: str, body: Any, headers: Optional[Dict[str, str]] = None) -> Dict:
+        response = await self.request('PUT', bucket, key, headers=headers, content=body)
+        return _response_headers(response)
+
+    async def get_object(self, bucket: str, key: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """发起GET请求，返回尚未读取的流式响应，调用方负责关闭"""
+        return await self.request('GET', bucket, key, headers=headers, stream=True)
+
+    async def head_object(self, bucket: str, key: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        response = await self.request('HEAD', bucket, key, headers=headers)
+        return _response_headers(response)
+
+    async def head_bucket(self, bucket: str) -> Dict:
+        response = await self.request('HEAD', bucket)
+        return _response_headers(response)
+
+    async def delete_object(self, bucket: str, key: str) -> Dict:
+        response = await self.request('DELETE', bucket, key)
+        return _response_headers(response)
+
+    async def copy_object(self, bucket: str, key: str, headers: Dict[str, str]) -> Dict:
+        """服务端复制对象，headers中需包含x-cos-copy-source"""
+        response = await self.request('PUT', bucket, key, headers=headers)
+        result = _response_headers(response)
+        result.update(_parse_xml(response.content))
+        return result
+
+    async def upload_part_copy(self, bucket: str, key: str, upload_id: str, part_number: int,
+                               headers: Dict[str, str]) -> Dict:
+        response = await self.request('PUT', bucket, key, params={'partNumber': part_number, 'uploadId': upload_id},
+                                      headers=headers)
+        result = _response_headers(response)
+        result.update(_parse_xml(response.content))
+        return result
+
+    async def create_multipart_upload(self, bucket: str, key: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        response = await self.request('POST', bucket, key, params={'uploads': ''}, headers=headers)
+        return _parse_xml(response.content)
+
+    async def upload_part(self, bucket: str, key: str, upload_id: str, part_number: int, body: Any) -> Dict:
+        response = await self.request('PUT', bucket, key, params={'partNumber': part_number, 'uploadId': upload_id},
+                                      content=body)
+        return _response_headers(response)
+
+    async def complete_multipart_upload(self, bucket: str, key: str, upload_id: str, parts: List[Dict]) -> Dict:
+        xml = '<CompleteMultipartUpload>' + ''.join(
+            f"<Part><PartNumber>{part['PartNumber']}</PartNumber><ETag>{part['ETag']}</ETag></Part>" for part in parts
+        ) + '</CompleteMultipartUpload>'
+        response = await self.request('POST', bucket, key, params={'uploadId': upload_id},
+                                      headers={'Content-Type': 'application/xml'}, content=xml.encode('utf-8'))
+        return _parse_xml(response.content)
+
+    async def abort_multipart_upload(self, bucket: str, key: str, upload_id: str) -> None:
+        await self.request('DELETE', bucket, key, params={'uploadId': upload_id})
+
+    async def upload_file(self, bucket: str, key: str, path: str, part_size: int, concurrency: int,
+                          headers: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        上传本地文件，文件内容边读边发送，不整体载入内存
+
+        不超过part_size的文件以单次PUT上传；更大的文件使用分块上传，最多concurrency个分块同时上传，
+        任一分块失败时取消其余分块并中止分块上传。
+
+        Args:
+            bucket: 存储桶名称
+            key: 对象键
+            path: 本地文件路径
+            part_size: 分块大小（字节）
+            concurrency: 并发上传的分块数量
+            headers: 请求头
+
+        Returns:
+            单次上传时为响应头，分块上传时为完成请求的结果
+        """
+        size = os.path.getsize(path)
+        if size <= part_size:
+            # 显式给出Content-Length，流式请求体不使用chunked编码
+            headers = dict(headers or {})
+            headers['Content-Length'] = str(size)
+            return await self.put_object(bucket, key, _iter_file(path, 0, size), headers)
+
+        part_size = resolve_part_size(size, part_size)
+        upload_id = (await self.create_multipart_upload(bucket, key, headers))['UploadId']
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def upload_part(part_number: int, offset: int) -> Dict:
+            async with semaphore:
+                length = min(part_size, size - offset)
+                response = await self.request(
+                    'PUT', bucket, key, params={'partNumber': part_number, 'uploadId': upload_id},
+                    headers={'Content-Length': str(length)}, content=_iter_file(path, offset, length)
+                )
+                return {'PartNumber': part_number, 'ETag': response.headers.get('ETag', '')}
+
+        tasks = [asyncio.ensure_future(upload_part(number, offset))
+                 for number, offset in enumerate(range(0, size, part_size), start=1)]
+        try:
+            parts = await asyncio.gather(*tasks)
+            return await self.complete_multipart_upload(bucket, key, upload_id, parts)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self.abort_multipart_upload(bucket, key, upload_id)
+            except Exception:
+                pass
+            raise
+
+    async def list_objects(self, bucket: str, params: Dict[str, Any]) -> Dict:
+        """列出存储桶中的对象（GET Bucket），params为prefix、delimiter、marker、max-keys等查询参数"""
+        response = await self.request('GET', bucket, params=params)
+        return _parse_list_result(response.content)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+async def _iter_file(path: str, offset: int, length: int) -> AsyncIterator[bytes]:
+    # 按块读取本地文件的一段作为流式请求体；本地读取很快，直接在事件循环中进行
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        while length > 0:
+            chunk = file.read(min(FILE_CHUNK_SIZE, length))
+            if not chunk:
+                raise ValueError(f"File {path} changed during upload")
+            length -= len(chunk)
+            yield chunk
+
+
+def _response_headers(response: httpx.Response) -> Dict[str, str]:
+    # 保留响应头的原始大小写，与COS SDK返回的字典一致
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in response.headers.raw}
+
+
+def build_copy_source(copy_source: Dict[str, str]) -> str:
+    """
+    生成x-cos-copy-source请求头，与COS SDK的格式一致
+
+    Args:
+        copy_source: 源对象 {'Bucket', 'Key', 'Region'}，可选 'Endpoint'
+
+    Returns:
+        <bucket>.<endpoint>/<编码后的对象键>
+    """
+    endpoint = copy_source.get('Endpoint') or f"cos.{copy_source['Region']}.myqcloud.com"
+    key = copy_source['Key'].lstrip('/')
+    return f"{copy_source['Bucket']}.{endpoint}/{quote(key.encode('utf-8'), safe='/-_.~')}"
+
+
+def _parse_xml(content: bytes) -> Dict[str, str]:
+    # 将单层XML响应转换为字典，与COS SDK的返回结构一致
+    if not content:
+        return {}
+    return {child.tag: child.text or '' for child in ET.fromstring(content)}
+
+
+def _parse_list_result(content: bytes) -> Dict[str, Any]:
+    """
+    解析GET Bucket的XML响应，与COS SDK的返回结构一致
+
+    Contents和CommonPrefixes总是列表；请求使用encoding-type=url，对象键和前缀在此解码。
+    """
+    root = ET.fromstring(content)
+    result: Dict[str, Any] = {'Contents': [], 'CommonPrefixes': []}
+    for child in root:
+        if child.tag == 'Contents':
+            item = {field.tag: field.text or '' for field in child}
+            item['Key'] = unquote(item.get('Key', ''))
+            result['Contents'].append(item)
+        elif child.tag == 'CommonPrefixes':
+            result['CommonPrefixes'].append({'Prefix': unquote(child.findtext('Prefix') or '')})
+        else:
+            result[child.tag] = child.text or ''
+    for name in ('Prefix', 'Marker', 'NextMarker'):
+        if name in result:
+            result[name] = unquote(result[name])
+    return result
+
+
+def _build_headers(kwargs: Dict[str, Any]) -> Dict[str, str]:
+    """将CosS3Client风格的参数转换为请求头"""
+    headers = {}
+    for name, value in kwargs.items():
+        if value is None:
+            continue
+        if name == 'Metadata':
+            # 自定义元数据的键需带 x-cos-meta- 前缀，与COS SDK一致
+            headers.update({str(key): str(item) for key, item in value.items()})
+        elif name in HEADER_PARAMETERS:
+            headers[HEADER_PARAMETERS[name]] = str(value)
+        else:
+            raise ValueError(f"Unsupported parameter for the async transport: {name}")
+    return headers
+
+
+class _RawResponse:
+    # 对应SDK响应体的 _rt 属性，供判断304等状态码
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+class AsyncStreamBody:
+    """
+    GET响应体的同步读取接口，与SDK StreamBody的 get_raw_stream() 用法一致
+
+    每次read只从共享事件循环拉取所需的数据，内存占用与读取的块大小相当。
+    """
+
+    def __init__(self, response: httpx.Response, loop: _EventLoopThread):
+        self._response = response
+        self._loop = loop
+        # 与SDK的原始流一致，不对Content-Encoding解码
+        self._iterator: AsyncIterator[bytes] = response.aiter_raw()
+        self._buffer = bytearray()
+        self._closed = False
+        self._rt = _RawResponse(response.status_code)
+
+    def get_raw_stream(self) -> 'AsyncStreamBody':
+        return self
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        if self._closed:
+            return b''
+        return self._loop.run(self._read(size))
+
+    async def _read(self, size: Optional[int]) -> bytes:
+        while size is None or len(self._buffer) < size:
+            try:
+                self._buffer += await self._iterator.__anext__()
+            except StopAsyncIteration:
+                break
+        if size is None:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._buffer.clear()
+            self._loop.run(self._response.aclose())
+
+
+class AsyncTransportClient:
+    """
+    AsyncCosTransport的同步外观
+
+    提供工具所用的CosS3Client接口子集（参数名和返回结构与SDK一致），
+    每次调用提交到共享事件循环并阻塞调用线程等待结果。
+    """
+
+    def __init__(self, region: str, secret_id: str, secret_key: str, endpoint: Optional[str] = None,
+                 scheme: Optional[str] = None, ip: Optional[str] = None, port: Optional[int] = None):
+        self.transport = AsyncCosTransport(region, secret_id, secret_key, endpoint=endpoint, scheme=scheme,
+                                           ip=ip, port=port)
+        self._loop = get_event_loop()
+
+    def put_object(self, Bucket: str, Body: Any, Key: str, **kwargs) -> Dict:
+        if hasattr(Body, 'read'):
+            Body = Body.read()
+        elif isinstance(Body, memoryview):
+            Body = bytes(Body)
+        return self._loop.run(self.transport.put_object(Bucket, Key, Body, _build_headers(kwargs)))
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        response = self._loop.run(self.transport.get_object(Bucket, Key, _build_headers(kwargs)))
+        result = _response_headers(response)
+        result['Body'] = AsyncStreamBody(response, self._loop)
+        return result
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        return self._loop.run(self.transport.head_object(Bucket, Key, _build_headers(kwargs)))
+
+    def head_bucket(self, Bucket: str) -> Dict:
+        return self._loop.run(self.transport.head_bucket(Bucket))
+
+    def delete_object(self, Bucket: str, Key: str) -> Dict:
+        return self._loop.run(self.transport.delete_object(Bucket, Key))
+
+    def copy_object(self, Bucket: str, Key: str, CopySource: Dict[str, str], CopyStatus: str = 'Copy',
+                    **kwargs) -> Dict:
+        headers = _build_headers(kwargs)
+        headers['x-cos-copy-source'] = build_copy_source(CopySource)
+        headers['x-cos-metadata-directive'] = CopyStatus
+        return self._loop.run(self.transport.copy_object(Bucket, Key, headers))
+
+    def upload_part_copy(self, Bucket: str, Key: str, PartNumber: int, UploadId: str, CopySource: Dict[str, str],
+                         CopySourceRange: str = '', **kwargs) -> Dict:
+        headers = _build_headers(kwargs)
+        headers['x-cos-copy-source'] = build_copy_source(CopySource)
+        if CopySourceRange:
+            headers['x-cos-copy-source-range'] = CopySourceRange
+        return self._loop.run(self.transport.upload_part_copy(Bucket, Key, UploadId, PartNumber, headers))
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        return self._loop.run(self.transport.create_multipart_upload(Bucket, Key, _build_headers(kwargs)))
+
+    def upload_part(self, Bucket: str, Key: str, Body: Any, PartNumber: int, UploadId: str) -> Dict:
+        return self._loop.run(self.transport.upload_part(Bucket, Key, UploadId, PartNumber, Body))
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict) -> Dict:
+        return self._loop.run(self.transport.complete_multipart_upload(Bucket, Key, UploadId,
+                                                                       MultipartUpload['Part']))
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> None:
+        self._loop.run(self.transport.abort_multipart_upload(Bucket, Key, UploadId))
+
+    def upload_file(self, Bucket: str, LocalFilePath: str, Key: str, PartSize: int = 1, MAXThread: int = 5,
+                    **kwargs) -> Dict:
+        # 超过分块大小的本地文件使用并行分块上传，与SDK的upload_file行为一致；
+        # 读取和分块并发都在事件循环中完成，调用线程只等待结果
+        return self._loop.run(self.transport.upload_file(Bucket, Key, LocalFilePath, PartSize * 1024 * 1024,
+                                                         MAXThread, _build_headers(kwargs)))
+
+    def list_objects(self, Bucket: str, Prefix: str = '', Delimiter: str = '', Marker: str = '',
+                     MaxKeys: int = 1000, **kwargs) -> Dict:
+        params = {'prefix': Prefix, 'delimiter': Delimiter, 'marker': Marker, 'max-keys': MaxKeys,
+                  'encoding-type': 'url'}
+        return self._loop.run(self.transport.list_objects(Bucket, params))
+
+    def get_presigned_url(self, Bucket: str, Key: str, Method: str, Expired: int = 300,
+                          Params: Optional[Dict[str, Any]] = None, Headers: Optional[Dict[str, str]] = None) -> str:
+        # 预签名只需本地计算，不经过事件循环
+        return self.transport.get_presigned_url(Method, Bucket, Key, Expired, Params, Headers)
+
+    def close(self) -> None:
+        """关闭连接池（由客户端注册表在淘汰时调用）"""
+        self._loop.run(self.transport.aclose())
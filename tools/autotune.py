@@ -0,0 +1,252 @@
+"""
+分块传输参数的自动调优
+
+按 (地域, 大小区间) 分别记录分块传输的吞吐量，在配置的范围内对分块大小和并发数做爬山搜索：
+- 尚无样本时使用默认参数测量基准吞吐量
+- 每次尝试一个相邻参数（分块大小或并发数加倍/减半），总吞吐量明显提高时采用并沿同一方向继续，
+  否则回到当前最佳参数并尝试下一个方向
+- 总吞吐量相近而连接数更少（每个连接的吞吐量更高）时采用连接数更少的参数
+- 所有方向都没有提升后视为收敛，之后每隔若干次传输再尝试一次，以适应网络变化
+
+最佳参数在进程内保留，不会持久化。
+"""
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .multipart import DEFAULT_PART_CONCURRENCY, DEFAULT_PART_SIZE, MAX_PART_COUNT, MIN_PART_SIZE
+
+# 是否启用自动调优；关闭时未指定的分块参数使用默认值
+AUTOTUNE_ENABLED = os.environ.get('COS_AUTOTUNE', 'true').strip().lower() in ('true', '1', 'yes')
+
+# 调优时分块大小和并发数的范围
+AUTOTUNE_MIN_PART_SIZE = max(MIN_PART_SIZE, int(float(os.environ.get('COS_AUTOTUNE_MIN_PART_SIZE_MB', '1')) * 1024 * 1024))
+AUTOTUNE_MAX_PART_SIZE = max(AUTOTUNE_MIN_PART_SIZE,
+                             int(float(os.environ.get('COS_AUTOTUNE_MAX_PART_SIZE_MB', '64')) * 1024 * 1024))
+AUTOTUNE_MAX_CONCURRENCY = max(1, int(os.environ.get('COS_AUTOTUNE_MAX_CONCURRENCY', '16')))
+
+# 吞吐量至少提高该比例才采用新参数，避免被测量噪声带偏
+IMPROVEMENT_RATIO = 0.05
+
+# 同一参数多次测量的吞吐量按指数加权平均，新样本的权重
+EWMA_WEIGHT = 0.3
+
+# 收敛后每隔多少次传输再尝试一次相邻参数
+EXPLORE_INTERVAL = 8
+
+# 大小区间的上界（字节）和名称，超过最后一个上界的归入最大区间
+SIZE_BUCKETS = (
+    (16 * 1024 * 1024, '<16MB'),
+    (128 * 1024 * 1024, '16MB-128MB'),
+    (1024 * 1024 * 1024, '128MB-1GB'),
+    (8 * 1024 * 1024 * 1024, '1GB-8GB')
+)
+LARGEST_SIZE_BUCKET = '>=8GB'
+
+# 相邻参数的搜索方向：(调整的参数, 倍数)
+MOVES = (('part_size', 2.0), ('concurrency', 2.0), ('part_size', 0.5), ('concurrency', 0.5))
+
+
+class TransferSettings(NamedTuple):
+    part_size: int
+    concurrency: int
+
+
+def size_bucket(size: int) -> str:
+    """返回文件大小所属的大小区间名称"""
+    for upper, name in SIZE_BUCKETS:
+        if size < upper:
+            return name
+    return LARGEST_SIZE_BUCKET
+
+
+def clamp_settings(settings: TransferSettings, size: int) -> TransferSettings:
+    """
+    将参数限制在调优范围内，并使分块数量不超过上限、并发数不超过分块数量
+
+    Args:
+        settings: 待修正的参数
+        size: 传输的总字节数
+
+    Returns:
+        修正后的参数
+    """
+    part_size = max(AUTOTUNE_MIN_PART_SIZE, min(settings.part_size, AUTOTUNE_MAX_PART_SIZE))
+    part_size = max(part_size, (size + MAX_PART_COUNT - 1) // MAX_PART_COUNT)
+    part_count = max(1, (size + part_size - 1) // part_size)
+    concurrency = max(1, min(settings.concurrency, AUTOTUNE_MAX_CONCURRENCY, part_count))
+    return TransferSettings(part_size, concurrency)
+
+
+class _TuningState:
+    """单个 (地域, 大小区间) 的调优状态"""
+
+    __slots__ = ('best', 'best_throughput', 'trial', 'move', 'failed_moves', 'transfers')
+
+    def __init__(self, initial: TransferSettings):
+        self.best = initial
+        self.best_throughput: Optional[float] = None
+        self.trial: Optional[TransferSettings] = None
+        self.move = 0
+        # 连续没有带来提升的方向数，达到方向总数时视为收敛
+        self.failed_moves = 0
+        self.transfers = 0
+
+
+class TransferTuner:
+    """
+    进程级的分块传输参数调优器，线程安全
+
+    suggest() 返回本次传输应使用的参数，传输完成后通过 record() 报告耗时。
+    """
+
+    def __init__(self, default_part_size: int = DEFAULT_PART_SIZE,
+                 default_concurrency: int = DEFAULT_PART_CONCURRENCY):
+        self._default = TransferSettings(default_part_size, default_concurrency)
+        self._states: Dict[Tuple[str, str], _TuningState] = {}
+        self._lock = threading.Lock()
+
+    def suggest(self, region: str, size: int) -> TransferSettings:
+        """
+        获取传输size字节应使用的分块大小和并发数
+
+        Args:
+            region: 地域
+            size: 传输的总字节数
+
+        Returns:
+            分块参数
+        """
+        with self._lock:
+            state = self._get_state(region, size)
+            state.transfers += 1
+            if state.best_throughput is None:
+                return clamp_settings(state.best, size)
+            converged = state.failed_moves >= len(MOVES)
+            if state.trial is None and (not converged or state.transfers % EXPLORE_INTERVAL == 0):
+                state.trial = self._next_trial(state, size)
+            if state.trial is not None:
+                return clamp_settings(state.trial, size)
+            return clamp_settings(state.best, size)
+
+    def record(self, region: str, size: int, settings: TransferSettings, seconds: float) -> None:
+        """
+        报告一次传输的耗时，更新该 (地域, 大小区间) 的最佳参数
+
+        Args:
+            region: 地域
+            size: 传输的总字节数
+            settings: 本次传输使用的参数（suggest() 的返回值）
+            seconds: 传输耗时（秒）
+        """
+        if seconds <= 0 or size <= 0:
+            return
+        throughput = size / seconds
+        with self._lock:
+            state = self._get_state(region, size)
+            best = clamp_settings(state.best, size)
+            trial = clamp_settings(state.trial, size) if state.trial is not None else None
+            if settings == best:
+                # 当前最佳参数的再次测量，平滑吞吐量
+                if state.best_throughput is None:
+                    state.best_throughput = throughput
+                else:
+                    state.best_throughput += EWMA_WEIGHT * (throughput - state.best_throughput)
+            elif settings == trial:
+                if self._is_better(settings, throughput, best, state.best_throughput):
+                    # 采用新参数，下次沿同一方向继续
+                    state.best, state.best_throughput = state.trial, throughput
+                    state.failed_moves = 0
+                else:
+                    state.move = (state.move + 1) % len(MOVES)
+                    state.failed_moves += 1
+                state.trial = None
+            # 其他参数的结果来自调整前发起的传输，不再参与比较
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """返回当前所有 (地域, 大小区间) 的最佳参数和吞吐量（MB/s）"""
+        with self._lock:
+            return [
+                {
+                    'region': region,
+                    'size_bucket': bucket,
+                    'part_size': state.best.part_size,
+                    'concurrency': state.best.concurrency,
+                    'throughput_mb_per_s': round(state.best_throughput / (1024 * 1024), 2)
+                    if state.best_throughput else None
+                }
+                for (region, bucket), state in self._states.items()
+            ]
+
+    def _get_state(self, region: str, size: int) -> _TuningState:
+        key = (region or '', size_bucket(size))
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _TuningState(self._default)
+        return state
+
+    def _next_trial(self, state: _TuningState, size: int) -> Optional[TransferSettings]:
+        # 从当前方向开始找第一个修正后与最佳参数不同的相邻参数，全部相同时不再尝试
+        best = clamp_settings(state.best, size)
+        for offset in range(len(MOVES)):
+            name, factor = MOVES[(state.move + offset) % len(MOVES)]
+            if name == 'part_size':
+                candidate = TransferSettings(int(best.part_size * factor), best.concurrency)
+            else:
+                candidate = TransferSettings(best.part_size, max(1, int(best.concurrency * factor)))
+            candidate = clamp_settings(candidate, size)
+            if candidate != best:
+                state.move = (state.move + offset) % len(MOVES)
+                return candidate
+        return None
+
+    def _is_better(self, trial: TransferSettings, throughput: float, best: TransferSettings,
+                   best_throughput: Optional[float]) -> bool:
+        if best_throughput is None:
+            return True
+        if throughput > best_throughput * (1 + IMPROVEMENT_RATIO):
+            return True
+        # 总吞吐量相近时，连接数更少（每个连接的吞吐量更高）的参数更好
+        return throughput >= best_throughput * (1 - IMPROVEMENT_RATIO) and trial.concurrency < best.concurrency
+
+
+_tuners: Dict[str, TransferTuner] = {}
+_tuners_lock = threading.Lock()
+
+
+def get_transfer_tuner(direction: str) -> TransferTuner:
+    """
+    获取（或创建）进程级的调优器
+
+    Args:
+        direction: 'upload' 或 'download'，上传和下载分别调优
+
+    Returns:
+        调优器实例
+    """
+    with _tuners_lock:
+        tuner = _tuners.get(direction)
+        if tuner is None:
+            tuner = _tuners[direction] = TransferTuner()
+        return tuner
+
+
+def resolve_transfer_settings(direction: str, region: str, size: int, part_size: Optional[int] = None,
+                              concurrency: Optional[int] = None) -> Tuple[TransferSettings, bool]:
+    """
+    确定分块传输参数，未指定的参数由调优器给出
+
+    Args:
+        direction: 'upload' 或 'download'
+        region: 地域
+        size: 传输的总字节数
+        part_size: 用户指定的分块大小（字节），None表示自动
+        concurrency: 用户指定的并发数，None表示自动
+
+    Returns:
+        (分块参数, 是否应向调优器报告本次传输)
+    """
+    # 只有两个参数都未指定时才调优；指定了其中一个时另一个使用默认值，避免与调优结果混用
+    if not AUTOTUNE_ENABLED or part_size is not None or concurrency is not None:
+        return TransferSettings(part_size or DEFAULT_PART_SIZE, concurrency or DEFAULT_PART_CONCURRENCY), False
+    return get_transfer_tuner(direction).suggest(region, size), True
@@ -0,0 +1,185 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from . import cos_sdk
+
+if TYPE_CHECKING:
+    import requests
+    from qcloud_cos import CosS3Client
+
+# 进程内缓存的客户端数量上限（LRU淘汰）
+DEFAULT_POOL_SIZE = int(os.environ.get('COS_CLIENT_POOL_SIZE', '16'))
+
+# 每个客户端HTTP连接池中保持的长连接数量
+DEFAULT_POOL_MAXSIZE = int(os.environ.get('COS_HTTP_POOL_MAXSIZE', '32'))
+
+# 传输方式：sync 使用COS SDK（默认），async 使用共享事件循环上的异步传输
+COS_TRANSPORT = os.environ.get('COS_TRANSPORT', 'sync').strip().lower()
+
+
+class CosClientPool:
+    """
+    线程安全的CosS3Client注册表
+
+    以 (region, secret_id, endpoint) 为键复用客户端及其长连接会话，
+    避免每次调用都重新建立HTTP会话、DNS解析和TLS握手。
+    超出容量时按最近最少使用（LRU）淘汰，并统计命中/未命中次数。
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+        self._max_size = max(1, max_size)
+        self._pool_maxsize = max(1, pool_maxsize)
+        self._lock = threading.Lock()
+        # 键 -> (secret_key, client, session)
+        self._clients: "OrderedDict[Tuple, Tuple[str, CosS3Client, requests.Session]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_client(self, region: str, secret_id: str, secret_key: str,
+                   endpoint: Optional[str] = None) -> "CosS3Client":
+        """
+        获取（或创建）指定地域和凭据对应的客户端
+
+        Args:
+            region: COS地域，如 'ap-beijing'
+            secret_id: 腾讯云SecretId
+            secret_key: 腾讯云SecretKey
+            endpoint: 可选的自定义endpoint
+
+        Returns:
+            可复用的CosS3Client实例
+        """
+        key = (region, secret_id, endpoint)
+        with self._lock:
+            entry = self._clients.get(key)
+            # SecretKey变更（如密钥轮换）时视为未命中并重建客户端
+            if entry is not None and entry[0] == secret_key:
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        # 在锁外创建客户端和会话，创建期间其他调用照常获取已有的客户端
+        client, session = self._create_client(region, secret_id, secret_key, endpoint)
+        closing = []
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] == secret_key:
+                # 其他调用已并发创建了相同的客户端，沿用已写入的客户端
+                self._clients.move_to_end(key)
+                closing.append(session)
+                client = entry[1]
+            else:
+                if entry is not None:
+                    self._clients.pop(key)
+                    closing.append(entry[2])
+                self._clients[key] = (secret_key, client, session)
+
+                # 超出容量时淘汰最久未使用的客户端
+                while len(self._clients) > self._max_size:
+                    _, (_, _, old_session) = self._clients.popitem(last=False)
+                    closing.append(old_session)
+                    self._evictions += 1
+
+        for old_session in closing:
+            old_session.close()
+        return client
+
+    def _create_client(self, region: str, secret_id: str, secret_key: str,
+                       endpoint: Optional[str]) -> Tuple["CosS3Client", "requests.Session"]:
+        if COS_TRANSPORT == 'async':
+            # 异步传输的同步外观自身管理连接池，同时作为“会话”在淘汰时关闭
+            from .async_transport import AsyncTransportClient
+            client = AsyncTransportClient(
+                region, secret_id, secret_key,
+                endpoint=endpoint,
+                scheme=os.environ.get('COS_SCHEME') or None,
+                ip=os.environ.get('COS_IP') or None,
+                port=int(os.environ['COS_PORT']) if os.environ.get('COS_PORT') else None
+            )
+            return client, client
+
+        # COS_IP/COS_PORT直连指定地址（如本地基准测试服务），请求Host仍为存储桶域名
+        # COS SDK在首次创建客户端时才导入
+        config = cos_sdk.CosConfig(
+            Region=region,
+            SecretId=secret_id,
+            SecretKey=secret_key,
+            Endpoint=endpoint,
+            Scheme=os.environ.get('COS_SCHEME') or None,
+            IP=os.environ.get('COS_IP') or None,
+            Port=os.environ.get('COS_PORT') or None,
+            KeepAlive=True,
+            PoolConnections=self._pool_maxsize,
+            PoolMaxSize=self._pool_maxsize
+        )
+        # 为每个客户端挂载独立的长连接池，连接数可配置；requests与SDK一样在首次创建客户端时才导入
+        import requests
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_maxsize, pool_maxsize=self._pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # 关闭SDK内置的重试（固定间隔且不区分请求是否幂等），重试统一由retry模块按请求类型处理
+        return cos_sdk.CosS3Client(config, retry=0, session=session), session
+
+    def resize(self, max_size: int) -> None:
+        """调整缓存客户端数量上限，必要时立即淘汰"""
+        with self._lock:
+            self._max_size = max(1, max_size)
+            while len(self._clients) > self._max_size:
+                _, (_, _, old_session) = self._clients.popitem(last=False)
+                old_session.close()
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """关闭并清空所有缓存的客户端"""
+        with self._lock:
+            for _, _, session in self._clients.values():
+                session.close()
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中等统计信息"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'size': len(self._clients),
+                'max_size': self._max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_ratio': round(self._hits / total, 4) if total else 0.0
+            }
+
+
+# 进程级共享的客户端注册表
+_default_pool = CosClientPool()
+
+
+def get_cos_client(credentials: Dict[str, Any], region: Optional[str] = None,
+                   endpoint: Optional[str] = None) -> "CosS3Client":
+    """
+    从进程级注册表获取COS客户端
+
+    Args:
+        credentials: 包含 region、secret_id、secret_key 的凭据字典
+        region: 可选的地域，覆盖凭据中的region（如URL中解析出的地域）
+        endpoint: 可选的自定义endpoint，默认读取环境变量 COS_ENDPOINT
+
+    Returns:
+        可复用的CosS3Client实例
+    """
+    return _default_pool.get_client(
+        region or credentials['region'],
+        credentials['secret_id'],
+        credentials['secret_key'],
+        endpoint or os.environ.get('COS_ENDPOINT') or None
+    )
+
+
+def get_client_pool() -> CosClientPool:
+    """返回进程级共享的客户端注册表"""
+    return _default_pool
@@ -0,0 +1,179 @@
+import io
+import os
+import zlib
+from typing import Any, Optional
+
+from .dedup import iter_payload_chunks
+from .utils import get_header, is_compressed_content_type
+
+# 支持的压缩编码（Content-Encoding取值）
+SUPPORTED_ENCODINGS = ('gzip', 'zstd')
+
+# 记录压缩前大小的自定义元数据
+ORIGINAL_SIZE_METADATA = 'x-cos-meta-original-size'
+
+# 小于该大小（字节）的文件不压缩，压缩头部开销抵消了收益
+MIN_COMPRESS_SIZE = int(os.environ.get('COS_MIN_COMPRESS_SIZE', '1024'))
+
+# 压缩级别，gzip为1-9，zstd为1-22
+GZIP_LEVEL = int(os.environ.get('COS_GZIP_LEVEL', '6'))
+ZSTD_LEVEL = int(os.environ.get('COS_ZSTD_LEVEL', '3'))
+
+# 压缩和解压时每次读取的字节数
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+DECOMPRESS_READ_SIZE = 64 * 1024
+
+
+def _import_zstandard() -> Any:
+    # zstandard为可选依赖，仅在选择zstd时导入
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires the zstandard package")
+    return zstandard
+
+
+def resolve_compression(compression: Optional[str], content_type: str, size: int) -> Optional[str]:
+    """
+    根据压缩参数和文件类型决定实际使用的压缩编码
+
+    Args:
+        compression: 压缩参数，'none'、'gzip' 或 'zstd'
+        content_type: 文件内容类型
+        size: 文件大小（字节）
+
+    Returns:
+        压缩编码，不压缩时返回None
+    """
+    compression = (compression or 'none').strip().lower()
+    if compression == 'none':
+        return None
+    if compression not in SUPPORTED_ENCODINGS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == 'zstd':
+        _import_zstandard()
+    # 已压缩的类型（压缩包、图片、音视频等）和过小的文件跳过压缩
+    if is_compressed_content_type(content_type) or size < MIN_COMPRESS_SIZE:
+        return None
+    return compression
+
+
+def _create_compressor(encoding: str) -> Any:
+    if encoding == 'zstd':
+        return _import_zstandard().ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    # wbits加16生成gzip格式；zlib写入的头部时间戳为0，相同内容的压缩结果相同
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _create_decompressor(encoding: str) -> Any:
+    if encoding == 'zstd':
+        return _import_zstandard().ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def compress_payload(payload: Any, encoding: str, chunk_size: int = COMPRESS_CHUNK_SIZE,
+                     max_size: Optional[int] = None) -> Optional[bytes]:
+    """
+    分块流式压缩文件内容，原始内容不会被整体读入内存
+
+    压缩结果需要知道大小后才能上传（单次或分块上传、去重摘要），因此完整保存在内存中；
+    设置max_size时压缩结果一旦达到该大小即放弃，内存中的副本不超过max_size，
+    调用方按此在内存预算中预留（见 upload_job.estimate_upload_memory）。
+
+    Args:
+        payload: bytes、类文件对象或本地文件路径
+        encoding: 压缩编码，'gzip' 或 'zstd'
+        chunk_size: 每次读取的字节数
+        max_size: 压缩结果的大小上限（字节），通常为原始大小
+
+    Returns:
+        压缩后的内容，达到max_size时返回None
+    """
+    compressor = _create_compressor(encoding)
+    # BytesIO.getvalue() 直接返回内部缓冲区，不会再复制一份压缩结果
+    output = io.BytesIO()
+    for chunk in iter_payload_chunks(payload, chunk_size):
+        output.write(compressor.compress(chunk))
+        if max_size is not None and output.tell() >= max_size:
+            return None
+    output.write(compressor.flush())
+    if max_size is not None and output.tell() >= max_size:
+        return None
+    return output.getvalue()
+
+
+def get_content_encoding(headers: dict) -> Optional[str]:
+    """
+    从响应头中获取可以解压的Content-Encoding
+
+    Args:
+        headers: COS响应头字典
+
+    Returns:
+        'gzip' 或 'zstd'，未压缩或编码不受支持时返回None
+    """
+    encoding = (get_header(headers, 'Content-Encoding') or '').strip().lower()
+    if encoding == 'x-gzip':
+        encoding = 'gzip'
+    return encoding if encoding in SUPPORTED_ENCODINGS else None
+
+
+def get_original_size(headers: dict) -> Optional[int]:
+    """从响应头的自定义元数据中获取压缩前的大小，缺失时返回None"""
+    value = get_header(headers, ORIGINAL_SIZE_METADATA)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class DecompressingStream:
+    """
+    对COS原始响应流边读边解压的类文件对象
+
+    read(size) 返回不超过size字节的解压内容；不传size时读取并解压全部内容。
+    """
+
+    def __init__(self, raw_stream: Any, encoding: str):
+        self._raw_stream = raw_stream
+        self._decompressor = _create_decompressor(encoding)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        if size is None or size < 0:
+            while not self._eof:
+                self._fill()
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            return data
+        while len(self._buffer) < size and not self._eof:
+            self._fill()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _fill(self) -> None:
+        chunk = self._raw_stream.read(DECOMPRESS_READ_SIZE)
+        if not chunk:
+            self._buffer += self._decompressor.flush()
+            self._eof = True
+            return
+        try:
+            self._buffer += self._decompressor.decompress(chunk)
+        except Exception as e:
+            raise ValueError(f"Failed to decompress content: {str(e)}")
+
+    def close(self) -> None:
+        self._raw_stream.close()
+
+
+class DecompressingBody:
+    """包装COS响应体，get_raw_stream() 返回解压后的流"""
+
+    def __init__(self, body: Any, encoding: str):
+        self._body = body
+        self._stream = DecompressingStream(body.get_raw_stream(), encoding)
+
+    def get_raw_stream(self) -> DecompressingStream:
+        return self._stream
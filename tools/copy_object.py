@@ -0,0 +1,211 @@
+import os
+from collections.abc import Generator
+from typing import Any, Dict
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .cos_url import resolve_cos_url
+from .credential_cache import validate_credentials
+from .multipart import DEFAULT_PART_CONCURRENCY, MAX_COPY_OBJECT_SIZE, multipart_copy
+from .object_listing import get_prefix_index
+from .retry import RetryBudget, RetryContext
+from .upload_job import build_file_url, compose_filename, generate_object_key, normalize_path_component
+from .utils import get_bool_parameter, get_int_parameter
+
+# 分块复制时从源对象沿用的请求头：响应头 -> create_multipart_upload参数
+COPIED_HEADERS = {
+    'content-type': 'ContentType',
+    'content-encoding': 'ContentEncoding',
+    'content-disposition': 'ContentDisposition',
+    'cache-control': 'CacheControl',
+    'expires': 'Expires'
+}
+
+
+class CopyObjectTool(Tool):
+    # 最大并发复制的分块数量
+    MAX_PART_CONCURRENCY = 16
+    # 单次调用内所有请求共享的重试次数上限
+    RETRY_BUDGET = 10
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        try:
+            # 从runtime credentials获取认证信息
+            credentials = {
+                'region': self.runtime.credentials.get('region'),
+                'bucket': self.runtime.credentials.get('bucket'),
+                'secret_id': self.runtime.credentials.get('secret_id'),
+                'secret_key': self.runtime.credentials.get('secret_key')
+            }
+
+            # 验证工具参数中的认证信息
+            validate_credentials(credentials)
+
+            # 执行服务端复制
+            result = self._copy_object(tool_parameters, credentials)
+
+            json_response = {
+                "status": "completed",
+                "source_url": result['source_url'],
+                "file_url": result['file_url'],
+                "object_key": result['object_key'],
+                "file_size_bytes": result['file_size'],
+                "file_size_mb": round(result['file_size'] / (1024 * 1024), 2),
+                "copy_mode": result['copy_mode'],
+                "part_count": result['part_count'],
+                "source_deleted": result['source_deleted'],
+                "retries": result['retries']
+            }
+            yield self.create_json_message(json_response)
+
+            # 英文消息
+            success_message = "Object copied successfully!\n"
+            success_message += f"Source URL: {result['source_url']}\n"
+            success_message += f"File size: {result['file_size'] / (1024 * 1024):.2f} MB\n"
+            success_message += f"Access URL: {result['file_url']}\n"
+            success_message += f"Object key: {result['object_key']}"
+            if result['copy_mode'] == 'multipart':
+                success_message += f"\nCopy mode: multipart ({result['part_count']} parts)"
+            if result['source_deleted']:
+                success_message += "\nSource object deleted"
+            if result['retries']:
+                success_message += f"\nRetries: {result['retries']}"
+            yield self.create_text_message(success_message)
+        except Exception as e:
+            error_message = str(e)
+
+            json_response = {
+                "status": "failed",
+                "source_url": tool_parameters.get('source_url'),
+                "error_message": error_message
+            }
+            yield self.create_json_message(json_response)
+
+            # 在text中输出失败信息 - 英文消息
+            yield self.create_text_message(f"Failed to copy object: {error_message}")
+            # 同时抛出异常以保持与上传工具一致的行为
+            raise ValueError(f"Failed to copy object: {error_message}")
+
+    def _copy_object(self, parameters: dict[str, Any], credentials: dict[str, Any]) -> dict:
+        """
+        在COS服务端将源对象复制到当前存储桶，数据不经过插件
+
+        不超过5GB的对象使用PUT Object - Copy，更大的对象使用分块复制。
+
+        Args:
+            parameters: 工具参数
+            credentials: 凭据字典
+
+        Returns:
+            包含目标对象键、URL、大小和复制方式的结果字典
+        """
+        try:
+            source_url = parameters.get('source_url')
+            directory = parameters.get('directory')
+            if not source_url:
+                raise ValueError("Missing required parameter: source_url")
+            if not directory:
+                raise ValueError("Missing required parameter: directory")
+
+            # 源对象的bucket和region取自URL，自定义域名时使用凭证中的值
+            source_bucket, source_region, source_key = resolve_cos_url(source_url, credentials)
+            if not source_key:
+                raise ValueError("Source URL does not contain an object key")
+
+            object_key = self._build_object_key(parameters, source_key)
+            bucket = credentials['bucket']
+            if (source_bucket, source_region, source_key) == (bucket, credentials['region'], object_key):
+                raise ValueError("Source and target objects are the same")
+
+            # 复制请求发往目标存储桶所在地域，HEAD和删除请求发往源对象所在地域
+            client = get_cos_client(credentials)
+            source_client = get_cos_client(credentials, region=source_region)
+            copy_source = {'Bucket': source_bucket, 'Key': source_key, 'Region': source_region}
+            retry = RetryContext(RetryBudget(self.RETRY_BUDGET))
+
+            try:
+                # HEAD源对象获取大小，决定复制方式
+                head_response = retry.call(source_client.head_object, Bucket=source_bucket, Key=source_key)
+                headers = {key.lower(): value for key, value in head_response.items()}
+                file_size = int(headers.get('content-length') or 0)
+
+                if file_size <= MAX_COPY_OBJECT_SIZE:
+                    # 复制到固定的目标键，重复执行结果相同
+                    retry.call(client.copy_object, Bucket=bucket, Key=object_key, CopySource=copy_source,
+                               CopyStatus='Copy')
+                    copy_mode, part_count = 'simple', 1
+                else:
+                    # 分块复制不会自动沿用源对象的元数据，需在初始化时显式设置
+                    copy_result = multipart_copy(
+                        client, bucket, object_key, copy_source, file_size,
+                        concurrency=self._get_part_concurrency(parameters),
+                        retry=retry,
+                        **self._copied_metadata(headers)
+                    )
+                    copy_mode, part_count = 'multipart', copy_result['part_count']
+                get_prefix_index().record_put(bucket, credentials['region'], object_key, file_size)
+
+                # 移动：复制成功后删除源对象
+                source_deleted = False
+                if get_bool_parameter(parameters, 'delete_source'):
+                    retry.call(source_client.delete_object, Bucket=source_bucket, Key=source_key)
+                    get_prefix_index().record_delete(source_bucket, source_region, source_key)
+                    source_deleted = True
+            except cos_sdk.CosServiceError as e:
+                raise ValueError(f"COS service error: {str(e)}")
+
+            return {
+                'source_url': source_url,
+                'file_url': build_file_url(bucket, credentials['region'], object_key),
+                'object_key': object_key,
+                'file_size': file_size,
+                'copy_mode': copy_mode,
+                'part_count': part_count,
+                'source_deleted': source_deleted,
+                'retries': retry.retries
+            }
+        except Exception as e:
+            raise ValueError(f"Failed to copy object: {str(e)}")
+
+    def _build_object_key(self, parameters: dict[str, Any], source_key: str) -> str:
+        """
+        按照与上传工具相同的目录模式和文件名组成方式生成目标对象键
+
+        Args:
+            parameters: 工具参数
+            source_key: 源对象键
+
+        Returns:
+            目标对象键
+        """
+        # 与上传工具相同：目录和文件名去空格，并禁止以空格、/或\开头
+        directory = normalize_path_component(parameters['directory'], 'Directory')
+        filename = normalize_path_component(parameters.get('filename'), 'Filename')
+        source_filename = os.path.basename(source_key)
+        if filename:
+            # 用户指定了文件名；没有扩展名时沿用源对象的扩展名
+            base_name, extension = os.path.splitext(filename)
+            if not extension:
+                extension = os.path.splitext(source_filename)[1]
+        else:
+            base_name, extension = os.path.splitext(source_filename)
+
+        target_filename = compose_filename(base_name or 'copy', extension.lower(),
+                                           parameters.get('filename_mode', 'filename'))
+        return generate_object_key(directory, parameters.get('directory_mode', 'no_subdirectory'), target_filename)
+
+    def _copied_metadata(self, headers: Dict[str, str]) -> Dict[str, Any]:
+        # 从源对象的HEAD响应中提取内容类型等请求头和自定义元数据
+        kwargs: Dict[str, Any] = {
+            name: headers[header] for header, name in COPIED_HEADERS.items() if headers.get(header)
+        }
+        metadata = {key: value for key, value in headers.items() if key.startswith('x-cos-meta-')}
+        if metadata:
+            kwargs['Metadata'] = metadata
+        return kwargs
+
+    def _get_part_concurrency(self, parameters: dict[str, Any]) -> int:
+        part_concurrency = get_int_parameter(parameters, 'part_concurrency') or DEFAULT_PART_CONCURRENCY
+        return max(1, min(part_concurrency, self.MAX_PART_CONCURRENCY))
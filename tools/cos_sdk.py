@@ -0,0 +1,32 @@
+"""
+腾讯云COS SDK的延迟导入入口
+
+插件进程启动时会加载所有工具模块，而参数校验失败等调用根本不会访问COS。
+通过模块级 __getattr__ 在首次访问时才导入 qcloud_cos，缩短冷启动时间。
+异常类在 except 子句中按属性访问（如 cos_sdk.CosServiceError），只有在异常
+实际发生时才会触发导入。
+"""
+import importlib
+from typing import Any
+
+# 导出名称 -> 所在模块
+_EXPORTS = {
+    'CosConfig': 'qcloud_cos',
+    'CosS3Client': 'qcloud_cos',
+    'CosServiceError': 'qcloud_cos.cos_exception',
+    'CosClientError': 'qcloud_cos.cos_exception',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
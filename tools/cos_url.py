@@ -0,0 +1,48 @@
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+def parse_cos_url(url: str) -> Tuple[Optional[str], Optional[str], str]:
+    """
+    解析COS URL，支持标准格式和自定义域名格式
+    标准格式: https://bucket.cos.region.myqcloud.com/object_key
+    自定义域名格式: https://custom-domain/object_key
+
+    Args:
+        url: 文件URL
+
+    Returns:
+        (bucket, region, object_key)，自定义域名无法解析出bucket和region时二者为None
+    """
+    parsed_url = urlparse(url)
+
+    # 处理URL编码
+    object_key = unquote(parsed_url.path.lstrip('/'))
+
+    # 如果是标准COS URL格式 (bucket.cos.region.myqcloud.com)
+    if parsed_url.hostname and parsed_url.hostname.endswith('.myqcloud.com'):
+        # 提取bucket和region
+        hostname_parts = parsed_url.hostname.split('.')
+        if len(hostname_parts) >= 4 and hostname_parts[1] == 'cos':
+            bucket_name = hostname_parts[0]
+            region_name = hostname_parts[2]
+            return (bucket_name, region_name, object_key)
+
+    # 对于自定义域名格式，需要额外的region或bucket验证
+    # 此处仅返回None作为bucket和region，由调用方处理
+    return None, None, object_key
+
+
+def resolve_cos_url(url: str, credentials: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    解析COS URL，URL中缺少的bucket和region使用凭据中的值
+
+    Args:
+        url: 文件URL
+        credentials: 凭据字典
+
+    Returns:
+        (bucket, region, object_key)
+    """
+    bucket, region, object_key = parse_cos_url(url)
+    return bucket or credentials['bucket'], region or credentials['region'], object_key
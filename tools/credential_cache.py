@@ -0,0 +1,198 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 校验成功结果的缓存时间（秒）
+VALIDATION_TTL = float(os.environ.get('COS_VALIDATION_TTL', '300'))
+
+# 校验失败结果的缓存时间（秒），较短以便修正凭据后尽快重新校验
+VALIDATION_NEGATIVE_TTL = float(os.environ.get('COS_VALIDATION_NEGATIVE_TTL', '30'))
+
+# 缓存的校验结果数量上限（LRU淘汰）
+VALIDATION_CACHE_SIZE = int(os.environ.get('COS_VALIDATION_CACHE_SIZE', '256'))
+
+# 可以缓存的明确失败：凭据或存储桶本身无效，重新校验也不会成功
+DEFINITIVE_FAILURE_STATUS_CODES = frozenset({403, 404})
+DEFINITIVE_FAILURE_ERROR_CODES = frozenset({'InvalidAccessKeyId', 'SignatureDoesNotMatch', 'AccessDenied',
+                                            'NoSuchBucket', 'InvalidBucketName'})
+
+# 限流和时钟偏差等临时错误，即使状态码为4xx也不缓存
+TRANSIENT_ERROR_CODES = frozenset({'SlowDown', 'TooManyRequests', 'RequestLimitExceeded', 'RequestTimeout',
+                                   'RequestTimeTooSkewed'})
+
+
+def credentials_fingerprint(credentials: Dict[str, Any]) -> str:
+    """
+    计算 (secret_id, secret_key, region, bucket) 的摘要，避免在内存中以明文作为键
+
+    Args:
+        credentials: 凭据字典
+
+    Returns:
+        十六进制摘要
+    """
+    material = '\0'.join(str(credentials.get(field) or '') for field in ('secret_id', 'secret_key', 'region', 'bucket'))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def is_definitive_failure(status_code: Optional[int], error_code: Optional[str] = None) -> bool:
+    """
+    判断校验失败是否可以缓存：只缓存凭据或存储桶无效等明确的失败，限流（429）和其他临时错误不缓存
+
+    Args:
+        status_code: HTTP状态码
+        error_code: COS错误码
+
+    Returns:
+        可以缓存时返回True
+    """
+    if status_code == 429 or error_code in TRANSIENT_ERROR_CODES:
+        return False
+    return status_code in DEFINITIVE_FAILURE_STATUS_CODES or error_code in DEFINITIVE_FAILURE_ERROR_CODES
+
+
+class ValidationCache:
+    """
+    线程安全的凭据校验结果缓存
+
+    成功和失败结果分别使用不同的TTL。同一 (secret_id, region, bucket) 出现新的
+    SecretKey时，旧密钥的结果会被立即作废。
+    """
+
+    def __init__(self, ttl: float = VALIDATION_TTL, negative_ttl: float = VALIDATION_NEGATIVE_TTL,
+                 max_size: int = VALIDATION_CACHE_SIZE):
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        # 摘要 -> (过期时间, 失败原因)，失败原因为None表示校验成功
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        # (secret_id, region, bucket) -> 最近一次写入的摘要
+        self._identities: Dict[Tuple[str, str, str], str] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, credentials: Dict[str, Any],
+            record_stats: bool = True) -> Optional[Tuple[bool, Optional[str]]]:
+        """
+        查找未过期的校验结果
+
+        Args:
+            credentials: 凭据字典
+            record_stats: 是否计入命中/未命中统计
+
+        Returns:
+            (是否有效, 失败原因)，没有缓存结果时返回None
+        """
+        fingerprint = credentials_fingerprint(credentials)
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._entries.pop(fingerprint)
+                if record_stats:
+                    self._misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            if record_stats:
+                self._hits += 1
+            return entry[1] is None, entry[1]
+
+    def put_success(self, credentials: Dict[str, Any]) -> None:
+        self._put(credentials, self._ttl, None)
+
+    def put_failure(self, credentials: Dict[str, Any], reason: str) -> None:
+        self._put(credentials, self._negative_ttl, reason)
+
+    def _put(self, credentials: Dict[str, Any], ttl: float, reason: Optional[str]) -> None:
+        if ttl <= 0:
+            return
+        fingerprint = credentials_fingerprint(credentials)
+        identity = self._identity(credentials)
+        with self._lock:
+            # 凭据已变更（如密钥轮换），作废旧密钥的结果
+            previous = self._identities.get(identity)
+            if previous is not None and previous != fingerprint:
+                self._entries.pop(previous, None)
+            self._identities[identity] = fingerprint
+            self._entries[fingerprint] = (time.monotonic() + ttl, reason)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+            if len(self._identities) > self._max_size * 2:
+                live = set(self._entries)
+                self._identities = {key: value for key, value in self._identities.items() if value in live}
+
+    def invalidate(self, credentials: Dict[str, Any]) -> None:
+        """作废指定凭据的校验结果"""
+        fingerprint = credentials_fingerprint(credentials)
+        with self._lock:
+            self._entries.pop(fingerprint, None)
+            self._identities.pop(self._identity(credentials), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._identities.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中等统计信息"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / total, 4) if total else 0.0
+            }
+
+    def _identity(self, credentials: Dict[str, Any]) -> Tuple[str, str, str]:
+        return (str(credentials.get('secret_id') or ''), str(credentials.get('region') or ''),
+                str(credentials.get('bucket') or ''))
+
+
+# 进程级共享的校验结果缓存
+_validation_cache = ValidationCache()
+
+
+def get_validation_cache() -> ValidationCache:
+    """返回进程级共享的校验结果缓存"""
+    return _validation_cache
+
+
+# 工具调用必需的凭据字段
+REQUIRED_CREDENTIAL_FIELDS = ('region', 'bucket', 'secret_id', 'secret_key')
+
+
+def validate_credentials(credentials: Dict[str, Any]) -> None:
+    """
+    验证工具调用的凭据：必填字段齐全，且最近未被判定无效
+
+    Args:
+        credentials: 凭据字典
+
+    Raises:
+        ValueError: 缺少必填字段，或缓存中存在该凭据的失败结果
+    """
+    for field in REQUIRED_CREDENTIAL_FIELDS:
+        if not credentials.get(field):
+            raise ValueError(f"Missing required credential: {field}")
+    raise_if_known_invalid(credentials)
+
+
+def raise_if_known_invalid(credentials: Dict[str, Any]) -> None:
+    """
+    凭据最近已被判定无效时立即失败，不再发起注定失败的COS请求
+
+    Args:
+        credentials: 凭据字典
+
+    Raises:
+        ValueError: 缓存中存在该凭据的失败结果
+    """
+    cached = _validation_cache.get(credentials, record_stats=False)
+    if cached is not None and not cached[0]:
+        raise ValueError(f"Invalid credentials: {cached[1]}")
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from .retry import RetryContext
+
+# 计算摘要时每次读取的字节数
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# 最近上传内容摘要的本地缓存数量
+DEDUP_CACHE_SIZE = int(os.environ.get('COS_DEDUP_CACHE_SIZE', '1024'))
+
+# COS使用的CRC64-ECMA计算函数，首次计算摘要时才创建
+_crc64 = None
+
+
+def _get_crc64():
+    global _crc64
+    if _crc64 is None:
+        import crcmod
+        # 参数与x-cos-hash-crc64ecma响应头一致
+        _crc64 = crcmod.mkCrcFun(0x142F0E1EBA9EA3693, initCrc=0, xorOut=0xffffffffffffffff, rev=True)
+    return _crc64
+
+
+class ContentDigest:
+    """文件内容的MD5与CRC64摘要"""
+
+    __slots__ = ('md5', 'crc64')
+
+    def __init__(self, md5: str, crc64: str):
+        self.md5 = md5
+        self.crc64 = crc64
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ContentDigest) and self.md5 == other.md5 and self.crc64 == other.crc64
+
+    def __hash__(self) -> int:
+        return hash((self.md5, self.crc64))
+
+
+def compute_digest(payload: Any, chunk_size: int = DIGEST_CHUNK_SIZE) -> ContentDigest:
+    """
+    分块流式计算内容摘要，不复制整个文件内容
+
+    Args:
+        payload: bytes、类文件对象或本地文件路径
+        chunk_size: 每次处理的字节数
+
+    Returns:
+        ContentDigest实例
+    """
+    md5 = hashlib.md5()
+    crc = 0
+    crc64 = _get_crc64()
+    for chunk in iter_payload_chunks(payload, chunk_size):
+        md5.update(chunk)
+        crc = crc64(chunk, crc)
+    return ContentDigest(md5.hexdigest(), str(crc))
+
+
+def compute_content_hash(payload: Any, chunk_size: int = DIGEST_CHUNK_SIZE) -> str:
+    """
+    分块流式计算内容的SHA-256，用作内容寻址的对象名
+
+    Args:
+        payload: bytes、类文件对象或本地文件路径
+        chunk_size: 每次处理的字节数
+
+    Returns:
+        十六进制的SHA-256摘要
+    """
+    sha256 = hashlib.sha256()
+    for chunk in iter_payload_chunks(payload, chunk_size):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def iter_payload_chunks(payload: Any, chunk_size: int = DIGEST_CHUNK_SIZE):
+    """按块读取bytes、类文件对象或本地文件路径的内容，读取类文件对象后恢复文件指针"""
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        view = memoryview(payload)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
+    elif hasattr(payload, 'read'):
+        # 读取后恢复文件指针，保证后续上传从原位置开始
+        position = payload.tell() if hasattr(payload, 'tell') else None
+        if hasattr(payload, 'seek'):
+            payload.seek(0)
+        while True:
+            chunk = payload.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        if position is not None:
+            payload.seek(position)
+    else:
+        with open(payload, 'rb') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class RecentDigestCache:
+    """
+    线程安全的最近上传摘要LRU缓存
+
+    以 (bucket, object_key) 为键记录最近一次确认过的内容摘要，
+    命中时可跳过HEAD请求。
+    """
+
+    def __init__(self, max_size: int = DEDUP_CACHE_SIZE):
+        self._max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], ContentDigest]" = OrderedDict()
+
+    def get(self, bucket: str, object_key: str) -> Optional[ContentDigest]:
+        with self._lock:
+            digest = self._entries.get((bucket, object_key))
+            if digest is not None:
+                self._entries.move_to_end((bucket, object_key))
+            return digest
+
+    def put(self, bucket: str, object_key: str, digest: ContentDigest) -> None:
+        with self._lock:
+            self._entries[(bucket, object_key)] = digest
+            self._entries.move_to_end((bucket, object_key))
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, bucket: str, object_key: str) -> None:
+        with self._lock:
+            self._entries.pop((bucket, object_key), None)
+
+
+# 进程级共享的摘要缓存
+_recent_digests = RecentDigestCache()
+
+
+def is_duplicate(client: Any, bucket: str, object_key: str, digest: ContentDigest,
+                 retry: Optional[RetryContext] = None) -> bool:
+    """
+    判断目标对象是否已存在且内容相同
+
+    先查本地缓存，未命中时发起HEAD请求，比较CRC64（分块上传的对象ETag不是MD5）
+    或ETag与本地摘要。
+
+    Args:
+        client: CosS3Client实例
+        bucket: 存储桶名称
+        object_key: 对象键
+        digest: 待上传内容的摘要
+        retry: 重试上下文，HEAD请求遇到限流或网络错误时按其策略重试
+
+    Returns:
+        内容相同时返回True
+    """
+    if _recent_digests.get(bucket, object_key) == digest:
+        return True
+
+    try:
+        response = (retry or RetryContext()).call(client.head_object, Bucket=bucket, Key=object_key)
+    except Exception:
+        # 对象不存在、无权限查看或重试后仍失败时按非重复处理，正常上传（上传自身的错误照常报告）
+        _recent_digests.discard(bucket, object_key)
+        return False
+
+    headers = {key.lower(): value for key, value in response.items()}
+    remote_crc64 = headers.get('x-cos-hash-crc64ecma')
+    remote_etag = (headers.get('etag') or '').strip('"')
+    if remote_crc64:
+        duplicate = remote_crc64 == digest.crc64
+    else:
+        duplicate = remote_etag == digest.md5
+
+    if duplicate:
+        _recent_digests.put(bucket, object_key, digest)
+    return duplicate
+
+
+def remember_upload(bucket: str, object_key: str, digest: ContentDigest) -> None:
+    """记录成功上传的内容摘要"""
+    _recent_digests.put(bucket, object_key, digest)
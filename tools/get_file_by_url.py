@@ -1,80 +1,171 @@
 import os
-import re
-from urllib.parse import urlparse, unquote
-from typing import Any, Dict, Optional, Generator
+import uuid
+from typing import Any, Dict, Optional, Generator, Tuple
 from dify_plugin.entities.tool import ToolInvokeMessage
 
-from qcloud_cos import CosConfig, CosS3Client
-from qcloud_cos.cos_exception import CosServiceError
 
 from dify_plugin.interfaces.tool import Tool, ToolProvider
-from .utils import get_extension_from_content_type
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .compression import DecompressingBody, get_content_encoding, get_original_size
+from .cos_url import resolve_cos_url
+from .credential_cache import validate_credentials
+from .memory_budget import MemoryReservation, get_memory_budget
+from .object_cache import CachedBody, get_object_cache
+from .ranged_download import open_parallel_body
+from .retry import RetryBudget, RetryContext
+from .timing import NULL_TIMER, PhaseTimer
+from .utils import (SNIFF_BYTES, build_blob_metadata, get_bool_parameter, get_header, get_int_parameter,
+                    get_size_parameter)
 
 
 class GetFileByUrlTool(Tool):
+    # 流式读取的默认块大小
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    # 流式读取的最大块大小
+    MAX_CHUNK_SIZE = 16 * 1024 * 1024
+    # 单条文件分块消息的大小，与插件协议保持一致
+    BLOB_MESSAGE_CHUNK_SIZE = 8192
+    # 单次调用内所有请求（含对冲请求）共享的重试次数上限
+    RETRY_BUDGET = 5
+    
     def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        result = None
         try:
             # 验证工具参数中的认证信息
-            self._validate_credentials()
-            
-            # 执行文件获取操作
-            result = self._get_file_by_url(tool_parameters)
-            
-            # 提取文件扩展名
-            _, extension = os.path.splitext(result['filename'])
-            if not extension:
-                # 如果没有扩展名，根据content_type尝试推断
-                extension = get_extension_from_content_type(result['content_type'])
-                
-                # 如果推断出了扩展名，添加到文件名中
-                if extension:
-                    result['filename'] = result['filename'] + extension
-            
-            # 规范化 content_type：若为 application/octet-stream，则根据文件名推断
-            content_type = result['content_type'] or 'application/octet-stream'
-            if content_type in ('application/octet-stream', 'binary/octet-stream'):
-                import mimetypes
-                guessed, _ = mimetypes.guess_type(result['filename'])
-                if guessed:
-                    content_type = guessed
-            
-            # 构建文件元数据，确保包含支持图片显示的所有必要属性
-            file_metadata = {
-                'filename': result['filename'],
-                'content_type': content_type,
-                'size': result['file_size'],
-                'mime_type': content_type,
-                'extension': extension
-            }
+            validate_credentials(self.runtime.credentials)
             
-            # 如果是图片类型，添加特定标志以确保在Dify页面正常显示
-            if content_type.startswith('image/'):
-                file_metadata['is_image'] = True
-                file_metadata['display_as_image'] = True
-                file_metadata['type'] = 'image'
+            # 可选的阶段计时（获取客户端、HEAD、请求、读取内容）
+            timer = PhaseTimer(enabled=get_bool_parameter(tool_parameters, 'timings'))
+            retry = RetryContext(RetryBudget(self.RETRY_BUDGET))
             
-            # 使用create_blob_message返回文件内容
-            yield self.create_blob_message(
-                result['file_content'],
-                file_metadata
-            )
+            # 流式模式下仅打开对象，按固定大小分块转发；否则一次性读取文件内容
+            streaming = get_bool_parameter(tool_parameters, 'streaming')
+            if streaming:
+                result = self._open_file_by_url(tool_parameters, timer, retry)
+            else:
+                result = self._get_file_by_url(tool_parameters, timer, retry)
+            timer.add_retries(retry.retries)
+            
+            # 推断文件扩展名和内容类型，构建blob消息元数据
+            head = result['file_content'][:SNIFF_BYTES] if result.get('file_content') else None
+            file_metadata = build_blob_metadata(result['filename'], result['content_type'], result['file_size'], head)
+            result['filename'] = file_metadata['filename']
+            content_type = file_metadata['content_type']
+            
+            if streaming:
+                # 分块转发文件内容，内存占用不超过单次读取的块大小
+                with timer.phase('stream'):
+                    result['file_size'] = yield from self._stream_blob_chunks(
+                        result['body'],
+                        result['file_size'],
+                        file_metadata,
+                        self._get_chunk_size(tool_parameters),
+                        get_size_parameter(tool_parameters, 'max_size_mb')
+                    )
+                timer.add_bytes(result['file_size'])
+            else:
+                # 使用create_blob_message返回文件内容
+                yield self.create_blob_message(
+                    result['file_content'],
+                    file_metadata
+                )
             
             # 在text中输出成功消息、文件大小和类型，文件大小以MB为单位 - 英文消息
             file_size_mb = result['file_size'] / (1024 * 1024) if result['file_size'] > 0 else 0
             success_message = f"File downloaded successfully: {result['filename']}\nFile size: {file_size_mb:.2f} MB\nFile type: {content_type}"
+            if result.get('range'):
+                success_message += f"\nRange: {result['range']}"
+                if result.get('object_size') is not None:
+                    success_message += f" (object size: {result['object_size']} bytes, truncated)"
+            if result.get('parallel_parts'):
+                success_message += (f"\nDownload mode: parallel ({result['parallel_parts']} parts, "
+                                    f"{result['parallel_concurrency']} in parallel)")
+            if result.get('content_encoding'):
+                success_message += f"\nDecompressed: {result['content_encoding']}"
+            if result.get('cache_status'):
+                cache_stats = get_object_cache().stats()
+                success_message += f"\nCache: {result['cache_status']} (hit ratio: {cache_stats['hit_ratio']:.0%})"
+            if retry.retries or retry.hedges:
+                success_message += f"\nRetries: {retry.retries}, hedged requests: {retry.hedges}"
+            reservation = result.get('reservation')
+            if reservation is not None and reservation.wait_ms:
+                success_message += f"\nWaited {reservation.wait_ms:.0f} ms for memory budget"
             yield self.create_text_message(success_message)
+            
+            # 启用计时时以JSON消息返回各阶段耗时，并输出结构化日志
+            if timer.enabled:
+                yield self.create_json_message({
+                    "filename": result['filename'],
+                    "file_size_bytes": result['file_size'],
+                    "content_type": content_type,
+                    "cache_status": result.get('cache_status'),
+                    "retries": retry.retries,
+                    "hedged_requests": retry.hedges,
+                    "memory_budget": get_memory_budget().snapshot(),
+                    "timings": timer.to_dict()
+                })
+                timer.log('get_file_by_url', filename=result['filename'], cache_status=result.get('cache_status'))
         except Exception as e:
             # 失败时在text中输出错误信息 - 英文消息
             yield self.create_text_message(f"Failed to download file: {str(e)}")
+        finally:
+            # 文件内容已交出（或下载失败），释放预留的内存预算
+            if result is not None:
+                self._release_reservation(result)
     
-    def _validate_credentials(self) -> None:
-        # 验证必填字段是否存在
-        required_fields = ['region', 'bucket', 'secret_id', 'secret_key']
-        for field in required_fields:
-            if not self.runtime.credentials.get(field):
-                raise ValueError(f"Missing required credential: {field}")
+    def _get_file_by_url(self, parameters: dict[str, Any], timer: PhaseTimer = NULL_TIMER,
+                         retry: Optional[RetryContext] = None) -> dict:
+        """
+        获取完整的文件内容，超过max_size_mb限制时拒绝读取
+        """
+        result = self._open_file_by_url(parameters, timer, retry)
+        body = result.pop('body')
+        parallel_body = result.pop('parallel_body', None)
+        try:
+            with timer.phase('read_body'):
+                file_content = self._read_body(body, get_size_parameter(parameters, 'max_size_mb'),
+                                               result.get('reservation'))
+        except ValueError:
+            self._release_reservation(result)
+            raise
+        except Exception as e:
+            self._release_reservation(result)
+            raise ValueError(f"Failed to retrieve file: {str(e)}")
+        finally:
+            body.get_raw_stream().close()
+        
+        result['file_content'] = file_content
+        result['file_size'] = len(file_content)
+        # 内存预算放不下预取窗口时分段下载退回单个GET，读取结束后才知道实际的分块数
+        if parallel_body is not None and parallel_body.part_count > 1:
+            result['parallel_parts'] = parallel_body.part_count
+            result['parallel_concurrency'] = parallel_body.settings.concurrency
+        if result.get('cache_status') != 'hit':
+            timer.add_bytes(len(file_content))
+        
+        # 缓存未命中时写入本地缓存，供后续条件GET校验
+        validators = result.pop('validators', None)
+        if validators and result.get('cache_status') == 'miss':
+            get_object_cache().put(
+                validators['cache_key'],
+                file_content,
+                validators['etag'],
+                validators['last_modified'],
+                result['content_type']
+            )
+        return result
     
-    def _get_file_by_url(self, parameters: dict[str, Any]) -> dict:
+    def _open_file_by_url(self, parameters: dict[str, Any], timer: PhaseTimer = NULL_TIMER,
+                          retry: Optional[RetryContext] = None) -> dict:
+        """
+        发起GET请求并返回尚未读取的响应体，以及文件名、类型和大小等信息
+        
+        GET和HEAD请求遇到限流、5xx或网络错误时按重试策略重试；启用hedge时
+        请求超过近期p95延迟仍未返回会再发起一个相同请求，采用先返回的结果。
+        """
+        retry = retry or RetryContext()
+        hedge = get_bool_parameter(parameters, 'hedge')
         try:
             # 获取文件URL
             file_url = parameters.get('file_url')
@@ -90,81 +181,330 @@ class GetFileByUrlTool(Tool):
                 'secret_key': self.runtime.credentials.get('secret_key')
             }
             
-            # 解析URL获取bucket、region和object_key
-            bucket, region, object_key = self._parse_cos_url(file_url)
+            # 解析URL获取bucket、region和object_key，URL中缺少时使用凭证中的值
+            bucket_name, region_name, object_key = resolve_cos_url(file_url, credentials)
             
-            # 如果URL中的bucket与凭证中的bucket不一致，使用URL中的bucket
-            if bucket and bucket != credentials['bucket']:
-                bucket_name = bucket
-            else:
-                bucket_name = credentials['bucket']
+            # 从进程级注册表获取腾讯云COS客户端（复用长连接）
+            with timer.phase('client'):
+                client = get_cos_client(credentials, region=region_name)
             
-            # 如果URL中的region与凭证中的region不一致，使用URL中的region
-            if region and region != credentials['region']:
-                region_name = region
-            else:
-                region_name = credentials['region']
+            # 解析字节范围；设置了max_bytes时先发起HEAD请求，在传输内容前拒绝或截断超大对象
+            with timer.phase('resolve_range'):
+                byte_range, object_size = self._resolve_range(client, bucket_name, object_key, parameters,
+                                                              retry, hedge)
             
-            # 创建腾讯云COS客户端
-            config = CosConfig(
-                Region=region_name,
-                SecretId=credentials['secret_id'],
-                SecretKey=credentials['secret_key']
-            )
-            client = CosS3Client(config)
+            # 启用本地缓存时（仅限非流式的完整下载）带上缓存条目的校验信息发起条件GET
+            cache_key = None
+            cache_entry = None
+            if byte_range is None and self._use_cache(parameters):
+                cache_key = (bucket_name, region_name, object_key)
+                cache_entry = get_object_cache().get(cache_key)
             
-            # 获取文件内容
-            response = client.get_object(
-                Bucket=bucket_name,
-                Key=object_key
-            )
+            # 获取文件内容（指定范围时使用Range请求）
+            request_headers = {}
+            if byte_range:
+                request_headers['Range'] = byte_range
+            if cache_entry is not None:
+                request_headers['IfNoneMatch'] = cache_entry.etag
+                if cache_entry.last_modified:
+                    request_headers['IfModifiedSince'] = cache_entry.last_modified
+            try:
+                with timer.phase('request'):
+                    if hedge:
+                        # 落后的对冲请求返回后关闭其响应体，释放连接
+                        response = retry.hedged_call(
+                            f"get_object:{bucket_name}",
+                            client.get_object,
+                            Bucket=bucket_name,
+                            Key=object_key,
+                            cleanup=lambda late: late['Body'].get_raw_stream().close(),
+                            **request_headers
+                        )
+                    else:
+                        response = retry.call(
+                            client.get_object,
+                            Bucket=bucket_name,
+                            Key=object_key,
+                            **request_headers
+                        )
+            except IOError:
+                # 304响应可能不带Content-Length，SDK无法为其创建响应体
+                if cache_entry is None:
+                    raise
+                response = None
             
-            # 读取文件内容
-            file_content = response['Body'].get_raw_stream().read()
+            max_size = get_size_parameter(parameters, 'max_size_mb')
+            filename = os.path.basename(object_key)
             
-            # 获取文件大小
-            file_size = len(file_content)
+            # 对象未修改（304）时直接使用本地缓存的内容
+            if cache_entry is not None and self._is_not_modified(response, cache_entry):
+                if response is not None:
+                    response['Body'].get_raw_stream().close()
+                get_object_cache().touch(cache_key)
+                get_object_cache().record(hit=True)
+                if max_size and cache_entry.size > max_size:
+                    raise ValueError(f"File size {cache_entry.size} bytes exceeds the limit of {max_size} bytes")
+                return {
+                    'body': CachedBody(cache_entry.data),
+                    'filename': filename,
+                    'content_type': cache_entry.content_type,
+                    'file_size': cache_entry.size,
+                    'range': None,
+                    'object_size': object_size,
+                    'cache_status': 'hit'
+                }
+            if cache_key is not None:
+                get_object_cache().record(hit=False)
             
-            # 获取文件类型
-            content_type = response['ContentType'] if 'ContentType' in response else 'application/octet-stream'
+            # 获取文件大小（响应头中的Content-Length）
+            file_size = int(get_header(response, 'Content-Length') or 0)
             
-            # 获取文件名
-            filename = os.path.basename(object_key)
+            # 非流式读取完整的大对象时，其余部分以Range GET并发下载，分块大小和并发数由调优器选择；
+            # 流式模式保持单个GET，内存占用不超过单次读取的块大小
+            body = response['Body']
+            parallel_body = None
+            if byte_range is None and not get_bool_parameter(parameters, 'streaming'):
+                parallel_body = open_parallel_body(client, bucket_name, object_key, response, region_name, retry)
+                if parallel_body is not None:
+                    body = parallel_body
+            
+            # 压缩存储的对象边读边解压；字节范围请求得到的是压缩数据片段，按原样返回
+            content_encoding = None
+            if byte_range is None and self._use_decompress(parameters):
+                content_encoding = get_content_encoding(response)
+            if content_encoding:
+                body = DecompressingBody(body, content_encoding)
+                # 解压后的大小取自上传时记录的元数据，缺失时以实际读取的字节数为准
+                original_size = get_original_size(response)
+                if max_size and original_size is not None and original_size > max_size:
+                    body.get_raw_stream().close()
+                    raise ValueError(f"File size {original_size} bytes exceeds the limit of {max_size} bytes")
+                file_size = original_size or 0
+            
+            # 在读取任何内容之前检查大小限制
+            if max_size and file_size > max_size:
+                body.get_raw_stream().close()
+                raise ValueError(f"File size {file_size} bytes exceeds the limit of {max_size} bytes")
+            
+            # 读取响应体之前预留进程级内存预算：完整下载按文件大小（未知时按Content-Length），
+            # 流式下载按单次读取的块大小；预算不足时排队，等待超时则拒绝
+            if get_bool_parameter(parameters, 'streaming'):
+                reserve_bytes = self._get_chunk_size(parameters)
+            else:
+                reserve_bytes = max(file_size, int(get_header(response, 'Content-Length') or 0))
+            try:
+                with timer.phase('memory_wait'):
+                    reservation = get_memory_budget().acquire(reserve_bytes)
+            except ValueError:
+                body.get_raw_stream().close()
+                raise
+            
+            # 获取文件类型
+            content_type = get_header(response, 'Content-Type') or 'application/octet-stream'
             
             # 返回结果字典
-            return {
-                'file_content': file_content,
+            result = {
+                'body': body,
                 'filename': filename,
                 'content_type': content_type,
-                'file_size': file_size
+                'file_size': file_size,
+                'range': byte_range,
+                'object_size': object_size,
+                'content_encoding': content_encoding,
+                'reservation': reservation
             }
-        except CosServiceError as e:
+            if parallel_body is not None:
+                result['parallel_body'] = parallel_body
+            if cache_key is not None:
+                result['cache_status'] = 'miss'
+                result['validators'] = {
+                    'cache_key': cache_key,
+                    'etag': get_header(response, 'ETag'),
+                    'last_modified': get_header(response, 'Last-Modified')
+                }
+            return result
+        except cos_sdk.CosServiceError as e:
             error_message = f"COS service error: {str(e)}"
             raise ValueError(error_message)
         except Exception as e:
             error_message = f"Failed to retrieve file: {str(e)}"
             raise ValueError(error_message)
     
-    def _parse_cos_url(self, url: str) -> tuple:
+    def _resolve_range(self, client: Any, bucket: str, object_key: str, parameters: dict[str, Any],
+                       retry: Optional[RetryContext] = None,
+                       hedge: bool = False) -> Tuple[Optional[str], Optional[int]]:
         """
-        解析COS URL，支持标准格式和自定义域名格式
-        标准格式: https://bucket.cos.region.myqcloud.com/object_key
-        自定义域名格式: https://custom-domain/object_key
+        根据 range_start/range_end 或 max_bytes 参数生成Range请求头
+        
+        Args:
+            client: CosS3Client实例
+            bucket: 存储桶名称
+            object_key: 对象键
+            parameters: 工具参数
+            retry: 重试上下文
+            hedge: HEAD请求是否启用对冲
+            
+        Returns:
+            (Range请求头, 对象总大小)，未指定范围时Range为None；未发起HEAD时总大小为None
         """
-        parsed_url = urlparse(url)
+        range_start = self._get_offset_parameter(parameters, 'range_start')
+        range_end = self._get_offset_parameter(parameters, 'range_end')
+        max_bytes = self._get_offset_parameter(parameters, 'max_bytes')
+        
+        if range_start is not None or range_end is not None:
+            range_start = range_start or 0
+            if range_end is not None and range_end < range_start:
+                raise ValueError("range_end must be greater than or equal to range_start")
+            # 同时设置max_bytes时限制范围长度
+            if max_bytes:
+                limit_end = range_start + max_bytes - 1
+                range_end = limit_end if range_end is None else min(range_end, limit_end)
+            return f"bytes={range_start}-{'' if range_end is None else range_end}", None
         
-        # 处理URL编码
-        object_key = unquote(parsed_url.path.lstrip('/'))
+        if not max_bytes:
+            return None, None
         
-        # 如果是标准COS URL格式 (bucket.cos.region.myqcloud.com)
-        if parsed_url.hostname and parsed_url.hostname.endswith('.myqcloud.com'):
-            # 提取bucket和region
-            hostname_parts = parsed_url.hostname.split('.')
-            if len(hostname_parts) >= 4 and hostname_parts[1] == 'cos':
-                bucket_name = hostname_parts[0]
-                region_name = hostname_parts[2]
-                return (bucket_name, region_name, object_key)
+        # 先发起HEAD请求获取对象大小，不传输任何内容
+        retry = retry or RetryContext()
+        if hedge:
+            head_response = retry.hedged_call(f"head_object:{bucket}", client.head_object,
+                                              Bucket=bucket, Key=object_key)
+        else:
+            head_response = retry.call(client.head_object, Bucket=bucket, Key=object_key)
+        object_size = int(get_header(head_response, 'Content-Length') or 0)
+        if object_size <= max_bytes:
+            return None, object_size
+        
+        if parameters.get('oversize_action', 'truncate') == 'refuse':
+            raise ValueError(f"Object size {object_size} bytes exceeds max_bytes {max_bytes}")
+        # 截断：只获取前max_bytes个字节
+        return f"bytes=0-{max_bytes - 1}", object_size
+    
+    def _get_offset_parameter(self, parameters: dict[str, Any], name: str) -> Optional[int]:
+        # 读取非负的字节偏移或长度参数，未设置时返回None
+        value = get_int_parameter(parameters, name)
+        if value is not None and value < 0:
+            raise ValueError(f"Parameter {name} must not be negative")
+        return value
+    
+    def _read_body(self, body: Any, max_size: int, reservation: Optional[MemoryReservation] = None) -> bytes:
+        """
+        读取完整响应体，累计大小超过max_size时立即中止
+        
+        缺少原始大小元数据的压缩对象只按压缩后的大小预留了内存预算，解压后超出预留的部分边读边追加。
+        """
+        raw_stream = body.get_raw_stream()
+        if not max_size and reservation is None:
+            return raw_stream.read()
+        
+        buffer = bytearray()
+        while True:
+            chunk = raw_stream.read(self.DEFAULT_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            if max_size and len(buffer) > max_size:
+                raise ValueError(f"File size exceeds the limit of {max_size} bytes")
+            if reservation is not None and len(buffer) > reservation.nbytes:
+                reservation.extend(len(buffer) - reservation.nbytes)
+        return bytes(buffer)
+    
+    def _stream_blob_chunks(self, body: Any, total_length: int, meta: dict, chunk_size: int,
+                            max_size: int) -> Generator[ToolInvokeMessage, None, int]:
+        """
+        按固定大小读取响应体并以BLOB_CHUNK消息转发
         
-        # 对于自定义域名格式，需要额外的region或bucket验证
-        # 此处仅返回None作为bucket和region，由调用方处理
-        return None, None, object_key
\ No newline at end of file
+        Args:
+            body: COS响应体
+            total_length: 文件总大小（字节）
+            meta: 文件元数据
+            chunk_size: 每次从网络读取的字节数
+            max_size: 最大允许的字节数，0表示不限制
+            
+        Returns:
+            实际转发的字节数
+        """
+        raw_stream = body.get_raw_stream()
+        blob_id = uuid.uuid4().hex
+        sequence = 0
+        received = 0
+        try:
+            while True:
+                chunk = raw_stream.read(chunk_size)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if max_size and received > max_size:
+                    raise ValueError(f"File size exceeds the limit of {max_size} bytes")
+                # 拆分为插件协议允许的消息块大小
+                for offset in range(0, len(chunk), self.BLOB_MESSAGE_CHUNK_SIZE):
+                    yield self._create_blob_chunk_message(
+                        blob_id, sequence, total_length or received,
+                        chunk[offset:offset + self.BLOB_MESSAGE_CHUNK_SIZE], False, meta
+                    )
+                    sequence += 1
+        finally:
+            raw_stream.close()
+        
+        # 发送结束标记
+        yield self._create_blob_chunk_message(blob_id, sequence, total_length or received, b"", True, meta)
+        return received
+    
+    def _create_blob_chunk_message(self, blob_id: str, sequence: int, total_length: int, blob: bytes,
+                                   end: bool, meta: dict) -> ToolInvokeMessage:
+        # 构建单个文件分块消息
+        return self.response_type(
+            type=ToolInvokeMessage.MessageType.BLOB_CHUNK,
+            message=ToolInvokeMessage.BlobChunkMessage(
+                id=blob_id,
+                sequence=sequence,
+                total_length=total_length,
+                blob=blob,
+                end=end
+            ),
+            meta=meta
+        )
+    
+    def _release_reservation(self, result: dict) -> None:
+        # 释放结果中预留的内存预算（可重复调用）
+        reservation = result.get('reservation')
+        if reservation is not None:
+            reservation.release()
+    
+    def _use_cache(self, parameters: dict[str, Any]) -> bool:
+        # 本地缓存仅用于非流式模式，流式模式的内存占用需保持有界；缓存中保存的是解压后的内容
+        return (get_bool_parameter(parameters, 'use_cache')
+                and not get_bool_parameter(parameters, 'streaming')
+                and self._use_decompress(parameters))
+    
+    def _use_decompress(self, parameters: dict[str, Any]) -> bool:
+        # 默认对gzip/zstd压缩存储的对象透明解压
+        if parameters.get('decompress') in (None, ''):
+            return True
+        return get_bool_parameter(parameters, 'decompress')
+    
+    def _is_not_modified(self, response: Optional[dict], cache_entry: Any) -> bool:
+        """
+        判断条件GET的结果是否为304（对象未修改）
+        
+        Args:
+            response: get_object的响应，304且无法创建响应体时为None
+            cache_entry: 发起条件请求时使用的缓存条目
+            
+        Returns:
+            对象未修改时返回True
+        """
+        if response is None:
+            return True
+        raw_response = getattr(response.get('Body'), '_rt', None)
+        if getattr(raw_response, 'status_code', None) == 304:
+            return True
+        # 带If-None-Match的请求返回200说明ETag已变化；ETag相同即视为未修改
+        return get_header(response, 'ETag') == cache_entry.etag
+    
+    def _get_chunk_size(self, parameters: dict[str, Any]) -> int:
+        # 流式读取的块大小（KB转字节）
+        chunk_size_kb = get_int_parameter(parameters, 'chunk_size_kb', 0)
+        if chunk_size_kb <= 0:
+            return self.DEFAULT_CHUNK_SIZE
+        return max(self.BLOB_MESSAGE_CHUNK_SIZE, min(chunk_size_kb * 1024, self.MAX_CHUNK_SIZE))
@@ -0,0 +1,165 @@
+"""
+上传前的图片优化
+
+按最大边长缩放图片，并以指定质量重新编码（保持原格式）或转换为WebP。解码和编码是CPU密集型操作，
+在短时子进程（tools/image_worker.py）中执行，不会阻塞上传线程，也不受GIL限制。子进程通过
+exec启动新的解释器，不会fork插件进程（继承其他线程持有的锁），也不会重新执行main.py。
+优化是尽力而为的：结果没有变小、图片无法解码或处理超时时上传原始内容，并在报告中说明原因。
+
+Pillow与zstd压缩所需的zstandard一样是可选依赖，不在requirements.txt中；只在子进程中导入，
+插件进程只检查其是否已安装，未安装时选择图片优化会报错。
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+from .dedup import iter_payload_chunks
+
+# 同时运行的图片优化子进程数
+IMAGE_WORKERS = max(1, int(os.environ.get('COS_IMAGE_WORKERS', str(min(4, os.cpu_count() or 1)))))
+
+# 单张图片优化的最长时间（秒），超时后终止子进程并上传原始内容
+IMAGE_TIMEOUT = float(os.environ.get('COS_IMAGE_TIMEOUT', '60'))
+
+# 优化方式：none 不处理；original 保持原格式重新编码；webp 转换为WebP
+IMAGE_MODES = ('none', 'original', 'webp')
+
+# 图片优化子进程执行的脚本
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'image_worker.py')
+
+DEFAULT_IMAGE_QUALITY = 85
+MAX_IMAGE_DIMENSION = 16384
+
+# 保持原格式重新编码时支持的类型（内容类型 -> Pillow格式）
+REENCODE_FORMATS = {
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+    'image/webp': 'WEBP'
+}
+
+# 转换为WebP时支持的源类型；GIF可能是动图，不做转换
+WEBP_SOURCE_TYPES = frozenset(REENCODE_FORMATS) | {'image/bmp', 'image/tiff'}
+
+# 输出格式 -> (内容类型, 扩展名)
+OUTPUT_TYPES = {
+    'JPEG': ('image/jpeg', '.jpg'),
+    'PNG': ('image/png', '.png'),
+    'WEBP': ('image/webp', '.webp')
+}
+
+
+class ImageOptions(NamedTuple):
+    mode: str
+    # 最大边长（像素），0表示不缩放
+    max_dimension: int
+    # JPEG和WebP的编码质量（1-100），PNG为无损编码不使用
+    quality: int
+
+
+class OptimizedImage(NamedTuple):
+    # 优化后的内容，None表示使用原始内容
+    data: Optional[bytes]
+    content_type: str
+    extension: str
+    # 写入JSON输出的优化报告
+    report: Dict[str, Any]
+
+
+def resolve_image_options(mode: Optional[str], max_dimension: Any = None,
+                          quality: Any = None) -> Optional[ImageOptions]:
+    """
+    解析图片优化参数
+
+    Args:
+        mode: 'none'、'original' 或 'webp'
+        max_dimension: 最大边长（像素），空或0表示不缩放
+        quality: 编码质量（1-100），默认85
+
+    Returns:
+        ImageOptions，不优化时返回None
+    """
+    mode = (mode or 'none').strip().lower()
+    if mode == 'none':
+        return None
+    if mode not in IMAGE_MODES:
+        raise ValueError(f"Unsupported image optimization: {mode}")
+    try:
+        max_dimension = int(max_dimension) if max_dimension not in (None, '') else 0
+        quality = int(quality) if quality not in (None, '') else DEFAULT_IMAGE_QUALITY
+    except (TypeError, ValueError):
+        raise ValueError("Image max dimension and quality must be integers")
+    if importlib.util.find_spec('PIL') is None:
+        raise ValueError("Image optimization requires the Pillow package")
+    return ImageOptions(mode, max(0, min(max_dimension, MAX_IMAGE_DIMENSION)), max(1, min(quality, 100)))
+
+
+def is_optimizable(options: Optional[ImageOptions], content_type: str) -> bool:
+    """判断该内容类型的文件是否参与图片优化"""
+    if options is None:
+        return False
+    content_type = (content_type or '').split(';', 1)[0].strip().lower()
+    if options.mode == 'webp':
+        return content_type in WEBP_SOURCE_TYPES
+    return content_type in REENCODE_FORMATS
+
+
+def optimize_image(payload: Any, content_type: str, options: ImageOptions) -> OptimizedImage:
+    """
+    在子进程中优化一张图片，结果没有变小或处理失败时保留原始内容
+
+    Args:
+        payload: bytes、类文件对象或本地文件路径
+        content_type: 原始内容类型
+        options: 优化参数
+
+    Returns:
+        OptimizedImage，data为None时上传原始内容
+    """
+    data = payload if isinstance(payload, bytes) else b''.join(iter_payload_chunks(payload))
+    content_type = content_type.split(';', 1)[0].strip().lower()
+    report: Dict[str, Any] = {'mode': options.mode, 'original_size_bytes': len(data)}
+    output_format = 'WEBP' if options.mode == 'webp' else REENCODE_FORMATS[content_type]
+    try:
+        result = _run_worker(data, output_format, options.max_dimension, options.quality)
+    except subprocess.TimeoutExpired:
+        report.update(status='failed', reason=f"Image optimization timed out after {IMAGE_TIMEOUT:g} seconds")
+        return OptimizedImage(None, content_type, '', report)
+    except Exception as e:
+        report.update(status='failed', reason=f"Cannot optimize image: {str(e)}")
+        return OptimizedImage(None, content_type, '', report)
+
+    optimized = result.pop('data')
+    report.update(result)
+    if len(optimized) >= len(data):
+        report.update(status='skipped', reason="Optimized image is not smaller than the original")
+        return OptimizedImage(None, content_type, '', report)
+
+    output_content_type, extension = OUTPUT_TYPES[output_format]
+    saved = len(data) - len(optimized)
+    report.update(status='optimized', optimized_size_bytes=len(optimized), saved_bytes=saved,
+                  saved_percent=round(saved * 100 / len(data), 1))
+    return OptimizedImage(optimized, output_content_type, extension, report)
+
+
+def _run_worker(data: bytes, output_format: str, max_dimension: int, quality: int) -> Dict[str, Any]:
+    # 在短时子进程中执行Pillow，同时运行的子进程数不超过 IMAGE_WORKERS；超时时子进程被终止
+    with _worker_slots:
+        completed = subprocess.run(
+            [sys.executable, WORKER_PATH, output_format, str(max_dimension), str(quality)],
+            input=data, capture_output=True, timeout=IMAGE_TIMEOUT
+        )
+    if completed.returncode != 0:
+        message = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise ValueError(message[-1] if message else f"worker exited with status {completed.returncode}")
+    header, _, optimized = completed.stdout.partition(b'\n')
+    result = json.loads(header)
+    result['data'] = optimized
+    return result
+
+
+# 限制同时运行的图片优化子进程数
+_worker_slots = threading.BoundedSemaphore(IMAGE_WORKERS)
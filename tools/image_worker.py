@@ -0,0 +1,77 @@
+"""
+图片优化子进程的入口
+
+由 image_optimization 以 `python image_worker.py <格式> <最大边长> <质量>` 启动：从stdin读取原始图片，
+向stdout写入一行JSON（格式和尺寸）以及紧随其后的优化结果；失败时将原因写入stderr并以非0状态退出。
+本模块只依赖标准库和Pillow，作为脚本执行时不会导入插件的其他模块（也不会执行main.py）。
+"""
+import io
+import json
+import sys
+from typing import Any, Dict
+
+
+def transform_image(data: bytes, output_format: str, max_dimension: int, quality: int) -> Dict[str, Any]:
+    """
+    解码、按EXIF方向旋转、缩放并重新编码一张图片
+
+    EXIF等元数据不会写入结果，ICC配置保留。
+
+    Args:
+        data: 原始图片内容
+        output_format: Pillow的输出格式，'JPEG'、'PNG' 或 'WEBP'
+        max_dimension: 最大边长（像素），0表示不缩放
+        quality: JPEG和WebP的编码质量（1-100）
+
+    Returns:
+        包含 data、format、original_dimensions、dimensions 的字典
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        if getattr(source, 'n_frames', 1) > 1:
+            raise ValueError("animated images are not supported")
+        original_dimensions = list(source.size)
+        icc_profile = source.info.get('icc_profile')
+        image = ImageOps.exif_transpose(source)
+    if max_dimension and max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    options: Dict[str, Any] = {'icc_profile': icc_profile} if icc_profile else {}
+    if output_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options.update(quality=quality, optimize=True, progressive=True)
+    elif output_format == 'PNG':
+        options.update(optimize=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        options.update(quality=quality, method=4)
+
+    output = io.BytesIO()
+    image.save(output, format=output_format, **options)
+    return {
+        'data': output.getvalue(),
+        'format': output_format.lower(),
+        'original_dimensions': original_dimensions,
+        'dimensions': list(image.size)
+    }
+
+
+def main() -> int:
+    output_format, max_dimension, quality = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    try:
+        result = transform_image(sys.stdin.buffer.read(), output_format, max_dimension, quality)
+    except Exception as e:
+        sys.stderr.write(str(e) or type(e).__name__)
+        return 1
+    data = result.pop('data')
+    sys.stdout.buffer.write(json.dumps(result).encode() + b'\n')
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
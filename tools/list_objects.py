@@ -0,0 +1,178 @@
+from collections.abc import Generator
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .credential_cache import validate_credentials
+from .object_listing import MAX_LIST_KEYS, ListPage, get_prefix_index, list_cos_page
+from .retry import RetryBudget, RetryContext
+from .upload_job import build_file_url
+from .utils import get_bool_parameter, get_int_parameter
+
+
+class ListObjectsTool(Tool):
+    # 单次调用默认和最多返回的页数
+    DEFAULT_MAX_PAGES = 1
+    MAX_PAGES = 100
+    # 文本消息中最多列出的条目数，完整结果见JSON消息
+    MAX_TEXT_ENTRIES = 100
+    # 单次调用内所有请求共享的重试次数上限
+    RETRY_BUDGET = 10
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        try:
+            # 从runtime credentials获取认证信息
+            credentials = {
+                'region': self.runtime.credentials.get('region'),
+                'bucket': self.runtime.credentials.get('bucket'),
+                'secret_id': self.runtime.credentials.get('secret_id'),
+                'secret_key': self.runtime.credentials.get('secret_key')
+            }
+
+            # 验证工具参数中的认证信息
+            validate_credentials(credentials)
+
+            prefix = self._get_prefix(tool_parameters)
+            delimiter = tool_parameters.get('delimiter') or ''
+            marker = (tool_parameters.get('marker') or '').strip()
+            max_keys = self._get_int_parameter(tool_parameters, 'max_keys', MAX_LIST_KEYS, 1, MAX_LIST_KEYS)
+            max_pages = self._get_int_parameter(tool_parameters, 'max_pages', self.DEFAULT_MAX_PAGES, 1,
+                                                self.MAX_PAGES)
+            use_index = get_bool_parameter(tool_parameters, 'use_index')
+            retry = RetryContext(RetryBudget(self.RETRY_BUDGET))
+
+            # 每取得一页立即输出，续列标记可作为下一次调用的marker
+            object_count = 0
+            prefix_count = 0
+            page_count = 0
+            text_entries = []
+            last_page: Optional[ListPage] = None
+            source = 'cos'
+            index_refresh = None
+            pages = self._list_pages(credentials, prefix, delimiter, marker, max_keys, max_pages, use_index, retry)
+            for source, index_refresh, page in pages:
+                page_count += 1
+                last_page = page
+                objects = [self._build_object_info(obj, credentials) for obj in page.objects]
+                object_count += len(objects)
+                prefix_count += len(page.common_prefixes)
+                yield self.create_json_message({
+                    "status": "in_progress",
+                    "page": page_count,
+                    "source": source,
+                    "objects": objects,
+                    "common_prefixes": page.common_prefixes,
+                    "is_truncated": page.is_truncated,
+                    "next_marker": page.next_marker
+                })
+                text_entries.extend(f"- {common_prefix}" for common_prefix in page.common_prefixes)
+                text_entries.extend(f"- {obj['key']} ({obj['size_bytes']} bytes)" for obj in objects)
+
+            is_truncated = last_page.is_truncated if last_page else False
+            next_marker = last_page.next_marker if last_page else ''
+            json_response = {
+                "status": "completed",
+                "bucket": credentials['bucket'],
+                "prefix": prefix,
+                "delimiter": delimiter,
+                "page_count": page_count,
+                "object_count": object_count,
+                "common_prefix_count": prefix_count,
+                "is_truncated": is_truncated,
+                "next_marker": next_marker,
+                "source": source,
+                "retries": retry.retries
+            }
+            if use_index:
+                json_response["index_refresh"] = index_refresh
+                json_response["index"] = get_prefix_index().stats()
+            yield self.create_json_message(json_response)
+
+            # 英文消息
+            text_response = (f"Listed {object_count} objects and {prefix_count} common prefixes "
+                             f"under '{prefix}' in {page_count} pages\n")
+            text_response += "\n".join(text_entries[:self.MAX_TEXT_ENTRIES])
+            if len(text_entries) > self.MAX_TEXT_ENTRIES:
+                text_response += f"\n... and {len(text_entries) - self.MAX_TEXT_ENTRIES} more (see JSON output)"
+            if is_truncated:
+                text_response += f"\nMore results available, continue with marker: {next_marker}"
+            if source == 'index':
+                text_response += f"\nServed from local index ({index_refresh.replace('_', ' ')})"
+            if retry.retries:
+                text_response += f"\nRetries: {retry.retries}"
+            yield self.create_text_message(text_response)
+        except Exception as e:
+            error_message = str(e)
+
+            json_response = {
+                "status": "failed",
+                "prefix": tool_parameters.get('prefix'),
+                "error_message": error_message
+            }
+            yield self.create_json_message(json_response)
+
+            # 在text中输出失败信息 - 英文消息
+            yield self.create_text_message(f"Failed to list objects: {error_message}")
+            # 同时抛出异常以保持与其他工具一致的行为
+            raise ValueError(f"Failed to list objects: {error_message}")
+
+    def _list_pages(self, credentials: dict[str, Any], prefix: str, delimiter: str, marker: str, max_keys: int,
+                    max_pages: int, use_index: bool,
+                    retry: RetryContext) -> Iterator[Tuple[str, Optional[str], ListPage]]:
+        """
+        逐页列出prefix下的对象，最多max_pages页
+
+        启用use_index时先刷新本地前缀索引再从索引分页，前缀过大无法建立索引时直接向COS列举。
+
+        Returns:
+            (来源 'index' 或 'cos', 索引刷新方式, 一页列举结果)
+        """
+        try:
+            # 从进程级注册表获取腾讯云COS客户端（复用长连接）
+            client = get_cos_client(credentials)
+            bucket, region = credentials['bucket'], credentials['region']
+
+            index_refresh = None
+            if use_index:
+                index_refresh = get_prefix_index().refresh(client, bucket, region, prefix, retry)
+
+            for _ in range(max_pages):
+                page = None
+                if index_refresh is not None:
+                    page = get_prefix_index().list_page(bucket, region, prefix, delimiter, marker, max_keys)
+                if page is not None:
+                    yield 'index', index_refresh, page
+                else:
+                    # 索引不可用（未启用、前缀过大或已被淘汰）时向COS请求
+                    index_refresh = None
+                    page = list_cos_page(client, bucket, prefix, delimiter, marker, max_keys, retry)
+                    yield 'cos', None, page
+                if not page.is_truncated:
+                    break
+                marker = page.next_marker
+        except cos_sdk.CosServiceError as e:
+            raise ValueError(f"COS service error: {str(e)}")
+
+    def _build_object_info(self, obj: Dict[str, Any], credentials: dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "key": obj['key'],
+            "size_bytes": obj['size'],
+            "last_modified": obj['last_modified'],
+            "etag": obj['etag'],
+            "file_url": build_file_url(credentials['bucket'], credentials['region'], obj['key'])
+        }
+
+    def _get_prefix(self, parameters: dict[str, Any]) -> str:
+        # 对象键前缀，为空时列出整个存储桶；对象键不以/开头
+        prefix = (parameters.get('prefix') or '').strip()
+        if prefix.startswith('/') or prefix.startswith('\\'):
+            raise ValueError("Prefix cannot start with / or \\")
+        return prefix
+
+    def _get_int_parameter(self, parameters: dict[str, Any], name: str, default: int, minimum: int,
+                           maximum: int) -> int:
+        # 读取整数参数并限制在 [minimum, maximum] 之间
+        value = get_int_parameter(parameters, name) or default
+        return max(minimum, min(value, maximum))
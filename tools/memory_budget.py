@@ -0,0 +1,186 @@
+"""
+进程级的内存预算（在途字节数上限）
+
+所有工具调用共享同一个预算：上传在读取文件内容之前按文件大小预留，下载在读取响应体之前按
+Content-Length预留，传输完成并交出内容后释放。预算不足时按到达顺序排队等待，等待超时后拒绝，
+避免并发的大文件同时驻留内存导致插件进程OOM。
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# 所有调用同时持有的文件内容的字节上限，0表示不限制
+MEMORY_BUDGET_BYTES = int(float(os.environ.get('COS_MEMORY_BUDGET_MB', '512')) * 1024 * 1024)
+
+# 预算不足时排队等待的最长时间（秒），0表示不等待直接拒绝；需小于插件的请求超时（MAX_REQUEST_TIMEOUT）
+MEMORY_BUDGET_WAIT = float(os.environ.get('COS_MEMORY_BUDGET_WAIT', '30'))
+
+
+class MemoryReservation:
+    """一次预留的字节数，release() 可重复调用，也可作为上下文管理器使用"""
+
+    __slots__ = ('nbytes', 'wait_seconds', '_budget')
+
+    def __init__(self, budget: Optional['MemoryBudget'], nbytes: int, wait_seconds: float = 0.0):
+        self.nbytes = nbytes
+        self.wait_seconds = wait_seconds
+        self._budget = budget
+
+    @property
+    def wait_ms(self) -> float:
+        return round(self.wait_seconds * 1000, 3)
+
+    def extend(self, nbytes: int, timeout: Optional[float] = None) -> None:
+        """
+        在本预留上追加nbytes字节，用于实际读取的内容超过预留大小的情况；预算不足时排队
+
+        追加后的总量不超过预算上限，已持有整个预算、预算不限制或预留已释放时不再追加。
+
+        Raises:
+            ValueError: 等待超时时预算仍不足
+        """
+        if self._budget is None:
+            return
+        nbytes = min(max(0, int(nbytes)), self._budget.limit - self.nbytes)
+        if nbytes <= 0:
+            return
+        extra = self._budget.acquire(nbytes, timeout)
+        # 追加的部分并入本预留，随本预留一起释放
+        extra._budget = None
+        self.nbytes += extra.nbytes
+        self.wait_seconds += extra.wait_seconds
+
+    def release(self) -> None:
+        budget, self._budget = self._budget, None
+        if budget is not None:
+            budget._release(self.nbytes)
+
+    def __enter__(self) -> 'MemoryReservation':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class MemoryBudget:
+    """
+    按字节加权的信号量，线程安全
+
+    等待者按先来先服务的顺序获得预算，排在前面的大请求不会被后来的小请求饿死。
+    超过总预算的单个请求按总预算计算，只有在没有其他传输时才会被放行。
+    """
+
+    def __init__(self, limit: int = MEMORY_BUDGET_BYTES, max_wait: float = MEMORY_BUDGET_WAIT):
+        self.limit = max(0, limit)
+        self.max_wait = max(0.0, max_wait)
+        self._condition = threading.Condition()
+        self._waiters: Deque[object] = deque()
+        self._in_use = 0
+        self._peak = 0
+        self._admitted = 0
+        self._queued = 0
+        self._rejected = 0
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = None) -> MemoryReservation:
+        """
+        预留nbytes字节，预算不足时排队等待
+
+        Args:
+            nbytes: 预留的字节数
+            timeout: 最长等待时间（秒），默认使用 COS_MEMORY_BUDGET_WAIT
+
+        Returns:
+            预留记录，传输完成后调用其 release()
+
+        Raises:
+            ValueError: 等待超时（或不允许等待）时预算仍不足
+        """
+        weight = min(max(0, int(nbytes)), self.limit)
+        if weight == 0:
+            # 仍关联预算，之后可以通过 extend() 追加
+            return MemoryReservation(self if self.limit else None, 0)
+        timeout = self.max_wait if timeout is None else max(0.0, timeout)
+        wait_seconds = 0.0
+        with self._condition:
+            if self._waiters or self._in_use + weight > self.limit:
+                started = time.monotonic()
+                self._wait_for_turn(weight, started + timeout)
+                wait_seconds = time.monotonic() - started
+            self._in_use += weight
+            self._peak = max(self._peak, self._in_use)
+            self._admitted += 1
+        return MemoryReservation(self, weight, wait_seconds)
+
+    def try_acquire(self, nbytes: int) -> Optional[MemoryReservation]:
+        """
+        立即预留nbytes字节，不排队等待
+
+        用于可以退回到更省内存方式的可选用途（如并发分段下载的预取窗口），
+        预算不足或已有传输在排队时返回None，不计入拒绝次数。
+
+        Args:
+            nbytes: 预留的字节数
+
+        Returns:
+            预留记录，预算不足时返回None
+        """
+        nbytes = max(0, int(nbytes))
+        if not self.limit:
+            return MemoryReservation(None, 0)
+        with self._condition:
+            if self._waiters or self._in_use + nbytes > self.limit:
+                return None
+            self._in_use += nbytes
+            self._peak = max(self._peak, self._in_use)
+            self._admitted += 1
+        return MemoryReservation(self, nbytes)
+
+    def _wait_for_turn(self, weight: int, deadline: float) -> None:
+        # 调用方已持有锁；排到队首且剩余预算足够时返回，超时则抛出异常
+        ticket = object()
+        self._waiters.append(ticket)
+        self._queued += 1
+        try:
+            while self._waiters[0] is not ticket or self._in_use + weight > self.limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._rejected += 1
+                    raise ValueError(
+                        f"Memory budget exhausted: {weight} bytes requested while {self._in_use} of "
+                        f"{self.limit} bytes are in use; try again later or reduce concurrency"
+                    )
+                self._condition.wait(remaining)
+        finally:
+            self._waiters.remove(ticket)
+            # 队首变化后唤醒其余等待者重新检查
+            self._condition.notify_all()
+
+    def _release(self, nbytes: int) -> None:
+        with self._condition:
+            self._in_use -= nbytes
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前的预算使用情况，用于在工具输出中报告"""
+        with self._condition:
+            return {
+                'limit_bytes': self.limit,
+                'in_use_bytes': self._in_use,
+                'peak_bytes': self._peak,
+                'utilization': round(self._in_use / self.limit, 3) if self.limit else 0.0,
+                'waiting': len(self._waiters),
+                'admitted': self._admitted,
+                'queued': self._queued,
+                'rejected': self._rejected
+            }
+
+
+# 进程级共享的内存预算
+_memory_budget = MemoryBudget()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """获取进程级共享的内存预算"""
+    return _memory_budget
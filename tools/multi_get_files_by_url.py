@@ -0,0 +1,339 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .compression import DecompressingStream, get_content_encoding, get_original_size
+from .cos_url import resolve_cos_url
+from .credential_cache import validate_credentials
+from .memory_budget import MemoryReservation, get_memory_budget
+from .ranged_download import open_parallel_body
+from .retry import RetryBudget, RetryContext
+from .utils import (SNIFF_BYTES, build_blob_metadata, get_bool_parameter, get_header, get_int_parameter,
+                    get_size_parameter)
+
+
+class _ByteBudget:
+    """批量下载的总字节数上限，在读取响应体之前按Content-Length预留，读取失败时归还"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> None:
+        with self._lock:
+            if self.limit and self.used + size > self.limit:
+                raise ValueError(f"Total size limit of {self.limit} bytes reached")
+            self.used += size
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+
+class MultiGetFilesByUrlTool(Tool):
+    # 最大支持的URL数量
+    MAX_URLS = 50
+    # 默认并发下载数量
+    DEFAULT_CONCURRENCY = 4
+    # 最大并发下载数量
+    MAX_CONCURRENCY = 16
+    # 设置大小限制时每次读取的字节数
+    READ_CHUNK_SIZE = 1024 * 1024
+    # 单次调用内所有文件的请求（含对冲请求）共享的重试次数上限
+    RETRY_BUDGET = 20
+
+    def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        try:
+            # 验证工具参数中的认证信息
+            validate_credentials(self.runtime.credentials)
+
+            credentials = {
+                'region': self.runtime.credentials.get('region'),
+                'bucket': self.runtime.credentials.get('bucket'),
+                'secret_id': self.runtime.credentials.get('secret_id'),
+                'secret_key': self.runtime.credentials.get('secret_key')
+            }
+
+            urls = self._get_urls(tool_parameters)
+            concurrency = self._get_concurrency(tool_parameters)
+            max_size = get_size_parameter(tool_parameters, 'max_size_mb')
+            budget = _ByteBudget(get_size_parameter(tool_parameters, 'max_total_size_mb'))
+            retry = RetryContext(RetryBudget(self.RETRY_BUDGET))
+            hedge = get_bool_parameter(tool_parameters, 'hedge')
+
+            # 下载完成一个文件就立即返回其内容，汇总信息按输入顺序排列
+            files_info: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+            for index, file_info, blob, file_metadata in self._download_files(urls, credentials, concurrency,
+                                                                                max_size, budget, retry, hedge):
+                if blob is not None:
+                    yield self.create_blob_message(blob, file_metadata)
+                files_info[index] = file_info
+
+            success_count = sum(1 for file_info in files_info if file_info['status'] == 'success')
+            error_count = len(files_info) - success_count
+
+            # 全部成功为completed，部分失败为partial，全部失败为failed
+            if error_count == 0:
+                batch_status = "completed"
+            elif success_count > 0:
+                batch_status = "partial"
+            else:
+                batch_status = "failed"
+
+            yield self.create_json_message({
+                "status": batch_status,
+                "success_count": success_count,
+                "error_count": error_count,
+                "total_size_bytes": sum(file_info['file_size_bytes'] for file_info in files_info),
+                "retries": retry.retries,
+                "hedged_requests": retry.hedges,
+                "memory_budget": get_memory_budget().snapshot(),
+                "files": files_info
+            })
+
+            # 构建文本响应 - 英文消息
+            text_response = f"Batch download completed\nSuccess: {success_count} files\nFailed: {error_count} files\n"
+            if retry.retries or retry.hedges:
+                text_response += f"Retries: {retry.retries}, hedged requests: {retry.hedges}\n"
+
+            successful_files = [file_info for file_info in files_info if file_info['status'] == 'success']
+            failed_files = [file_info for file_info in files_info if file_info['status'] != 'success']
+
+            if successful_files:
+                text_response += "\nSuccessful files:\n"
+                for file_info in successful_files:
+                    text_response += f"- File name: {file_info['filename']}\n"
+                    text_response += f"  File size: {file_info['file_size_mb']} MB ({file_info['file_size_bytes']} bytes)\n"
+                    text_response += f"  File type: {file_info['content_type']}\n\n"
+
+            if failed_files:
+                text_response += "\nFailed files:\n"
+                for file_info in failed_files:
+                    text_response += f"- File URL: {file_info['url']}\n"
+                    text_response += f"  Error: {file_info['error_message']}\n\n"
+
+            yield self.create_text_message(text_response)
+        except Exception as e:
+            # 失败时在text中输出错误信息 - 英文消息
+            yield self.create_text_message(f"Failed to download files: {str(e)}")
+
+    def _download_files(self, urls: List[str], credentials: Dict[str, Any], concurrency: int, max_size: int,
+                        budget: _ByteBudget, retry: RetryContext,
+                        hedge: bool = False) -> Generator[Tuple[int, Dict, Optional[bytes], Optional[Dict]], None, None]:
+        """
+        按bucket和region分组并发下载，按完成顺序逐个返回结果
+
+        Args:
+            urls: 文件URL列表
+            credentials: 凭据字典
+            concurrency: 并发下载数量
+            max_size: 单个文件的最大字节数，0表示不限制
+            budget: 总字节数上限
+            retry: 所有文件共享重试预算的重试上下文
+            hedge: GET请求是否启用对冲
+
+        Returns:
+            (URL序号, 文件信息, 文件内容, blob元数据)，下载失败时文件内容和元数据为None
+        """
+        # 同一存储桶的URL共用一个客户端
+        groups: "OrderedDict[Tuple[str, str], List[Tuple[int, str, str]]]" = OrderedDict()
+        for index, url in enumerate(urls):
+            bucket, region, object_key = resolve_cos_url(url, credentials)
+            groups.setdefault((bucket, region), []).append((index, url, object_key))
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(urls))) as executor:
+            futures = {}
+            for (bucket, region), items in groups.items():
+                try:
+                    client = get_cos_client(credentials, region=region)
+                except Exception as e:
+                    for index, url, _ in items:
+                        yield index, self._build_error_info(url, f"Failed to create COS client: {str(e)}"), None, None
+                    continue
+                for index, url, object_key in items:
+                    # 每个文件单独统计重试次数
+                    file_retry = retry.child()
+                    future = executor.submit(self._fetch_file, client, bucket, object_key, max_size, budget,
+                                             file_retry, hedge, region)
+                    futures[future] = (index, url, file_retry)
+
+            try:
+                for future in as_completed(futures):
+                    index, url, file_retry = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error_info = self._build_error_info(url, str(e))
+                        error_info['retries'] = file_retry.retries
+                        yield index, error_info, None, None
+                        continue
+
+                    # 文件内容交出后释放预留的内存预算
+                    with result.pop('reservation'):
+                        yield self._build_success_result(index, url, result, file_retry)
+            finally:
+                # 提前结束时（如调用方停止读取），其余文件下载完成后释放其内存预算
+                for future in futures:
+                    future.add_done_callback(
+                        lambda f: f.exception() is None and f.result()['reservation'].release()
+                    )
+
+    def _build_success_result(self, index: int, url: str, result: Dict[str, Any],
+                              file_retry: RetryContext) -> Tuple[int, Dict, bytes, Dict]:
+        # 取出文件内容，返回后不再由future持有
+        file_content = result.pop('file_content')
+        file_metadata = build_blob_metadata(result['filename'], result['content_type'], len(file_content),
+                                            file_content[:SNIFF_BYTES])
+        file_info = {
+            'url': url,
+            'filename': file_metadata['filename'],
+            'status': 'success',
+            'content_type': file_metadata['content_type'],
+            'file_size_bytes': len(file_content),
+            'file_size_mb': round(len(file_content) / (1024 * 1024), 2),
+            'retries': file_retry.retries,
+            'memory_wait_ms': result['memory_wait_ms']
+        }
+        return index, file_info, file_content, file_metadata
+
+    def _fetch_file(self, client: Any, bucket: str, object_key: str, max_size: int,
+                    budget: _ByteBudget, retry: Optional[RetryContext] = None, hedge: bool = False,
+                    region: str = '') -> Dict[str, Any]:
+        """
+        下载单个对象，超过单文件或总字节数上限时在读取响应体之前拒绝
+
+        Args:
+            client: CosS3Client实例
+            bucket: 存储桶名称
+            object_key: 对象键
+            max_size: 单个文件的最大字节数，0表示不限制
+            budget: 总字节数上限
+            retry: 重试上下文
+            hedge: GET请求是否启用对冲
+            region: 地域，大对象并发分段下载时调优器按地域记录最佳参数
+
+        Returns:
+            包含文件名、内容类型和文件内容的字典
+        """
+        if not object_key:
+            raise ValueError("URL does not contain an object key")
+        try:
+            retry = retry or RetryContext()
+            if hedge:
+                # 落后的对冲请求返回后关闭其响应体，释放连接
+                response = retry.hedged_call(f"get_object:{bucket}", client.get_object, Bucket=bucket, Key=object_key,
+                                             cleanup=lambda late: late['Body'].get_raw_stream().close())
+            else:
+                response = retry.call(client.get_object, Bucket=bucket, Key=object_key)
+        except cos_sdk.CosServiceError as e:
+            raise ValueError(f"COS service error: {str(e)}")
+
+        # 大对象的其余部分以Range GET并发下载
+        body = open_parallel_body(client, bucket, object_key, response, region, retry) or response['Body']
+        raw_stream = body.get_raw_stream()
+        try:
+            file_size = int(get_header(response, 'Content-Length') or 0)
+            # 压缩存储的对象边读边解压，大小限制按上传时记录的原始大小检查
+            content_encoding = get_content_encoding(response)
+            if content_encoding:
+                raw_stream = DecompressingStream(raw_stream, content_encoding)
+                file_size = get_original_size(response) or file_size
+            if max_size and file_size > max_size:
+                raise ValueError(f"File size {file_size} bytes exceeds the limit of {max_size} bytes")
+            budget.reserve(file_size)
+            reserved = [file_size]
+            reservation = None
+            try:
+                # 读取响应体之前预留进程级内存预算，与其他调用中的传输共享，预算不足时排队
+                reservation = get_memory_budget().acquire(file_size)
+                file_content = self._read_body(raw_stream, max_size, budget, reservation, reserved)
+            except Exception:
+                # 失败的文件归还已预留的字节数，不占用后续文件的总字节数上限
+                budget.release(reserved[0])
+                if reservation is not None:
+                    reservation.release()
+                raise
+            # 实际内容比声明的小时归还多预留的部分
+            budget.release(reserved[0] - len(file_content))
+        finally:
+            raw_stream.close()
+
+        return {
+            'filename': os.path.basename(object_key),
+            'content_type': get_header(response, 'Content-Type') or 'application/octet-stream',
+            'file_content': file_content,
+            'reservation': reservation,
+            'memory_wait_ms': reservation.wait_ms
+        }
+
+    def _read_body(self, raw_stream: Any, max_size: int, budget: _ByteBudget, reservation: MemoryReservation,
+                   reserved: List[int]) -> bytes:
+        """
+        分块读取完整响应体，大小限制按实际读取的字节数检查
+
+        声明的大小可能小于实际内容（如缺少原始大小元数据的压缩对象按压缩后大小预留），
+        超出 reserved[0] 的部分边读边追加到总字节数上限和内存预算中，reserved[0] 随之更新。
+        """
+        buffer = bytearray()
+        while True:
+            chunk = raw_stream.read(self.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            if max_size and len(buffer) > max_size:
+                raise ValueError(f"File size exceeds the limit of {max_size} bytes")
+            if len(buffer) > reserved[0]:
+                extra = len(buffer) - reserved[0]
+                budget.reserve(extra)
+                reserved[0] += extra
+                reservation.extend(extra)
+        return bytes(buffer)
+
+    def _build_error_info(self, url: str, error_message: str) -> Dict[str, Any]:
+        return {
+            'url': url,
+            'filename': os.path.basename(url.split('?', 1)[0]),
+            'status': 'failed',
+            'content_type': None,
+            'file_size_bytes': 0,
+            'file_size_mb': 0,
+            'retries': 0,
+            'error_message': error_message
+        }
+
+    def _get_urls(self, parameters: Dict[str, Any]) -> List[str]:
+        """
+        解析file_urls参数，支持列表、JSON数组字符串以及换行或逗号分隔的字符串
+        """
+        value = parameters.get('file_urls')
+        if isinstance(value, str):
+            text = value.strip()
+            if text.startswith('['):
+                try:
+                    value = json.loads(text)
+                except ValueError:
+                    raise ValueError("Parameter file_urls is not a valid JSON array")
+            else:
+                value = text.replace(',', '\n').splitlines()
+        if not isinstance(value, (list, tuple)):
+            raise ValueError("Missing required parameter: file_urls")
+
+        urls = [str(url).strip() for url in value if url and str(url).strip()]
+        if not urls:
+            raise ValueError("Missing required parameter: file_urls")
+        if len(urls) > self.MAX_URLS:
+            raise ValueError(f"At most {self.MAX_URLS} URLs are supported, got {len(urls)}")
+        return urls
+
+    def _get_concurrency(self, parameters: Dict[str, Any]) -> int:
+        # 并发下载数量，限制在1到MAX_CONCURRENCY之间
+        concurrency = get_int_parameter(parameters, 'concurrency') or self.DEFAULT_CONCURRENCY
+        return max(1, min(concurrency, self.MAX_CONCURRENCY))
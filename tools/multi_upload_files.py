@@ -1,19 +1,30 @@
-import time
 import os
-from datetime import datetime
 from collections.abc import Generator
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from qcloud_cos import CosConfig, CosS3Client
-from qcloud_cos.cos_exception import CosServiceError
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
-from dify_plugin.file.file import File
-from .utils import get_file_type, get_file_extension
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .credential_cache import validate_credentials
+from .image_optimization import ImageOptions, resolve_image_options
+from .memory_budget import get_memory_budget
+from .retry import RetryBudget, RetryContext
+from .timing import NULL_TIMER, PhaseTimer
+from .upload_job import (build_file_url, build_upload_job, describe_file, estimate_upload_memory, execute_upload,
+                         generate_object_key, normalize_path_component, release_file_content)
+from .utils import get_bool_parameter, get_int_parameter
 
 class MultiUploadFilesTool(Tool):
-    # 最大支持的文件数量
-    MAX_FILES = 10
+    # 最大支持的文件数量，可通过环境变量调整
+    MAX_FILES = int(os.environ.get('COS_MULTI_UPLOAD_MAX_FILES', '500'))
+    # 默认并发上传数量
+    DEFAULT_CONCURRENCY = 4
+    # 最大并发上传数量
+    MAX_CONCURRENCY = 16
+    # 单次调用内所有文件的请求共享的重试次数上限（文件较多时按文件数量放宽）
+    RETRY_BUDGET = 30
     
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         try:
@@ -26,131 +37,97 @@ class MultiUploadFilesTool(Tool):
             }
             
             # 验证工具参数中的认证信息
-            self._validate_credentials(credentials)
-            
-            # 执行多文件上传操作
-            results = self._upload_files(tool_parameters, credentials)
-            
-            # 准备文件详细信息
-            files_info = []
-            files = tool_parameters.get('files', [])
-            for i, (file, result) in enumerate(zip(files, results)):
-                file_size = 0
-                file_type = 'unknown'
-                
-                # 尝试获取文件大小
-                if isinstance(file, File) and hasattr(file, 'blob'):
-                    file_size = len(file.blob)
-                elif hasattr(file, 'read'):
-                    # 保存当前文件指针位置
-                    if hasattr(file, 'tell'):
-                        current_pos = file.tell()
-                    else:
-                        current_pos = None
-                    
-                    # 读取文件内容获取大小
-                    content = file.read()
-                    file_size = len(content)
-                    
-                    # 重置文件指针
-                    if hasattr(file, 'seek') and current_pos is not None:
-                        file.seek(current_pos)
-                elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                    file_size = os.path.getsize(file)
-                    
-                # 尝试获取文件类型
-                file_type = get_file_type(file)
-                
-                # 转换文件大小为MB
-                file_size_mb = file_size / (1024 * 1024) if file_size > 0 else 0
-                
-                # 添加文件详细信息
-                files_info.append({
-                    "filename": result.get('filename', f"file_{i+1}"),
-                    "file_size_bytes": file_size,
-                    "file_size_mb": round(file_size_mb, 2),
-                    "file_type": file_type,
-                    "file_url": result['file_url'],
-                    "status": "success"
+            validate_credentials(credentials)
+            
+            # 可选的阶段计时：批量级计时器汇总所有文件，每个文件另有独立计时
+            timer = PhaseTimer(enabled=get_bool_parameter(tool_parameters, 'timings'))
+            
+            # 执行多文件上传操作，每个文件完成后立即输出其结果，汇总信息按输入顺序排列
+            file_count = len(tool_parameters.get('files') or [])
+            files_info: List[Optional[Dict[str, Any]]] = [None] * file_count
+            completed = 0
+            for index, result in self._upload_files(tool_parameters, credentials, timer):
+                # 准备文件详细信息，直接复用每个文件的上传任务记录
+                file_info = self._build_file_info(result)
+                files_info[index] = file_info
+                completed += 1
+                yield self.create_json_message({
+                    "status": "in_progress",
+                    "index": index,
+                    "completed": completed,
+                    "total": file_count,
+                    "file": file_info
                 })
+                yield self.create_text_message(self._build_progress_text(file_info, completed, file_count))
+            
+            success_count = sum(1 for file_info in files_info if file_info['status'] == 'success')
+            error_count = len(files_info) - success_count
+            
+            # 全部成功为completed，部分失败为partial，全部失败为failed
+            if error_count == 0:
+                batch_status = "completed"
+            elif success_count > 0:
+                batch_status = "partial"
+            else:
+                batch_status = "failed"
             
             # 构建新的JSON响应结构
             json_response = {
-                "status": "completed",
-                "success_count": len(results),
-                "error_count": 0,
+                "status": batch_status,
+                "success_count": success_count,
+                "error_count": error_count,
+                "retries": sum(file_info.get('retries', 0) for file_info in files_info),
+                "memory_budget": get_memory_budget().snapshot(),
                 "files": files_info
             }
             
+            if timer.enabled:
+                json_response["timings"] = timer.to_dict()
+                timer.log('multi_upload_files', status=batch_status, file_count=len(files_info))
+            
             yield self.create_json_message(json_response)
             
             # 构建文本响应
-            success_count = len(results)
-            error_count = 0
+            text_response = f"Batch upload completed\nSuccess: {success_count} files\nFailed: {error_count} files\n"
             
-            text_response = f"Batch upload completed\nSuccess: {success_count} files\nFailed: {error_count} files\n\nSuccessful files:\n"
+            successful_files = [file_info for file_info in files_info if file_info['status'] == 'success']
+            failed_files = [file_info for file_info in files_info if file_info['status'] != 'success']
             
-            for file_info in files_info:
-                text_response += f"- File name: {file_info['filename']}\n"
-                text_response += f"  File size: {file_info['file_size_mb']} MB ({file_info['file_size_bytes']} bytes)\n"
-                text_response += f"  File type: {file_info['file_type']}\n"
-                text_response += f"  File URL: {file_info['file_url']}\n\n"
+            if successful_files:
+                text_response += "\nSuccessful files:\n"
+                for file_info in successful_files:
+                    text_response += f"- File name: {file_info['filename']}\n"
+                    text_response += f"  File size: {file_info['file_size_mb']} MB ({file_info['file_size_bytes']} bytes)\n"
+                    text_response += f"  File type: {file_info['file_type']}\n"
+                    text_response += f"  File URL: {file_info['file_url']}\n"
+                    if file_info.get('deduplicated'):
+                        text_response += "  Identical content already exists, upload skipped\n"
+                    if file_info.get('content_encoding'):
+                        text_response += (f"  Compression: {file_info['content_encoding']} "
+                                          f"({file_info['compressed_size_bytes']} bytes stored)\n")
+                    image_report = file_info.get('image_optimization')
+                    if image_report and image_report['status'] == 'optimized':
+                        text_response += (f"  Image optimization: {image_report['original_size_bytes']} -> "
+                                          f"{image_report['optimized_size_bytes']} bytes "
+                                          f"(saved {image_report['saved_percent']}%)\n")
+                    text_response += "\n"
+            
+            if failed_files:
+                text_response += "\nFailed files:\n"
+                for file_info in failed_files:
+                    text_response += f"- File name: {file_info['filename']}\n"
+                    text_response += f"  File size: {file_info['file_size_mb']} MB ({file_info['file_size_bytes']} bytes)\n"
+                    text_response += f"  File type: {file_info['file_type']}\n"
+                    text_response += f"  Error: {file_info['error_message']}\n\n"
             
             yield self.create_text_message(text_response)
         except Exception as e:
             # 构建错误响应
             error_message = str(e)
             
-            # 尝试获取文件信息，即使上传失败
-            files_info = []
-            files = tool_parameters.get('files', [])
-            
-            for i, file in enumerate(files):
-                file_size = 0
-                file_type = 'unknown'
-                
-                # 尝试获取文件大小
-                if isinstance(file, File) and hasattr(file, 'blob'):
-                    file_size = len(file.blob)
-                elif hasattr(file, 'read'):
-                    # 保存当前文件指针位置
-                    if hasattr(file, 'tell'):
-                        current_pos = file.tell()
-                    else:
-                        current_pos = None
-                    
-                    # 读取文件内容获取大小
-                    content = file.read()
-                    file_size = len(content)
-                    
-                    # 重置文件指针
-                    if hasattr(file, 'seek') and current_pos is not None:
-                        file.seek(current_pos)
-                elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                    file_size = os.path.getsize(file)
-                    
-                # 尝试获取文件类型
-                file_type = get_file_type(file)
-                
-                # 转换文件大小为MB
-                file_size_mb = file_size / (1024 * 1024) if file_size > 0 else 0
-                
-                # 获取原始文件名
-                filename = "unknown"
-                if isinstance(file, File):
-                    filename = file.filename
-                elif isinstance(file, (str, bytes, os.PathLike)):
-                    filename = os.path.basename(file)
-                
-                # 添加文件详细信息（标记为失败）
-                files_info.append({
-                    "filename": filename,
-                    "file_size_bytes": file_size,
-                    "file_size_mb": round(file_size_mb, 2),
-                    "file_type": file_type,
-                    "file_url": "",
-                    "status": "failed"
-                })
+            # 尝试获取文件信息，即使上传失败（不读取文件内容）
+            files = tool_parameters.get('files', []) or []
+            files_info = [describe_file(file) for file in files]
             
             # 构建错误JSON响应
             json_response = {
@@ -177,14 +154,48 @@ class MultiUploadFilesTool(Tool):
             # 抛出异常以保持原有行为
             raise ValueError(f"Failed to upload files: {error_message}")
     
-    def _validate_credentials(self, credentials: dict[str, Any]) -> None:
-        # 验证必填字段是否存在
-        required_fields = ['region', 'bucket', 'secret_id', 'secret_key']
-        for field in required_fields:
-            if field not in credentials or not credentials[field]:
-                raise ValueError(f"Missing required credential: {field}")
+    def _build_progress_text(self, file_info: Dict[str, Any], completed: int, total: int) -> str:
+        # 单个文件完成时的进度消息 - 英文消息
+        if file_info['status'] == 'success':
+            return f"[{completed}/{total}] Uploaded {file_info['filename']}: {file_info['file_url']}\n"
+        return f"[{completed}/{total}] Failed {file_info['filename']}: {file_info.get('error_message', '')}\n"
+    
+    def _build_file_info(self, result: Dict) -> Dict:
+        """
+        根据单个文件的上传结果构建JSON响应中的文件信息
+        
+        Args:
+            result: _upload_single_file 返回的结果
+            
+        Returns:
+            文件信息字典
+        """
+        job = result.get('job')
+        if result['status'] == 'success':
+            file_info = job.to_file_info(result['file_url'], 'success')
+            file_info["deduplicated"] = result['deduplicated']
+            file_info["retries"] = result['retries']
+            file_info["memory_wait_ms"] = result['memory_wait_ms']
+            if result['content_encoding']:
+                file_info["content_encoding"] = result['content_encoding']
+                file_info["compressed_size_bytes"] = result['stored_size']
+            if result['timer'].enabled:
+                file_info["timings"] = result['timer'].to_dict()
+            return file_info
+        if job is not None:
+            file_info = job.to_file_info('', 'failed', result.get('error', ''))
+        else:
+            # 上传任务未能构建（如获取文件内容失败）
+            file_info = describe_file(result.get('file'))
+            file_info["error_message"] = result.get('error', '')
+        file_info["retries"] = result.get('retries', 0)
+        return file_info
     
-    def _upload_files(self, parameters: dict[str, Any], credentials: dict[str, Any]) -> List[Dict]:
+    def _upload_files(self, parameters: dict[str, Any], credentials: dict[str, Any],
+                      timer: PhaseTimer = NULL_TIMER) -> Iterator[Tuple[int, Dict]]:
+        """
+        并发上传所有文件，按完成顺序逐个返回 (文件序号, 上传结果)
+        """
         try:
             # 获取文件数组、目录和其他参数
             files = parameters.get('files', [])
@@ -203,11 +214,8 @@ class MultiUploadFilesTool(Tool):
             if len(files) > self.MAX_FILES:
                 raise ValueError(f"Maximum number of files allowed is {self.MAX_FILES}")
             
-            # 对directory进行前后去空格处理
-            directory = directory.strip()
-            # 验证directory规则：禁止以空格、/或\开头
-            if directory.startswith(' ') or directory.startswith('/') or directory.startswith('\\'):
-                raise ValueError("Directory cannot start with space, / or \\ ")
+            # 对directory进行前后去空格处理，并验证其不以空格、/或\开头
+            directory = normalize_path_component(directory, 'Directory')
             
             # 验证认证参数
             required_auth_fields = ['region', 'bucket', 'secret_id', 'secret_key']
@@ -215,188 +223,129 @@ class MultiUploadFilesTool(Tool):
                 if field not in credentials or not credentials[field]:
                     raise ValueError(f"Missing required authentication parameter: {field}")
             
-            # 创建腾讯云COS客户端
-            config = CosConfig(
-                Region=credentials['region'],
-                SecretId=credentials['secret_id'],
-                SecretKey=credentials['secret_key']
-            )
-            client = CosS3Client(config)
-            
-            # 上传每个文件
-            results = []
-            for i, file in enumerate(files):
-                try:
-                    # 生成文件名
-                    source_file_name = "unknown"
-                    
-                    # 尝试从文件对象获取原始文件名
-                    if isinstance(file, File):
-                        source_file_name = file.filename
-                    elif isinstance(file, (str, bytes, os.PathLike)):
-                        source_file_name = os.path.basename(file)
-                    
-                    # 使用上传文件的原始文件名
-                    # 如果有多个文件，添加索引以避免文件名冲突
-                    base_name = "upload"
-                    if len(files) > 1:
-                        base_name = f"{base_name}_{i+1}"
-                    
-                    extension = ".dat"  # 默认扩展名
-                    
-                    # 尝试从文件对象获取原始文件名和扩展名 - 加强版
-                    if isinstance(file, File) and file.filename:
-                        original_filename = file.filename
-                        file_base_name, file_extension = os.path.splitext(original_filename)
-                        if file_extension:
-                            extension = file_extension
-                            base_name = file_base_name
-                    elif isinstance(file, (str, bytes, os.PathLike)):
-                        original_filename = os.path.basename(file)
-                        source_file_name = original_filename
-                        file_base_name, file_extension = os.path.splitext(original_filename)
-                        if file_extension:
-                            extension = file_extension
-                            base_name = file_base_name
-                    
-                    # 3. 尝试从文件内容类型推断扩展名
-                    if hasattr(file, 'content_type') and file.content_type:
-                        extension = get_file_extension(file)
-                    
-                    # 4. 额外的检查：确保扩展名是小写的，并且包含点号
-                    if extension and not extension.startswith('.'):
-                        extension = '.' + extension
-                    extension = extension.lower()
-                    
-                    # 根据filename_mode处理文件名
-                    if filename_mode == 'filename_timestamp':
-                        # 使用年月日时分秒毫秒格式的时间戳
-                        timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]  # 去掉最后三位得到毫秒
-                        current_filename = f"{base_name}_{timestamp}{extension}"
-                    else:
-                        # 使用原始文件名作为默认文件名
-                        current_filename = f"{base_name}{extension}"
-                    
-                    # 根据目录模式生成完整的文件路径
-                    object_key = self._generate_object_key(directory, directory_mode, current_filename)
-                    
-                    # 上传文件 - 统一处理文件对象或文件路径
-                    try:
-                        # 处理dify_plugin的File对象
-                        if isinstance(file, File):
-                            # 获取文件内容
-                            file_content = file.blob
-                            # 获取文件内容类型
-                            content_type = getattr(file, 'content_type', None)
-                            if not content_type:
-                                # 尝试从文件类型推断content_type
-                                file_type = get_file_type(file)
-                                if file_type == 'png':
-                                    content_type = 'image/png'
-                                elif file_type == 'jpg' or file_type == 'jpeg':
-                                    content_type = 'image/jpeg'
-                                elif file_type == 'gif':
-                                    content_type = 'image/gif'
-                                elif file_type == 'pdf':
-                                    content_type = 'application/pdf'
-                                elif file_type == 'doc':
-                                    content_type = 'application/msword'
-                                elif file_type == 'docx':
-                                    content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                                elif file_type == 'xls':
-                                    content_type = 'application/vnd.ms-excel'
-                                elif file_type == 'xlsx':
-                                    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                                elif file_type == 'txt':
-                                    content_type = 'text/plain'
-                                else:
-                                    content_type = 'application/octet-stream'
-                            # 上传文件内容
-                            response = client.put_object(
-                                Bucket=credentials['bucket'],
-                                Body=file_content,
-                                Key=object_key,
-                                ContentType=content_type
-                            )
-                        # 尝试作为普通文件对象处理
-                        elif hasattr(file, 'read'):
-                            # 重置文件指针到开头
-                            if hasattr(file, 'seek'):
-                                file.seek(0)
-                            # 获取文件内容类型
-                            content_type = getattr(file, 'content_type', None)
-                            if not content_type:
-                                # 尝试从文件类型推断content_type
-                                file_type = get_file_type(file)
-                                if file_type == 'png':
-                                    content_type = 'image/png'
-                                elif file_type == 'jpg' or file_type == 'jpeg':
-                                    content_type = 'image/jpeg'
-                                elif file_type == 'gif':
-                                    content_type = 'image/gif'
-                                elif file_type == 'pdf':
-                                    content_type = 'application/pdf'
-                                elif file_type == 'doc':
-                                    content_type = 'application/msword'
-                                elif file_type == 'docx':
-                                    content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                                elif file_type == 'xls':
-                                    content_type = 'application/vnd.ms-excel'
-                                elif file_type == 'xlsx':
-                                    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                                elif file_type == 'txt':
-                                    content_type = 'text/plain'
-                                else:
-                                    content_type = 'application/octet-stream'
-                            # 上传文件流
-                            response = client.put_object(
-                                Bucket=credentials['bucket'],
-                                Body=file,
-                                Key=object_key,
-                                ContentType=content_type
-                            )
-                        # 尝试作为文件路径处理
-                        elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                            # 上传本地文件
-                            response = client.upload_file(
-                                Bucket=credentials['bucket'],
-                                LocalFilePath=str(file),
-                                Key=object_key
-                            )
-                        else:
-                            raise ValueError("Unsupported file type")
-                        
-                        # 构建文件URL
-                        # 腾讯云COS的URL格式: https://{bucket}.cos.{region}.myqcloud.com/{object_key}
-                        file_url = f"https://{credentials['bucket']}.cos.{credentials['region']}.myqcloud.com/{object_key}"
-                        
-                        # 构建上传结果
-                        upload_result = {
-                            'filename': current_filename,
-                            'source_filename': source_file_name,
-                            'file_url': file_url,
-                            'object_key': object_key,
-                            'bucket': credentials['bucket'],
-                            'region': credentials['region']
-                        }
-                        
-                        # 添加到结果列表
-                        results.append(upload_result)
-                        
-                    except CosServiceError as e:
-                        error_message = f"Failed to upload file {i+1}: {str(e)}"
-                        raise ValueError(error_message)
-                    
-                except Exception as e:
-                    error_message = f"Error processing file {i+1}: {str(e)}"
-                    raise ValueError(error_message)
-            
-            return results
+            # 从进程级注册表获取腾讯云COS客户端（复用长连接）
+            with timer.phase('client'):
+                client = get_cos_client(credentials)
+            
+            # 使用有界线程池并发上传，每个文件独立记录成功或失败结果
+            concurrency = self._resolve_concurrency(get_int_parameter(parameters, 'concurrency'), len(files))
+            dedup = get_bool_parameter(parameters, 'dedup')
+            compression = parameters.get('compression')
+            image_options = resolve_image_options(parameters.get('image_optimization'),
+                                                  parameters.get('image_max_dimension'),
+                                                  parameters.get('image_quality'))
+            retry = RetryContext(RetryBudget(max(self.RETRY_BUDGET, len(files))))
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {
+                    executor.submit(
+                        self._upload_single_file, client, file, i, len(files),
+                        directory, directory_mode, filename_mode, credentials, dedup, compression, retry, timer,
+                        image_options
+                    ): i
+                    for i, file in enumerate(files)
+                }
+                for future in as_completed(futures):
+                    yield futures.pop(future), future.result()
             
         except Exception as e:
             error_message = f"Failed to upload files: {str(e)}"
             raise ValueError(error_message)
     
+    def _resolve_concurrency(self, concurrency: Optional[int], file_count: int) -> int:
+        """
+        解析并发数参数，限制在 [1, MAX_CONCURRENCY] 且不超过文件数量
+        
+        Args:
+            concurrency: 用户传入的并发数，未设置时为None
+            file_count: 文件数量
+            
+        Returns:
+            实际使用的并发数
+        """
+        if concurrency is None:
+            concurrency = self.DEFAULT_CONCURRENCY
+        concurrency = max(1, min(concurrency, self.MAX_CONCURRENCY))
+        return max(1, min(concurrency, file_count))
+    
+    def _upload_single_file(self, client: Any, file: Any, index: int, file_count: int, directory: str,
+                            directory_mode: str, filename_mode: str, credentials: dict[str, Any],
+                            dedup: bool = False, compression: Optional[str] = None,
+                            retry: Optional[RetryContext] = None, batch_timer: PhaseTimer = NULL_TIMER,
+                            image_options: Optional[ImageOptions] = None) -> Dict:
+        """
+        上传单个文件，供线程池并发调用；失败时返回失败结果而不是抛出异常
+        
+        Returns:
+            单个文件的上传结果字典
+        """
+        job = None
+        # 单个文件的计时器，与批量计时器同时启用
+        timer = PhaseTimer(enabled=batch_timer.enabled)
+        # 单个文件的重试上下文，与其他文件共享重试预算；失败时也能报告重试次数
+        file_retry = (retry or RetryContext()).child()
+        reservation = None
+        try:
+            # 读取文件内容之前预留进程级内存预算，与其他调用中的传输共享；等待超时时该文件失败
+            with timer.phase('memory_wait'):
+                reservation = get_memory_budget().acquire(estimate_upload_memory(file, compression, image_options))
+            
+            # 如果有多个文件，无法获取原始文件名时添加索引以避免文件名冲突
+            default_base_name = f"upload_{index+1}" if file_count > 1 else "upload"
+            
+            # 一次性解析文件名、扩展名、内容类型、大小和对象键
+            job = build_upload_job(
+                file, directory, directory_mode,
+                filename_mode=filename_mode,
+                default_base_name=default_base_name,
+                index=index,
+                timer=timer,
+                image_options=image_options
+            )
+            # 元数据中没有大小的File在构建任务时才下载，按实际大小补足预留
+            with timer.phase('memory_wait'):
+                reservation.extend(estimate_upload_memory(file, compression, image_options) - reservation.nbytes)
+            
+            # 上传文件 - 统一处理文件对象或文件路径
+            try:
+                upload_result = execute_upload(client, credentials['bucket'], job, dedup=dedup,
+                                               compression=compression, retry=file_retry, timer=timer,
+                                               region=credentials['region'])
+            except cos_sdk.CosServiceError as e:
+                raise ValueError(f"Failed to upload file {index+1}: {str(e)}")
+            
+            return {
+                'job': job,
+                'filename': job.filename,
+                'source_filename': job.source_filename,
+                'file_url': build_file_url(credentials['bucket'], credentials['region'], job.object_key),
+                'object_key': job.object_key,
+                'bucket': credentials['bucket'],
+                'region': credentials['region'],
+                'upload_mode': upload_result['upload_mode'],
+                'deduplicated': upload_result['deduplicated'],
+                'content_encoding': upload_result['content_encoding'],
+                'stored_size': upload_result['stored_size'],
+                'retries': file_retry.retries,
+                'memory_wait_ms': reservation.wait_ms,
+                'status': 'success',
+                'timer': timer
+            }
+        except Exception as e:
+            return {
+                'job': job,
+                'file': file,
+                'file_url': '',
+                'status': 'failed',
+                'retries': file_retry.retries,
+                'error': f"Error processing file {index+1}: {str(e)}"
+            }
+        finally:
+            # 上传结束后释放文件内容和预留的内存预算，内存占用只与并发数有关，与文件数量无关
+            release_file_content(file, job)
+            if reservation is not None:
+                reservation.release()
+            batch_timer.merge(timer)
+    
     def _generate_object_key(self, directory: str, directory_mode: str, filename: str) -> str:
         """
         根据目录模式生成完整的对象键
@@ -409,20 +358,4 @@ class MultiUploadFilesTool(Tool):
         Returns:
             完整的对象键
         """
-        # 对directory进行前后去空格处理
-        directory = directory.strip()
-        
-        # 根据目录模式生成路径
-        if directory_mode == 'yyyy_mm_dd_hierarchy':
-            # 年/月/日 层级目录
-            date_path = datetime.now().strftime('%Y/%m/%d')
-            object_key = f"{directory}/{date_path}/{filename}"
-        elif directory_mode == 'yyyy_mm_dd_combined':
-            # 年月日 一体目录
-            date_path = datetime.now().strftime('%Y%m%d')
-            object_key = f"{directory}/{date_path}/{filename}"
-        else:
-            # 默认：无子目录
-            object_key = f"{directory}/{filename}"
-        
-        return object_key
\ No newline at end of file
+        return generate_object_key(directory, directory_mode, filename)
@@ -0,0 +1,215 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from .retry import RetryContext
+
+# 超过该大小（字节）时切换为分块上传
+DEFAULT_MULTIPART_THRESHOLD = 20 * 1024 * 1024
+
+# 默认分块大小（字节）
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+# COS要求除最后一块外分块不得小于1MB，且分块数量不超过10000
+MIN_PART_SIZE = 1024 * 1024
+MAX_PART_COUNT = 10000
+
+# 默认并发上传的分块数量
+DEFAULT_PART_CONCURRENCY = 4
+
+# 简单复制（PUT Object - Copy）支持的最大对象大小，超过时使用分块复制
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * 1024 * 1024
+
+# 分块复制的默认分块大小（字节），数据不经过插件，分块越大请求越少
+DEFAULT_COPY_PART_SIZE = 256 * 1024 * 1024
+
+
+def resolve_part_size(total_size: int, part_size: int) -> int:
+    """
+    根据文件大小修正分块大小，保证不小于1MB且分块数量不超过上限
+
+    Args:
+        total_size: 文件总大小（字节）
+        part_size: 期望的分块大小（字节）
+
+    Returns:
+        实际使用的分块大小（字节）
+    """
+    part_size = max(MIN_PART_SIZE, part_size)
+    # 分块数量超限时按上限反推分块大小
+    if (total_size + part_size - 1) // part_size > MAX_PART_COUNT:
+        part_size = (total_size + MAX_PART_COUNT - 1) // MAX_PART_COUNT
+    return part_size
+
+
+def multipart_upload(client: Any, bucket: str, key: str, data: bytes, content_type: str,
+                     part_size: int = DEFAULT_PART_SIZE, concurrency: int = DEFAULT_PART_CONCURRENCY,
+                     retry: Optional[RetryContext] = None, **kwargs) -> Dict[str, Any]:
+    """
+    以分块方式并发上传内存中的文件内容（initiate / upload_part / complete）
+
+    分块失败时按共享的重试策略仅重试该分块；任何异常（包括调用被中断）都会中止分块上传，
+    避免在COS上残留未完成的分块。
+
+    Args:
+        client: CosS3Client实例
+        bucket: 存储桶名称
+        key: 对象键
+        data: 文件内容
+        content_type: 文件内容类型
+        part_size: 分块大小（字节）
+        concurrency: 并发上传的分块数量
+        retry: 重试上下文，默认使用不限预算的新上下文
+        kwargs: 透传给create_multipart_upload的请求头参数
+
+    Returns:
+        包含ETag、分块数量、分块大小和重试次数的结果字典
+    """
+    retry = (retry or RetryContext()).child()
+    total_size = len(data)
+    part_size = resolve_part_size(total_size, part_size)
+    part_ranges = [(number, offset, min(offset + part_size, total_size))
+                   for number, offset in enumerate(range(0, total_size, part_size), start=1)]
+
+    # 初始化和完成请求不是幂等的，只在限流时重试
+    response = retry.call(client.create_multipart_upload, Bucket=bucket, Key=key, ContentType=content_type,
+                          idempotent=False, **kwargs)
+    upload_id = response['UploadId']
+
+    try:
+        # 使用memoryview切片，避免提前复制整个文件内容
+        view = memoryview(data)
+        parts: List[Dict[str, Any]] = []
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(part_ranges))))
+        try:
+            futures = [
+                executor.submit(_upload_part, client, bucket, key, upload_id, number, view[start:end], retry)
+                for number, start, end in part_ranges
+            ]
+            for future in as_completed(futures):
+                parts.append(future.result())
+        finally:
+            # 任一分块最终失败时取消尚未开始的分块
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        # 分块需按编号升序提交
+        parts.sort(key=lambda part: part['PartNumber'])
+        result = _complete(client, bucket, key, upload_id, parts, retry)
+    except BaseException:
+        _abort_quietly(client, bucket, key, upload_id)
+        raise
+
+    return {
+        'etag': result.get('ETag', ''),
+        'part_count': len(part_ranges),
+        'part_size': part_size,
+        'retries': retry.retries
+    }
+
+
+def multipart_copy(client: Any, bucket: str, key: str, copy_source: Dict[str, str], total_size: int,
+                   part_size: int = DEFAULT_COPY_PART_SIZE, concurrency: int = DEFAULT_PART_CONCURRENCY,
+                   retry: Optional[RetryContext] = None, **kwargs) -> Dict[str, Any]:
+    """
+    以分块方式在服务端复制对象（initiate / upload_part_copy / complete）
+
+    每个分块通过 x-cos-copy-source-range 指定源对象的字节范围，数据不经过插件。
+    任何异常都会中止分块上传。
+
+    Args:
+        client: CosS3Client实例
+        bucket: 目标存储桶名称
+        key: 目标对象键
+        copy_source: 源对象 {'Bucket', 'Key', 'Region'}
+        total_size: 源对象大小（字节）
+        part_size: 分块大小（字节）
+        concurrency: 并发复制的分块数量
+        retry: 重试上下文，默认使用不限预算的新上下文
+        kwargs: 透传给create_multipart_upload的请求头参数（如ContentType、Metadata）
+
+    Returns:
+        包含ETag、分块数量、分块大小和重试次数的结果字典
+    """
+    retry = (retry or RetryContext()).child()
+    part_size = resolve_part_size(total_size, part_size)
+    part_ranges = [(number, offset, min(offset + part_size, total_size) - 1)
+                   for number, offset in enumerate(range(0, total_size, part_size), start=1)]
+
+    response = retry.call(client.create_multipart_upload, Bucket=bucket, Key=key, idempotent=False, **kwargs)
+    upload_id = response['UploadId']
+
+    try:
+        parts: List[Dict[str, Any]] = []
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(part_ranges))))
+        try:
+            futures = [
+                executor.submit(_copy_part, client, bucket, key, upload_id, number, copy_source,
+                                f"bytes={first}-{last}", retry)
+                for number, first, last in part_ranges
+            ]
+            for future in as_completed(futures):
+                parts.append(future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        parts.sort(key=lambda part: part['PartNumber'])
+        result = _complete(client, bucket, key, upload_id, parts, retry)
+    except BaseException:
+        _abort_quietly(client, bucket, key, upload_id)
+        raise
+
+    return {
+        'etag': result.get('ETag', ''),
+        'part_count': len(part_ranges),
+        'part_size': part_size,
+        'retries': retry.retries
+    }
+
+
+def _copy_part(client: Any, bucket: str, key: str, upload_id: str, part_number: int,
+               copy_source: Dict[str, str], copy_range: str, retry: RetryContext) -> Dict[str, Any]:
+    # 单个分块独立重试，分块复制请求是幂等的
+    response = retry.call(
+        client.upload_part_copy,
+        Bucket=bucket,
+        Key=key,
+        PartNumber=part_number,
+        UploadId=upload_id,
+        CopySource=copy_source,
+        CopySourceRange=copy_range
+    )
+    return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+
+def _upload_part(client: Any, bucket: str, key: str, upload_id: str, part_number: int,
+                 chunk: memoryview, retry: RetryContext) -> Dict[str, Any]:
+    # 单个分块独立重试，分块上传请求是幂等的
+    response = retry.call(
+        client.upload_part,
+        Bucket=bucket,
+        Key=key,
+        Body=bytes(chunk),
+        PartNumber=part_number,
+        UploadId=upload_id
+    )
+    return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+
+def _complete(client: Any, bucket: str, key: str, upload_id: str, parts: List[Dict[str, Any]],
+              retry: RetryContext) -> Dict[str, Any]:
+    # 提交全部分块的编号和ETag，完成请求不是幂等的，只在限流时重试
+    return retry.call(
+        client.complete_multipart_upload,
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={'Part': parts},
+        idempotent=False
+    )
+
+
+def _abort_quietly(client: Any, bucket: str, key: str, upload_id: str) -> None:
+    # 中止分块上传，清理已上传的分块；中止本身失败时不覆盖原始异常
+    try:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except Exception:
+        pass
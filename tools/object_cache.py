@@ -0,0 +1,235 @@
+import atexit
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 内存缓存的字节预算
+CACHE_MEMORY_BYTES = int(os.environ.get('COS_CACHE_MEMORY_BYTES', str(64 * 1024 * 1024)))
+
+# 磁盘缓存的字节预算，0表示不使用磁盘缓存
+CACHE_DISK_BYTES = int(os.environ.get('COS_CACHE_DISK_BYTES', str(512 * 1024 * 1024)))
+
+# 单个可缓存对象的最大字节数
+CACHE_MAX_OBJECT_BYTES = int(os.environ.get('COS_CACHE_MAX_OBJECT_BYTES', str(16 * 1024 * 1024)))
+
+# 缓存条目的存活时间（秒），超过后淘汰
+CACHE_TTL = float(os.environ.get('COS_CACHE_TTL', '3600'))
+
+# 磁盘缓存目录，每个进程使用独立的子目录
+CACHE_DIR = os.environ.get('COS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'tencent_cos_cache')
+
+CacheKey = Tuple[str, str, str]
+
+
+class CacheEntry:
+    """缓存的对象内容及用于条件请求的校验信息"""
+
+    __slots__ = ('etag', 'last_modified', 'content_type', 'size', 'stored_at', 'data', 'path')
+
+    def __init__(self, etag: str, last_modified: Optional[str], content_type: str, size: int,
+                 stored_at: float, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.size = size
+        self.stored_at = stored_at
+        self.data = data
+        self.path = path
+
+
+class ObjectCache:
+    """
+    以 (bucket, region, object_key) 为键的两级对象缓存
+
+    内存层按LRU淘汰并降级到磁盘层，磁盘层按LRU删除；两层各有字节预算，
+    超过TTL的条目直接淘汰。命中后由调用方发起条件GET重新校验。
+    """
+
+    def __init__(self, memory_bytes: int = CACHE_MEMORY_BYTES, disk_bytes: int = CACHE_DISK_BYTES,
+                 max_object_bytes: int = CACHE_MAX_OBJECT_BYTES, ttl: float = CACHE_TTL,
+                 cache_dir: str = CACHE_DIR):
+        self._memory_budget = memory_bytes
+        self._disk_budget = disk_bytes
+        self._max_object_bytes = max_object_bytes
+        self._ttl = ttl
+        self._cache_dir = os.path.join(cache_dir, str(os.getpid()))
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._disk: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        atexit.register(self.clear)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        查找缓存条目，磁盘层命中时提升到内存层
+
+        Returns:
+            未过期的缓存条目快照（内容已加载到内存），不存在时返回None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                entry = self._disk.pop(key, None)
+                if entry is not None:
+                    self._disk_bytes -= entry.size
+                    entry.data = self._read_file(entry.path)
+                    self._remove_file(entry.path)
+                    entry.path = None
+                    if entry.data is None:
+                        return None
+                    self._store_in_memory(key, entry)
+
+            if entry is not None and time.monotonic() - entry.stored_at > self._ttl:
+                self._memory.pop(key, None)
+                self._memory_bytes -= entry.size
+                self._evictions += 1
+                return None
+            if entry is None:
+                return None
+            # 返回快照，避免条目随后被降级到磁盘时内容被置空
+            return CacheEntry(entry.etag, entry.last_modified, entry.content_type, entry.size,
+                              entry.stored_at, data=entry.data)
+
+    def put(self, key: CacheKey, data: bytes, etag: str, last_modified: Optional[str],
+            content_type: str) -> bool:
+        """
+        写入缓存；超过单对象大小上限或缺少ETag时不缓存
+
+        Returns:
+            是否已缓存
+        """
+        if not etag or len(data) > self._max_object_bytes or len(data) > self._memory_budget:
+            return False
+        entry = CacheEntry(etag, last_modified, content_type, len(data), time.monotonic(), data=data)
+        with self._lock:
+            self._discard(key)
+            self._store_in_memory(key, entry)
+        return True
+
+    def touch(self, key: CacheKey) -> None:
+        """条件请求返回304后刷新条目的存活时间"""
+        with self._lock:
+            entry = self._memory.get(key) or self._disk.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+
+    def record(self, hit: bool) -> None:
+        """记录一次命中（304）或未命中"""
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def invalidate(self, key: CacheKey) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """清空缓存并删除磁盘文件"""
+        with self._lock:
+            self._memory.clear()
+            self._disk.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+            shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中率和各层占用情况"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / total, 4) if total else 0.0,
+                'evictions': self._evictions,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes
+            }
+
+    def _store_in_memory(self, key: CacheKey, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        # 内存超出预算时将最久未使用的条目降级到磁盘
+        while self._memory_bytes > self._memory_budget and self._memory:
+            old_key, old_entry = self._memory.popitem(last=False)
+            self._memory_bytes -= old_entry.size
+            self._demote_to_disk(old_key, old_entry)
+
+    def _demote_to_disk(self, key: CacheKey, entry: CacheEntry) -> None:
+        if entry.size > self._disk_budget:
+            self._evictions += 1
+            return
+        path = os.path.join(self._cache_dir, hashlib.sha1('\0'.join(key).encode('utf-8')).hexdigest())
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(entry.data)
+        except OSError:
+            self._evictions += 1
+            return
+        entry.data = None
+        entry.path = path
+        self._disk[key] = entry
+        self._disk_bytes += entry.size
+        while self._disk_bytes > self._disk_budget and self._disk:
+            _, old_entry = self._disk.popitem(last=False)
+            self._disk_bytes -= old_entry.size
+            self._remove_file(old_entry.path)
+            self._evictions += 1
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry.size
+            self._remove_file(entry.path)
+
+    def _read_file(self, path: Optional[str]) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except (OSError, TypeError):
+            return None
+
+    def _remove_file(self, path: Optional[str]) -> None:
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class CachedBody:
+    """以与COS响应体相同的接口提供缓存内容"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    def get_raw_stream(self) -> io.BytesIO:
+        return self._stream
+
+
+# 进程级共享的对象缓存
+_object_cache = ObjectCache()
+
+
+def get_object_cache() -> ObjectCache:
+    """返回进程级共享的对象缓存"""
+    return _object_cache
@@ -0,0 +1,319 @@
+"""
+对象列举与本地前缀索引
+
+ListPage 是一页列举结果，直接请求COS（list_cos_page）和从本地索引分页（paginate）得到的结构
+和续列标记（marker）语义一致，两者的标记可以互换使用。
+
+前缀索引按 (存储桶, 地域, 前缀) 保存该前缀下所有对象的键、大小、ETag和修改时间：
+- 首次使用时完整扫描一次前缀
+- 之后每次使用只从最后一个键之后续列（日期分区的对象键按时间递增，新对象通常排在末尾）
+- 本插件上传、复制和删除对象时直接更新索引
+- 超过TTL后重新完整扫描，以发现其他客户端在前缀中间写入或删除的对象
+索引保存在进程内存中，所有索引合计的键数量有上限，超过时按最近最少使用淘汰。
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .retry import RetryContext
+
+# 索引完整扫描后的有效期（秒），超过后重新完整扫描
+LIST_INDEX_TTL = float(os.environ.get('COS_LIST_INDEX_TTL', '300'))
+
+# 所有索引合计的最大键数量；单个前缀超过该数量时不建立索引
+LIST_INDEX_MAX_KEYS = int(os.environ.get('COS_LIST_INDEX_MAX_KEYS', '100000'))
+
+# 单次GET Bucket请求返回的最大条目数（COS上限）
+MAX_LIST_KEYS = 1000
+
+IndexKey = Tuple[str, str, str]
+
+
+class ListPage(NamedTuple):
+    # 对象列表，每项包含 key、size、etag、last_modified
+    objects: List[Dict[str, Any]]
+    # delimiter分组得到的公共前缀（“目录”）
+    common_prefixes: List[str]
+    is_truncated: bool
+    # 续列标记，is_truncated为True时作为下一页的marker
+    next_marker: str
+
+
+def list_cos_page(client: Any, bucket: str, prefix: str = '', delimiter: str = '', marker: str = '',
+                  max_keys: int = MAX_LIST_KEYS, retry: Optional[RetryContext] = None) -> ListPage:
+    """
+    向COS请求一页列举结果
+
+    Args:
+        client: CosS3Client实例
+        bucket: 存储桶名称
+        prefix: 对象键前缀
+        delimiter: 分隔符，设置后只列出下一级，更深的对象合并为公共前缀
+        marker: 从该标记之后开始列出
+        max_keys: 本页最多返回的条目数（对象和公共前缀合计）
+        retry: 重试上下文
+
+    Returns:
+        一页列举结果
+    """
+    response = (retry or RetryContext()).call(client.list_objects, Bucket=bucket, Prefix=prefix,
+                                              Delimiter=delimiter, Marker=marker, MaxKeys=max_keys)
+    objects = [
+        {
+            'key': item['Key'],
+            'size': int(item.get('Size') or 0),
+            'etag': (item.get('ETag') or '').strip('"'),
+            'last_modified': item.get('LastModified') or ''
+        }
+        for item in response.get('Contents') or []
+    ]
+    common_prefixes = [item['Prefix'] for item in response.get('CommonPrefixes') or []]
+    is_truncated = str(response.get('IsTruncated', 'false')).lower() == 'true'
+    next_marker = ''
+    if is_truncated:
+        # 未返回NextMarker时以本页最后一个条目作为续列标记
+        candidates = [obj['key'] for obj in objects[-1:]] + common_prefixes[-1:]
+        next_marker = response.get('NextMarker') or (max(candidates) if candidates else marker)
+    return ListPage(objects, common_prefixes, is_truncated, next_marker)
+
+
+def paginate(keys: List[str], entries: Dict[str, Tuple[int, str, str]], prefix: str = '', delimiter: str = '',
+             marker: str = '', max_keys: int = MAX_LIST_KEYS) -> ListPage:
+    """
+    从已排序的对象键中按GET Bucket的语义取出一页
+
+    Args:
+        keys: 已排序的对象键
+        entries: 对象键 -> (大小, ETag, 修改时间)
+        prefix: 对象键前缀
+        delimiter: 分隔符
+        marker: 从该标记之后开始列出；标记为公共前缀时跳过该前缀下的所有对象
+        max_keys: 本页最多返回的条目数
+
+    Returns:
+        一页列举结果
+    """
+    position = bisect_right(keys, marker) if marker > prefix else bisect_left(keys, prefix)
+    objects: List[Dict[str, Any]] = []
+    common_prefixes: List[str] = []
+    last = marker
+    while position < len(keys) and keys[position].startswith(prefix):
+        key = keys[position]
+        separator = key.find(delimiter, len(prefix)) if delimiter else -1
+        if separator >= 0:
+            common_prefix = key[:separator + len(delimiter)]
+            # 同一公共前缀下的对象连续排列，整体跳过
+            position = bisect_left(keys, _prefix_upper_bound(common_prefix))
+            if common_prefix == marker:
+                continue
+            if len(objects) + len(common_prefixes) >= max_keys:
+                return ListPage(objects, common_prefixes, True, last)
+            common_prefixes.append(common_prefix)
+            last = common_prefix
+        else:
+            if len(objects) + len(common_prefixes) >= max_keys:
+                return ListPage(objects, common_prefixes, True, last)
+            size, etag, last_modified = entries[key]
+            objects.append({'key': key, 'size': size, 'etag': etag, 'last_modified': last_modified})
+            last = key
+            position += 1
+    return ListPage(objects, common_prefixes, False, '')
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    # 大于所有以prefix开头的字符串的最小字符串
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class _IndexedPrefix:
+    """单个前缀的索引"""
+
+    __slots__ = ('keys', 'entries', 'scanned_at')
+
+    def __init__(self, keys: List[str], entries: Dict[str, Tuple[int, str, str]], scanned_at: float):
+        self.keys = keys
+        self.entries = entries
+        self.scanned_at = scanned_at
+
+    def put(self, key: str, entry: Tuple[int, str, str]) -> bool:
+        # 新增或更新对象，返回是否为新增
+        is_new = key not in self.entries
+        if is_new:
+            insort(self.keys, key)
+        self.entries[key] = entry
+        return is_new
+
+    def remove(self, key: str) -> bool:
+        if self.entries.pop(key, None) is None:
+            return False
+        del self.keys[bisect_left(self.keys, key)]
+        return True
+
+
+class PrefixIndex:
+    """
+    进程级的对象前缀索引，线程安全
+
+    refresh() 确保覆盖请求前缀的索引可用且足够新，list_page() 从索引中分页。
+    """
+
+    def __init__(self, ttl: float = LIST_INDEX_TTL, max_keys: int = LIST_INDEX_MAX_KEYS):
+        self._ttl = ttl
+        self._max_keys = max_keys
+        self._indexes: "OrderedDict[IndexKey, _IndexedPrefix]" = OrderedDict()
+        self._total_keys = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'full_scans': 0, 'tail_scans': 0, 'list_requests': 0}
+
+    def refresh(self, client: Any, bucket: str, region: str, prefix: str,
+                retry: Optional[RetryContext] = None) -> Optional[str]:
+        """
+        准备覆盖prefix的索引：没有或已过期时完整扫描，否则只列出最后一个键之后新增的对象
+
+        Args:
+            client: CosS3Client实例
+            bucket: 存储桶名称
+            region: 地域
+            prefix: 请求的对象键前缀
+            retry: 重试上下文
+
+        Returns:
+            索引的刷新方式 'full_scan' 或 'tail_scan'；前缀下的对象超过索引容量时返回None，
+            此时应直接向COS列举
+        """
+        with self._lock:
+            index_key = self._find_covering(bucket, region, prefix)
+            indexed = self._indexes.get(index_key) if index_key else None
+            if indexed is not None and time.monotonic() - indexed.scanned_at < self._ttl:
+                self._indexes.move_to_end(index_key)
+                self._stats['hits'] += 1
+                last_key = indexed.keys[-1] if indexed.keys else ''
+            else:
+                indexed = None
+
+        if indexed is None:
+            # 在锁外完整扫描前缀，扫描期间其他调用照常使用已有索引
+            scanned = self._scan(client, bucket, prefix, '', retry)
+            if scanned is None:
+                return None
+            keys, entries = scanned
+            with self._lock:
+                self._install((bucket, region, prefix), _IndexedPrefix(keys, entries, time.monotonic()))
+                self._stats['full_scans'] += 1
+            return 'full_scan'
+
+        # 从最后一个键之后续列，只获取排在末尾的新对象
+        scanned = self._scan(client, bucket, index_key[2], last_key, retry)
+        with self._lock:
+            if scanned is None:
+                # 新增对象超过索引容量，不再为该前缀保留索引
+                if self._indexes.get(index_key) is indexed:
+                    self._drop(index_key)
+                return None
+            # 扫描期间索引被替换或淘汰时，新对象已包含在替换的索引中或无需再记录
+            if self._indexes.get(index_key) is indexed:
+                for key, entry in scanned[1].items():
+                    if indexed.put(key, entry):
+                        self._total_keys += 1
+                self._evict()
+            self._stats['tail_scans'] += 1
+        return 'tail_scan'
+
+    def list_page(self, bucket: str, region: str, prefix: str = '', delimiter: str = '', marker: str = '',
+                  max_keys: int = MAX_LIST_KEYS) -> Optional[ListPage]:
+        """
+        从覆盖prefix的索引中取出一页，没有可用索引时返回None（应先调用refresh）
+        """
+        with self._lock:
+            index_key = self._find_covering(bucket, region, prefix)
+            if index_key is None:
+                return None
+            indexed = self._indexes[index_key]
+            return paginate(indexed.keys, indexed.entries, prefix, delimiter, marker, max_keys)
+
+    def record_put(self, bucket: str, region: str, key: str, size: int, etag: str = '',
+                   last_modified: str = '') -> None:
+        """本插件写入对象后更新所有覆盖该对象键的索引"""
+        # 与GET Bucket返回的修改时间格式一致
+        last_modified = last_modified or time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+        with self._lock:
+            for (index_bucket, index_region, index_prefix), indexed in self._indexes.items():
+                if index_bucket == bucket and index_region == region and key.startswith(index_prefix):
+                    if indexed.put(key, (size, etag, last_modified)):
+                        self._total_keys += 1
+            self._evict()
+
+    def record_delete(self, bucket: str, region: str, key: str) -> None:
+        """本插件删除对象后从所有覆盖该对象键的索引中移除"""
+        with self._lock:
+            for (index_bucket, index_region, index_prefix), indexed in self._indexes.items():
+                if index_bucket == bucket and index_region == region and key.startswith(index_prefix):
+                    if indexed.remove(key):
+                        self._total_keys -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回索引的前缀数量、键数量以及命中和扫描次数"""
+        with self._lock:
+            return {'prefixes': len(self._indexes), 'keys': self._total_keys, **self._stats}
+
+    def _scan(self, client: Any, bucket: str, prefix: str, marker: str,
+              retry: Optional[RetryContext]) -> Optional[Tuple[List[str], Dict[str, Tuple[int, str, str]]]]:
+        # 列出prefix下marker之后的所有对象，超过索引容量时返回None
+        keys: List[str] = []
+        entries: Dict[str, Tuple[int, str, str]] = {}
+        while True:
+            page = list_cos_page(client, bucket, prefix, '', marker, MAX_LIST_KEYS, retry)
+            with self._lock:
+                self._stats['list_requests'] += 1
+            for obj in page.objects:
+                keys.append(obj['key'])
+                entries[obj['key']] = (obj['size'], obj['etag'], obj['last_modified'])
+            if len(keys) > self._max_keys:
+                return None
+            if not page.is_truncated:
+                return keys, entries
+            marker = page.next_marker
+
+    def _find_covering(self, bucket: str, region: str, prefix: str) -> Optional[IndexKey]:
+        # 调用方已持有锁；返回前缀最长的覆盖索引
+        best = None
+        for index_key in self._indexes:
+            if index_key[0] == bucket and index_key[1] == region and prefix.startswith(index_key[2]):
+                if best is None or len(index_key[2]) > len(best[2]):
+                    best = index_key
+        return best
+
+    def _install(self, index_key: IndexKey, indexed: _IndexedPrefix) -> None:
+        # 调用方已持有锁；新索引覆盖的更长前缀的索引不再需要
+        for other in [other for other in self._indexes
+                      if other[:2] == index_key[:2] and other[2].startswith(index_key[2])]:
+            self._drop(other)
+        self._indexes[index_key] = indexed
+        self._total_keys += len(indexed.keys)
+        self._evict()
+
+    def _drop(self, index_key: IndexKey) -> None:
+        indexed = self._indexes.pop(index_key, None)
+        if indexed is not None:
+            self._total_keys -= len(indexed.keys)
+
+    def _evict(self) -> None:
+        # 超过键数量上限时淘汰最近最少使用的索引，保留最近使用的一个
+        while self._total_keys > self._max_keys and len(self._indexes) > 1:
+            self._drop(next(iter(self._indexes)))
+
+
+_prefix_index: Optional[PrefixIndex] = None
+_prefix_index_lock = threading.Lock()
+
+
+def get_prefix_index() -> PrefixIndex:
+    """获取（或创建）进程级的前缀索引"""
+    global _prefix_index
+    with _prefix_index_lock:
+        if _prefix_index is None:
+            _prefix_index = PrefixIndex()
+        return _prefix_index
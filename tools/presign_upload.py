@@ -0,0 +1,272 @@
+import json
+import os
+import time
+from collections.abc import Generator
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .credential_cache import validate_credentials
+from .multipart import MAX_PART_COUNT
+from .retry import RetryBudget, RetryContext
+from .upload_job import build_file_url, compose_filename, generate_object_key, normalize_path_component
+from .utils import get_content_type_from_extension, get_int_parameter
+
+
+class PresignUploadTool(Tool):
+    # 单次调用最多签名的文件数量
+    MAX_FILES = 100
+    # 默认签名有效期（秒）
+    DEFAULT_EXPIRES_IN = 3600
+    # 签名有效期范围（秒）
+    MIN_EXPIRES_IN = 60
+    MAX_EXPIRES_IN = 7 * 24 * 3600
+    # 单次调用最多签名的分块URL数量（所有文件合计）
+    MAX_PART_URLS = MAX_PART_COUNT
+    # 单次调用内所有初始化分块上传请求共享的重试次数上限
+    RETRY_BUDGET = 10
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        try:
+            # 从runtime credentials获取认证信息
+            credentials = {
+                'region': self.runtime.credentials.get('region'),
+                'bucket': self.runtime.credentials.get('bucket'),
+                'secret_id': self.runtime.credentials.get('secret_id'),
+                'secret_key': self.runtime.credentials.get('secret_key')
+            }
+
+            # 验证工具参数中的认证信息
+            validate_credentials(credentials)
+
+            # 生成预签名URL，文件内容由调用方直接上传到COS
+            result = self._presign_upload(tool_parameters, credentials)
+
+            json_response = {
+                "status": "completed",
+                "expires_in": result['expires_in'],
+                "expires_at": result['expires_at'],
+                "file_count": len(result['files']),
+                "retries": result['retries'],
+                "files": result['files']
+            }
+            yield self.create_json_message(json_response)
+
+            # 英文消息
+            text_response = f"Presigned upload URLs generated for {len(result['files'])} files\n"
+            text_response += f"Expires at: {result['expires_at']}\n"
+            for file_info in result['files']:
+                text_response += f"\n- Object key: {file_info['object_key']}\n"
+                text_response += f"  Content type: {file_info['content_type']}\n"
+                if file_info['upload_mode'] == 'multipart':
+                    text_response += f"  Multipart upload ID: {file_info['upload_id']} ({file_info['part_count']} parts)\n"
+                else:
+                    text_response += f"  Upload URL (PUT): {file_info['upload_url']}\n"
+                text_response += f"  Access URL: {file_info['file_url']}\n"
+            yield self.create_text_message(text_response)
+        except Exception as e:
+            error_message = str(e)
+
+            json_response = {
+                "status": "failed",
+                "error_message": error_message,
+                "files": []
+            }
+            yield self.create_json_message(json_response)
+
+            # 在text中输出失败信息 - 英文消息
+            yield self.create_text_message(f"Failed to presign upload: {error_message}")
+            # 同时抛出异常以保持与上传工具一致的行为
+            raise ValueError(f"Failed to presign upload: {error_message}")
+
+    def _presign_upload(self, parameters: dict[str, Any], credentials: dict[str, Any]) -> dict:
+        """
+        为一个或多个文件生成对象键和预签名上传URL
+
+        简单上传返回一个PUT URL；指定part_count时先初始化分块上传，
+        再返回每个分块的PUT URL以及完成和取消分块上传的URL。
+
+        Args:
+            parameters: 工具参数
+            credentials: 凭据字典
+
+        Returns:
+            包含有效期和每个文件签名信息的结果字典
+        """
+        try:
+            filenames = self._get_filenames(parameters)
+            directory = parameters.get('directory')
+            if not directory:
+                raise ValueError("Missing required parameter: directory")
+
+            # 对directory进行前后去空格处理，并验证其不以空格、/或\开头
+            directory = normalize_path_component(directory, 'Directory')
+
+            directory_mode = parameters.get('directory_mode', 'no_subdirectory')
+            filename_mode = parameters.get('filename_mode', 'filename')
+            expires_in = self._get_expires_in(parameters)
+            part_count = self._get_part_count(parameters, len(filenames))
+            declared_content_type = (parameters.get('content_type') or '').strip()
+
+            # 先生成全部对象键，重复时在签名前失败
+            targets = []
+            object_keys = set()
+            for filename in filenames:
+                base_name, extension = os.path.splitext(filename)
+                target_filename = compose_filename(base_name or 'upload', extension.lower(), filename_mode)
+                object_key = generate_object_key(directory, directory_mode, target_filename)
+                if object_key in object_keys:
+                    raise ValueError(f"Duplicate object key: {object_key}")
+                object_keys.add(object_key)
+                content_type = declared_content_type or get_content_type_from_extension(extension)
+                targets.append((target_filename, object_key, content_type))
+
+            # 从进程级注册表获取腾讯云COS客户端，签名在本地计算
+            client = get_cos_client(credentials)
+            bucket = credentials['bucket']
+            expires_at = datetime.fromtimestamp(time.time() + expires_in, tz=timezone.utc)
+            # 所有文件的初始化请求共享一个重试预算
+            retry = RetryContext(RetryBudget(self.RETRY_BUDGET))
+
+            files: List[Dict[str, Any]] = []
+            try:
+                for target_filename, object_key, content_type in targets:
+                    if part_count:
+                        file_info = self._presign_multipart(client, bucket, object_key, content_type,
+                                                            part_count, expires_in, retry)
+                    else:
+                        file_info = self._presign_put(client, bucket, object_key, content_type, expires_in)
+                    file_info.update({
+                        'filename': target_filename,
+                        'object_key': object_key,
+                        'file_url': build_file_url(bucket, credentials['region'], object_key),
+                        'content_type': content_type
+                    })
+                    files.append(file_info)
+            except cos_sdk.CosServiceError as e:
+                # 取消已经初始化的分块上传，避免在COS上残留
+                self._abort_uploads(client, bucket, files)
+                raise ValueError(f"COS service error: {str(e)}")
+            except Exception:
+                self._abort_uploads(client, bucket, files)
+                raise
+
+            return {
+                'expires_in': expires_in,
+                'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'retries': retry.retries,
+                'files': files
+            }
+        except Exception as e:
+            raise ValueError(f"Failed to presign upload: {str(e)}")
+
+    def _presign_put(self, client: Any, bucket: str, object_key: str, content_type: str,
+                     expires_in: int) -> Dict[str, Any]:
+        # Content-Type参与签名，上传时必须携带相同的请求头
+        headers = {'Content-Type': content_type}
+        upload_url = client.get_presigned_url(Bucket=bucket, Key=object_key, Method='PUT', Expired=expires_in,
+                                              Headers=headers)
+        return {
+            'upload_mode': 'simple',
+            'method': 'PUT',
+            'upload_url': upload_url,
+            'headers': headers
+        }
+
+    def _presign_multipart(self, client: Any, bucket: str, object_key: str, content_type: str,
+                           part_count: int, expires_in: int, retry: RetryContext) -> Dict[str, Any]:
+        """
+        初始化分块上传并为每个分块、完成和取消请求生成预签名URL
+
+        Args:
+            client: CosS3Client实例
+            bucket: 存储桶名称
+            object_key: 对象键
+            content_type: 内容类型，在初始化时设置，分块请求无需携带
+            part_count: 分块数量
+            expires_in: 签名有效期（秒）
+            retry: 重试上下文（共享工具调用的重试预算）
+
+        Returns:
+            分块上传的签名信息
+        """
+        # 初始化请求不幂等，只在限流时重试
+        response = retry.call(client.create_multipart_upload, Bucket=bucket, Key=object_key,
+                              ContentType=content_type, idempotent=False)
+        upload_id = response['UploadId']
+        parts = [
+            {
+                'part_number': part_number,
+                'upload_url': client.get_presigned_url(
+                    Bucket=bucket, Key=object_key, Method='PUT', Expired=expires_in,
+                    Params={'partNumber': str(part_number), 'uploadId': upload_id}
+                )
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+        return {
+            'upload_mode': 'multipart',
+            'upload_id': upload_id,
+            'part_count': part_count,
+            'parts': parts,
+            # 完成请求的请求体为CompleteMultipartUpload XML（分块编号与ETag）
+            'complete_url': client.get_presigned_url(Bucket=bucket, Key=object_key, Method='POST',
+                                                     Expired=expires_in, Params={'uploadId': upload_id}),
+            'abort_url': client.get_presigned_url(Bucket=bucket, Key=object_key, Method='DELETE',
+                                                  Expired=expires_in, Params={'uploadId': upload_id})
+        }
+
+    def _abort_uploads(self, client: Any, bucket: str, files: List[Dict[str, Any]]) -> None:
+        # 取消已初始化的分块上传时忽略所有错误，保留原始异常
+        for file_info in files:
+            if file_info.get('upload_id'):
+                try:
+                    client.abort_multipart_upload(Bucket=bucket, Key=file_info['object_key'],
+                                                  UploadId=file_info['upload_id'])
+                except Exception:
+                    pass
+
+    def _get_filenames(self, parameters: dict[str, Any]) -> List[str]:
+        """
+        解析filenames参数，支持列表、JSON数组字符串以及换行或逗号分隔的字符串
+        """
+        value = parameters.get('filenames')
+        if isinstance(value, str):
+            text = value.strip()
+            if text.startswith('['):
+                try:
+                    value = json.loads(text)
+                except ValueError:
+                    raise ValueError("Parameter filenames is not a valid JSON array")
+            else:
+                value = text.replace(',', '\n').splitlines()
+        if not isinstance(value, (list, tuple)):
+            raise ValueError("Missing required parameter: filenames")
+
+        filenames = [str(filename).strip() for filename in value if filename and str(filename).strip()]
+        if not filenames:
+            raise ValueError("Missing required parameter: filenames")
+        if len(filenames) > self.MAX_FILES:
+            raise ValueError(f"At most {self.MAX_FILES} filenames are supported, got {len(filenames)}")
+        for filename in filenames:
+            # 文件名禁止以/或\开头，也不能包含路径
+            if filename.startswith('/') or filename.startswith('\\') or '/' in filename or '\\' in filename:
+                raise ValueError(f"Filename cannot contain / or \\: {filename}")
+        return filenames
+
+    def _get_expires_in(self, parameters: dict[str, Any]) -> int:
+        # 签名有效期（秒），限制在MIN_EXPIRES_IN到MAX_EXPIRES_IN之间
+        expires_in = get_int_parameter(parameters, 'expires_in') or self.DEFAULT_EXPIRES_IN
+        return max(self.MIN_EXPIRES_IN, min(expires_in, self.MAX_EXPIRES_IN))
+
+    def _get_part_count(self, parameters: dict[str, Any], file_count: int) -> int:
+        # 每个文件的分块数量，0或未设置表示简单上传
+        part_count = get_int_parameter(parameters, 'part_count', 0)
+        if part_count < 0:
+            raise ValueError("Parameter part_count must not be negative")
+        if part_count * file_count > self.MAX_PART_URLS:
+            raise ValueError(f"At most {self.MAX_PART_URLS} part URLs can be generated in one call")
+        return part_count
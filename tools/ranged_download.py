@@ -0,0 +1,199 @@
+"""
+大对象的并发分段下载
+
+GET响应的Content-Length超过阈值时，第一段直接从已打开的响应中读取，其余部分按调优器给出的
+分块大小以Range GET并发预取（带If-Match，保证各段来自同一版本的对象），按顺序拼接成一个流。
+预取在第一次读取时才开始，读取前因大小限制被拒绝的对象不会发起额外请求。
+预取窗口占用的内存在第一次读取时（调用方已按对象大小预留之后）从进程级内存预算中单独预留，
+预算不足时不并发预取，直接从原响应读完整个对象。
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from .autotune import TransferSettings, get_transfer_tuner, resolve_transfer_settings
+from .memory_budget import MemoryReservation, get_memory_budget
+from .retry import RetryContext
+from .utils import get_header
+
+# Content-Length超过该大小（字节）时使用并发分段下载
+PARALLEL_DOWNLOAD_THRESHOLD = int(float(os.environ.get('COS_PARALLEL_DOWNLOAD_THRESHOLD_MB', '20')) * 1024 * 1024)
+
+
+def open_parallel_body(client: Any, bucket: str, key: str, response: dict, region: str,
+                       retry: Optional[RetryContext] = None) -> Optional['ParallelRangeBody']:
+    """
+    为足够大的GET响应创建并发分段读取的响应体
+
+    Args:
+        client: CosS3Client实例
+        bucket: 存储桶名称
+        key: 对象键
+        response: 已打开的完整对象GET响应
+        region: 地域，调优器按地域分别记录最佳分块参数
+        retry: 重试上下文
+
+    Returns:
+        ParallelRangeBody，对象不超过阈值或缺少ETag时返回None（继续使用原响应体）
+    """
+    size = int(get_header(response, 'Content-Length') or 0)
+    etag = get_header(response, 'ETag')
+    if size <= PARALLEL_DOWNLOAD_THRESHOLD or not etag:
+        return None
+    # 调优器给出的参数即使只有一个分块或并发数为1也照常使用，以便测量其吞吐量
+    settings, _ = resolve_transfer_settings('download', region, size)
+
+    def on_complete(seconds: float) -> None:
+        get_transfer_tuner('download').record(region, size, settings, seconds)
+
+    stream = ParallelRangeStream(response['Body'].get_raw_stream(), client, bucket, key, size, etag, settings,
+                                 retry or RetryContext(), on_complete)
+    return ParallelRangeBody(stream)
+
+
+class ParallelRangeStream:
+    """
+    按顺序返回对象内容的类文件对象
+
+    第一段读取自原GET响应，读满一个分块后关闭该响应；其余分块由线程池并发预取，
+    同时在途的分块数量不超过并发数，内存占用不超过 (并发数 + 1) * 分块大小。
+    这部分内存在第一次读取时从内存预算中预留，读取结束或关闭时释放；预算放不下时
+    不发起分段请求，从原响应读完整个对象。
+    """
+
+    def __init__(self, first_stream: Any, client: Any, bucket: str, key: str, size: int, etag: str,
+                 settings: TransferSettings, retry: RetryContext,
+                 on_complete: Optional[Callable[[float], None]] = None):
+        self.settings = settings
+        self.part_count = (size + settings.part_size - 1) // settings.part_size
+        self._first_stream = first_stream
+        self._first_remaining = min(settings.part_size, size)
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._etag = etag
+        self._retry = retry
+        self._on_complete = on_complete
+        self._size = size
+        self._window: Optional[MemoryReservation] = None
+        self._ranges: Deque[Tuple[int, int]] = deque(
+            (start, min(start + settings.part_size, size) - 1) for start in range(settings.part_size, size,
+                                                                                 settings.part_size)
+        )
+        self._pending: Deque[Future] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._current = b''
+        self._offset = 0
+        self._started: Optional[float] = None
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self._read_some(self.settings.part_size)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+        return self._read_some(size)
+
+    def _read_some(self, size: int) -> bytes:
+        if self._started is None:
+            # 第一次读取时预留预取窗口（在途的分块和正在读取的分块）并开始预取后续分块
+            self._started = time.monotonic()
+            window_parts = min(self.settings.concurrency + 1, len(self._ranges))
+            self._window = get_memory_budget().try_acquire(window_parts * self.settings.part_size)
+            if self._window is None:
+                # 内存预算放不下预取窗口时退回单个GET，其吞吐量不计入调优器
+                self.part_count = 1
+                self._first_remaining = self._size
+                self._ranges.clear()
+                self._on_complete = None
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.settings.concurrency,
+                                                    thread_name_prefix='cos-range')
+                self._fill_window()
+
+        if self._first_stream is not None:
+            data = self._first_stream.read(min(size, self._first_remaining))
+            if not data:
+                raise ValueError("Connection closed before the first part of the object was received")
+            self._first_remaining -= len(data)
+            if self._first_remaining <= 0:
+                # 第一段已读完，关闭原响应（剩余内容由分段请求获取）
+                self._first_stream.close()
+                self._first_stream = None
+            return data
+
+        if self._offset >= len(self._current):
+            if not self._pending:
+                self._finish()
+                return b''
+            self._current = self._pending.popleft().result()
+            self._offset = 0
+            self._fill_window()
+
+        data = self._current[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+    def _fill_window(self) -> None:
+        # 保持并发数个分块在途
+        while self._ranges and len(self._pending) < self.settings.concurrency:
+            first, last = self._ranges.popleft()
+            self._pending.append(self._executor.submit(self._retry.call, self._fetch_range, first, last))
+
+    def _fetch_range(self, first: int, last: int) -> bytes:
+        # 下载一个分块；对象在下载过程中被修改时If-Match失败（412），不会拼接出不同版本的内容
+        response = self._client.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={first}-{last}",
+                                           IfMatch=self._etag)
+        stream = response['Body'].get_raw_stream()
+        try:
+            data = stream.read()
+        finally:
+            stream.close()
+        if len(data) != last - first + 1:
+            raise ValueError(f"Incomplete range response for bytes {first}-{last}: got {len(data)} bytes")
+        return data
+
+    def _finish(self) -> None:
+        if self._on_complete is not None and self._started is not None:
+            self._on_complete(time.monotonic() - self._started)
+            self._on_complete = None
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._current = b''
+        if self._window is not None:
+            self._window.release()
+            self._window = None
+
+    def close(self) -> None:
+        self._on_complete = None
+        self._pending.clear()
+        self._shutdown()
+        if self._first_stream is not None:
+            self._first_stream.close()
+            self._first_stream = None
+
+
+class ParallelRangeBody:
+    """包装并发分段读取的流，get_raw_stream() 与COS响应体的接口一致"""
+
+    def __init__(self, stream: ParallelRangeStream):
+        self._stream = stream
+
+    @property
+    def settings(self) -> TransferSettings:
+        return self._stream.settings
+
+    @property
+    def part_count(self) -> int:
+        return self._stream.part_count
+
+    def get_raw_stream(self) -> ParallelRangeStream:
+        return self._stream
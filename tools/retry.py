@@ -0,0 +1,283 @@
+"""
+所有工具共享的重试策略
+
+- 指数退避加全抖动（full jitter），避免并发请求在同一时刻重试
+- 按幂等性区分错误：限流（429/503/SlowDown）说明请求未被处理，任何请求都可以重试；
+  5xx和网络错误时请求可能已被处理，只重试幂等请求（GET/HEAD/PUT/DELETE）
+- 每次工具调用共享一个重试预算，预算用完后不再重试，避免故障时放大请求量
+- GET/HEAD可选对冲请求：首个请求超过该操作近期p95延迟仍未返回时再发一个相同请求，
+  采用先成功返回的结果，降低长尾延迟
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from . import cos_sdk
+
+# 单个请求的最大重试次数
+RETRY_MAX_RETRIES = int(os.environ.get('COS_RETRY_MAX_RETRIES', '3'))
+
+# 退避的基础延迟和最大延迟（秒），第n次重试的延迟在 [0, min(最大延迟, 基础延迟*2^n)] 内随机
+RETRY_BASE_DELAY = float(os.environ.get('COS_RETRY_BASE_DELAY', '0.2'))
+RETRY_MAX_DELAY = float(os.environ.get('COS_RETRY_MAX_DELAY', '5'))
+
+# 延迟样本不足时的对冲等待时间，以及对冲等待时间的下限（秒）
+HEDGE_DEFAULT_DELAY = float(os.environ.get('COS_HEDGE_DEFAULT_DELAY_MS', '500')) / 1000
+HEDGE_MIN_DELAY = float(os.environ.get('COS_HEDGE_MIN_DELAY_MS', '20')) / 1000
+
+# 每种操作保留的最近延迟样本数，以及按p95计算对冲等待时间所需的最少样本数
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+# 对冲请求使用的线程数
+HEDGE_MAX_WORKERS = 32
+
+# 限流类错误：请求未被服务端处理
+THROTTLING_STATUS_CODES = frozenset((429, 503))
+THROTTLING_ERROR_CODES = frozenset(('SlowDown', 'TooManyRequests', 'ServiceUnavailable'))
+
+# 幂等请求可以重试的状态码和错误码
+RETRYABLE_STATUS_CODES = frozenset((408, 500, 502, 504))
+RETRYABLE_ERROR_CODES = frozenset(('RequestTimeout', 'InternalError'))
+
+# SDK只保留原始错误信息的CosClientError，按信息判断是否为连接或超时错误
+NETWORK_ERROR_PATTERN = re.compile(r'connection|timed? ?out|reset by peer|broken pipe|remote end closed', re.IGNORECASE)
+
+
+def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    判断请求失败后是否可以重试
+
+    Args:
+        error: 请求抛出的异常
+        idempotent: 请求是否幂等（重复执行结果相同）
+
+    Returns:
+        可以重试时返回True
+    """
+    if isinstance(error, cos_sdk.CosServiceError):
+        status_code = error.get_status_code()
+        error_code = error.get_error_code()
+        if status_code in THROTTLING_STATUS_CODES or error_code in THROTTLING_ERROR_CODES:
+            return True
+        return idempotent and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+                               or error_code in RETRYABLE_ERROR_CODES)
+    # 网络错误（连接重置、超时等）时请求可能已被处理，只重试幂等请求
+    return idempotent and _is_network_error(error)
+
+
+def _is_network_error(error: BaseException) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, cos_sdk.CosClientError):
+        # SDK也以CosClientError报告参数校验等本地错误，只有包装了连接或超时错误时才重试
+        cause = error.__cause__ or error.__context__
+        if cause is not None:
+            return _is_network_error(cause)
+        return NETWORK_ERROR_PATTERN.search(str(error)) is not None
+    # SDK底层的requests和异步传输的httpx的网络错误，仅在已加载时检查
+    requests = sys.modules.get('requests')
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    httpx = sys.modules.get('httpx')
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> float:
+    """第attempt次重试（从0开始）前的等待时间，指数退避加全抖动"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RetryBudget:
+    """单次工具调用内所有请求共享的重试（含对冲请求）次数上限，线程安全"""
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._used >= self.limit:
+                return False
+            self._used += 1
+            return True
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self.limit - self._used
+
+
+class LatencyTracker:
+    """记录某种操作最近的延迟，用于计算对冲等待时间"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def hedge_delay(self) -> float:
+        # 样本足够时取p95，否则使用默认等待时间
+        with self._lock:
+            sample_count = len(self._samples)
+        if sample_count < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, self.percentile(0.95))
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_latency_tracker(operation: str) -> LatencyTracker:
+    """获取（或创建）指定操作的进程级延迟记录"""
+    with _trackers_lock:
+        tracker = _trackers.get(operation)
+        if tracker is None:
+            tracker = _trackers[operation] = LatencyTracker()
+        return tracker
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _trackers_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix='cos-hedge')
+        return _hedge_executor
+
+
+class RetryContext:
+    """
+    一次工具调用（或其中一个文件）的重试上下文
+
+    统计重试和对冲请求的次数；child() 创建共享预算的子上下文，
+    子上下文的计数同时累加到父上下文。
+    """
+
+    def __init__(self, budget: Optional[RetryBudget] = None, max_retries: int = RETRY_MAX_RETRIES,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY,
+                 parent: Optional['RetryContext'] = None):
+        self.budget = budget
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._parent = parent
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._hedges = 0
+
+    def child(self) -> 'RetryContext':
+        return RetryContext(self.budget, self.max_retries, self.base_delay, self.max_delay, parent=self)
+
+    @property
+    def retries(self) -> int:
+        with self._lock:
+            return self._retries
+
+    @property
+    def hedges(self) -> int:
+        with self._lock:
+            return self._hedges
+
+    def call(self, func: Callable[..., Any], *args: Any, idempotent: bool = True, **kwargs: Any) -> Any:
+        """
+        调用func，失败且可以重试时按指数退避重试
+
+        Args:
+            func: 要调用的函数（通常是客户端方法）
+            args: 位置参数
+            idempotent: 请求是否幂等，非幂等请求只在限流时重试
+            kwargs: 关键字参数
+
+        Returns:
+            func的返回值
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e, idempotent) or not self._acquire():
+                    raise
+                time.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+                attempt += 1
+                self._record(retries=1)
+
+    def hedged_call(self, operation: str, func: Callable[..., Any], *args: Any,
+                    cleanup: Optional[Callable[[Any], None]] = None, **kwargs: Any) -> Any:
+        """
+        发起可对冲的幂等读请求（GET/HEAD），失败时按重试策略重试
+
+        Args:
+            operation: 操作名称，同名操作共享延迟记录（如 'get_object:ap-beijing'）
+            func: 要调用的函数
+            args: 位置参数
+            cleanup: 释放落后请求结果的回调（如关闭GET响应体）
+            kwargs: 关键字参数
+
+        Returns:
+            先成功返回的结果
+        """
+        return self.call(self._hedge_once, operation, func, args, kwargs, cleanup)
+
+    def _hedge_once(self, operation: str, func: Callable[..., Any], args: tuple, kwargs: dict,
+                    cleanup: Optional[Callable[[Any], None]]) -> Any:
+        tracker = get_latency_tracker(operation)
+        executor = _get_hedge_executor()
+        started: Dict[Future, float] = {}
+
+        def submit() -> Future:
+            future = executor.submit(func, *args, **kwargs)
+            started[future] = time.monotonic()
+            return future
+
+        primary = submit()
+        done, _ = wait([primary], timeout=tracker.hedge_delay())
+        pending = {primary}
+        # 超过等待时间仍未返回且预算允许时发起对冲请求
+        if not done and self._acquire():
+            self._record(hedges=1)
+            pending.add(submit())
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is None:
+                error = next(iter(done)).exception()
+                continue
+            tracker.record(time.monotonic() - started[winner])
+            # 其余请求完成后释放其结果（如关闭响应体）
+            if cleanup is not None:
+                for other in (done | pending) - {winner}:
+                    other.add_done_callback(lambda f: f.exception() is None and cleanup(f.result()))
+            return winner.result()
+        raise error
+
+    def _acquire(self) -> bool:
+        return self.budget is None or self.budget.try_acquire()
+
+    def _record(self, retries: int = 0, hedges: int = 0) -> None:
+        with self._lock:
+            self._retries += retries
+            self._hedges += hedges
+        if self._parent is not None:
+            self._parent._record(retries, hedges)
@@ -0,0 +1,101 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from dify_plugin.config.logger_format import plugin_logger_handler
+
+# 使用插件日志处理器输出结构化耗时日志
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(plugin_logger_handler)
+
+
+class PhaseTimer:
+    """
+    按阶段记录单调时钟耗时、传输字节数和重试次数
+
+    未启用时所有记录操作均为空操作，不影响热路径。同一阶段多次进入时累加耗时，
+    可在线程池中共享使用。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._bytes = 0
+        self._retries = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """记录一个阶段的耗时"""
+        if not self.enabled:
+            yield
+            return
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - begin
+            with self._lock:
+                self._phases[name] = self._phases.get(name, 0.0) + elapsed
+
+    def add_bytes(self, count: int) -> None:
+        if self.enabled and count:
+            with self._lock:
+                self._bytes += count
+
+    def add_retries(self, count: int) -> None:
+        if self.enabled and count:
+            with self._lock:
+                self._retries += count
+
+    def merge(self, other: 'PhaseTimer') -> None:
+        """将另一个计时器的阶段耗时、字节数和重试次数累加到当前计时器"""
+        if not self.enabled or not other.enabled:
+            return
+        with other._lock:
+            phases = dict(other._phases)
+            transferred, retries = other._bytes, other._retries
+        with self._lock:
+            for name, value in phases.items():
+                self._phases[name] = self._phases.get(name, 0.0) + value
+            self._bytes += transferred
+            self._retries += retries
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        构建JSON响应中的timings信息
+
+        Returns:
+            包含总耗时、各阶段耗时（毫秒）、传输字节数和重试次数的字典
+        """
+        with self._lock:
+            return {
+                'total_ms': round((time.perf_counter() - self._started) * 1000, 3),
+                'phases_ms': {name: round(value * 1000, 3) for name, value in self._phases.items()},
+                'bytes_transferred': self._bytes,
+                'retries': self._retries
+            }
+
+    def log(self, tool: str, **fields: Any) -> None:
+        """
+        以单行JSON输出结构化耗时日志
+
+        Args:
+            tool: 工具名称
+            fields: 附加字段，如对象键、状态
+        """
+        if not self.enabled:
+            return
+        record = {'event': 'cos_tool_timings', 'tool': tool}
+        record.update(fields)
+        record.update(self.to_dict())
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+
+# 未启用计时时使用的共享空计时器
+NULL_TIMER = PhaseTimer(enabled=False)
@@ -1,17 +1,26 @@
-import time
-import os
-from datetime import datetime
 from collections.abc import Generator
-from typing import Any, Dict
+from typing import Any, Optional
 
-from qcloud_cos import CosConfig, CosS3Client
-from qcloud_cos.cos_exception import CosServiceError
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
-from dify_plugin.file.file import File
-from .utils import get_file_type, get_file_extension
+from . import cos_sdk
+from .client_pool import get_cos_client
+from .credential_cache import validate_credentials
+from .image_optimization import resolve_image_options
+from .memory_budget import get_memory_budget
+from .multipart import DEFAULT_MULTIPART_THRESHOLD
+from .retry import RetryBudget, RetryContext
+from .timing import PhaseTimer
+from .upload_job import (build_file_url, build_upload_job, describe_file, estimate_upload_memory, execute_upload,
+                         generate_object_key, normalize_path_component, release_file_content)
+from .utils import get_bool_parameter
 
 class UploadFileTool(Tool):
+    # 最大并发上传的分块数量
+    MAX_PART_CONCURRENCY = 16
+    # 单次调用内所有请求共享的重试次数上限
+    RETRY_BUDGET = 10
+    
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         try:
             # 从runtime credentials获取认证信息
@@ -23,158 +32,86 @@ class UploadFileTool(Tool):
             }
             
             # 验证工具参数中的认证信息
-            self._validate_credentials(credentials)
+            validate_credentials(credentials)
             
             # 执行文件上传操作
             result = self._upload_file(tool_parameters, credentials)
             
-            # 获取文件信息
-            file = tool_parameters.get('file')
-            file_size = 0
-            file_type = 'unknown'
-            
-            # 尝试获取文件大小
-            if isinstance(file, File) and hasattr(file, 'blob'):
-                file_size = len(file.blob)
-            elif hasattr(file, 'read'):
-                # 保存当前文件指针位置
-                if hasattr(file, 'tell'):
-                    current_pos = file.tell()
-                else:
-                    current_pos = None
-                
-                # 读取文件内容获取大小
-                content = file.read()
-                file_size = len(content)
-                
-                # 重置文件指针
-                if hasattr(file, 'seek') and current_pos is not None:
-                    file.seek(current_pos)
-            elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                file_size = os.path.getsize(file)
-                
-            # 尝试获取文件类型
-            file_type = get_file_type(file)
-            
-            # 转换文件大小为MB
-            file_size_mb = file_size / (1024 * 1024) if file_size > 0 else 0
+            # 文件名、大小和类型已在上传任务中解析，直接复用
+            job = result['job']
+            file_info = job.to_file_info(result['file_url'], 'success')
+            file_info["upload_mode"] = result['upload_mode']
+            file_info["deduplicated"] = result['deduplicated']
+            file_info["retries"] = result['retries']
+            file_info["memory_wait_ms"] = result['memory_wait_ms']
+            if result['upload_mode'] == 'multipart':
+                file_info["part_size_bytes"] = result['part_size']
+                file_info["part_concurrency"] = result['part_concurrency']
+                file_info["autotuned"] = result['autotuned']
+            if result['content_encoding']:
+                file_info["content_encoding"] = result['content_encoding']
+                file_info["compressed_size_bytes"] = result['stored_size']
             
             # 构建与批量上传一致的JSON响应结构
-            files_info = [{
-                "filename": result.get('filename', 'unknown'),
-                "file_size_bytes": file_size,
-                "file_size_mb": round(file_size_mb, 2),
-                "file_type": file_type,
-                "file_url": result['file_url'],
-                "status": "success"
-            }]
-            
             json_response = {
                 "status": "completed",
                 "success_count": 1,
                 "error_count": 0,
-                "files": files_info
+                "retries": result['retries'],
+                "memory_budget": get_memory_budget().snapshot(),
+                "files": [file_info]
             }
             
-            yield self.create_json_message(json_response)
-            
-            # 在text中输出成功信息，包含文件类型、大小（M单位）和访问链接
-            file = tool_parameters.get('file')
-            file_size = 0
-            file_type = 'unknown'
+            # 启用计时时附加各阶段耗时，并输出结构化日志
+            timer = result['timer']
+            if timer.enabled:
+                json_response["timings"] = timer.to_dict()
+                timer.log('upload_file', object_key=result['object_key'], upload_mode=result['upload_mode'])
             
-            # 尝试获取文件大小
-            if isinstance(file, File) and hasattr(file, 'blob'):
-                file_size = len(file.blob)
-            elif hasattr(file, 'read'):
-                # 保存当前文件指针位置
-                if hasattr(file, 'tell'):
-                    current_pos = file.tell()
-                else:
-                    current_pos = None
-                
-                # 读取文件内容获取大小
-                content = file.read()
-                file_size = len(content)
-                
-                # 重置文件指针
-                if hasattr(file, 'seek') and current_pos is not None:
-                    file.seek(current_pos)
-            elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                file_size = os.path.getsize(file)
-                
-            # 尝试获取文件类型
-            file_type = 'unknown'
-            # 尝试获取文件类型
-            file_type = get_file_type(file)
-            
-            # 转换文件大小为MB
-            file_size_mb = file_size / (1024 * 1024) if file_size > 0 else 0
+            yield self.create_json_message(json_response)
             
             # 使用单独的字符串格式化 - 英文消息
             success_message = "File uploaded successfully!\n"
             success_message += f"Filename: {result['filename']}\n"
-            success_message += f"File type: {file_type}\n"
-            success_message += f"File size: {file_size_mb:.2f} MB\n"
+            success_message += f"File type: {job.file_type}\n"
+            success_message += f"File size: {job.size_mb:.2f} MB\n"
             success_message += f"Access URL: {result['file_url']}\n"
             success_message += f"Object key: {result['object_key']}"
+            if result['deduplicated']:
+                success_message += "\nIdentical content already exists, upload skipped"
+            elif result['upload_mode'] == 'multipart':
+                success_message += (f"\nUpload mode: multipart ({result['part_count']} parts of "
+                                    f"{result['part_size'] / (1024 * 1024):.0f} MB, {result['part_concurrency']} in parallel"
+                                    f"{', autotuned' if result['autotuned'] else ''})")
+            if result['retries']:
+                success_message += f"\nRetries: {result['retries']}"
+            if result['memory_wait_ms']:
+                success_message += f"\nWaited {result['memory_wait_ms']:.0f} ms for memory budget"
+            if result['content_encoding']:
+                success_message += (f"\nCompression: {result['content_encoding']} "
+                                    f"({job.size} -> {result['stored_size']} bytes)")
+            if job.image_report:
+                if job.image_report['status'] == 'optimized':
+                    success_message += (f"\nImage optimization: {job.image_report['original_size_bytes']} -> "
+                                        f"{job.image_report['optimized_size_bytes']} bytes "
+                                        f"(saved {job.image_report['saved_percent']}%)")
+                else:
+                    success_message += f"\nImage optimization skipped: {job.image_report['reason']}"
             yield self.create_text_message(success_message)
         except Exception as e:
             # 构建错误响应
             error_message = str(e)
             
-            # 尝试获取文件信息，即使上传失败
-            file = tool_parameters.get('file')
-            file_size = 0
-            file_type = 'unknown'
-            filename = "unknown"
-            
-            # 尝试获取文件大小
-            if isinstance(file, File) and hasattr(file, 'blob'):
-                file_size = len(file.blob)
-                filename = file.filename if hasattr(file, 'filename') else "unknown"
-            elif hasattr(file, 'read'):
-                # 保存当前文件指针位置
-                if hasattr(file, 'tell'):
-                    current_pos = file.tell()
-                else:
-                    current_pos = None
-                
-                # 读取文件内容获取大小
-                content = file.read()
-                file_size = len(content)
-                
-                # 重置文件指针
-                if hasattr(file, 'seek') and current_pos is not None:
-                    file.seek(current_pos)
-                
-                filename = getattr(file, 'name', getattr(file, 'filename', "unknown"))
-            elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                file_size = os.path.getsize(file)
-                filename = os.path.basename(file)
-                
-            # 尝试获取文件类型
-            file_type = get_file_type(file)
-            
-            # 转换文件大小为MB
-            file_size_mb = file_size / (1024 * 1024) if file_size > 0 else 0
+            # 尝试获取文件信息，即使上传失败（不读取文件内容）
+            file_info = describe_file(tool_parameters.get('file'))
             
             # 构建与批量上传一致的错误JSON响应结构
-            files_info = [{
-                "filename": filename,
-                "file_size_bytes": file_size,
-                "file_size_mb": round(file_size_mb, 2),
-                "file_type": file_type,
-                "file_url": "",
-                "status": "failed"
-            }]
-            
             json_response = {
                 "status": "failed",
                 "success_count": 0,
                 "error_count": 1,
                 "error_message": error_message,
-                "files": files_info
+                "files": [file_info]
             }
             
             yield self.create_json_message(json_response)
@@ -184,13 +121,6 @@ class UploadFileTool(Tool):
             # 同时抛出异常以保持原有行为
             raise ValueError(f"Failed to upload file: {str(e)}")
     
-    def _validate_credentials(self, credentials: dict[str, Any]) -> None:
-        # 验证必填字段是否存在
-        required_fields = ['region', 'bucket', 'secret_id', 'secret_key']
-        for field in required_fields:
-            if field not in credentials or not credentials[field]:
-                raise ValueError(f"Missing required credential: {field}")
-    
     def _upload_file(self, parameters: dict[str, Any], credentials: dict[str, Any]) -> dict:
         try:
             # 获取文件对象、目录和其他参数
@@ -207,18 +137,12 @@ class UploadFileTool(Tool):
             if not directory:
                 raise ValueError("Missing required parameter: directory")
             
-            # 对directory进行前后去空格处理
-            directory = directory.strip()
-            # 验证directory规则：禁止以空格、/或\开头
-            if directory.startswith(' ') or directory.startswith('/') or directory.startswith('\\'):
-                raise ValueError("Directory cannot start with space, / or \\ ")
+            # 对directory进行前后去空格处理，并验证其不以空格、/或\开头
+            directory = normalize_path_component(directory, 'Directory')
             
-            # 如果用户指定了filename，对其进行前后去空格处理
+            # 如果用户指定了filename，同样处理和验证
             if filename:
-                filename = filename.strip()
-                # 验证filename规则：禁止以空格、/或\开头
-                if filename.startswith(' ') or filename.startswith('/') or filename.startswith('\\'):
-                    raise ValueError("Filename cannot start with space, / or \\ ")
+                filename = normalize_path_component(filename, 'Filename')
             
             # 验证认证参数
             required_auth_fields = ['region', 'bucket', 'secret_id', 'secret_key']
@@ -226,154 +150,111 @@ class UploadFileTool(Tool):
                 if field not in credentials or not credentials[field]:
                     raise ValueError(f"Missing required authentication parameter: {field}")
             
-            # 生成文件名
-            source_file_name = "unknown"
-            if not filename:
-                # 如果用户没有指定文件名，使用上传文件的原始文件名
-                base_name = "upload"
-                extension = ".dat"  # 默认扩展名
-                
-                # 尝试从文件对象获取原始文件名和扩展名 - 加强版
-                # 1. 处理dify_plugin的File对象
-                if hasattr(file, 'name') and file.name:
-                    original_filename = file.name
-                    source_file_name = original_filename
-                    file_base_name, file_extension = os.path.splitext(original_filename)
-                    if file_extension:
-                        extension = file_extension
-                        base_name = file_base_name
-                
-                # 2. 尝试从file.filename获取（常见于某些Web框架）
-                elif hasattr(file, 'filename') and file.filename:
-                    original_filename = file.filename
-                    source_file_name = original_filename
-                    file_base_name, file_extension = os.path.splitext(original_filename)
-                    if file_extension:
-                        extension = file_extension
-                        base_name = file_base_name
-                
-                # 3. 尝试从文件内容类型推断扩展名
-                if hasattr(file, 'content_type') and file.content_type:
-                    extension = get_file_extension(file)
-                
-                # 4. 额外的检查：确保扩展名是小写的，并且包含点号
-                if extension and not extension.startswith('.'):
-                    extension = '.' + extension
-                extension = extension.lower()
-                
-                # 根据filename_mode处理文件名
-                if filename_mode == 'filename_timestamp':
-                    # 使用年月日时分秒毫秒格式的时间戳
-                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]  # 去掉最后三位得到毫秒
-                    filename = f"{base_name}_{timestamp}{extension}"
-                else:
-                    # 使用原始文件名作为默认文件名
-                    filename = f"{base_name}{extension}"
-            else:
-                # 如果用户指定了文件名，将其作为源文件名
-                source_file_name = filename
-                # 获取用户指定文件名的基本名称和扩展名
-                base_name, extension = os.path.splitext(filename)
-                
-                # 如果用户指定的文件名没有扩展名，尝试从原始文件获取扩展名
-                if not extension:
-                    # 尝试从文件对象获取原始文件的扩展名
-                    original_extension = ""  
-                    # 1. 处理dify_plugin的File对象
-                    if hasattr(file, 'name') and file.name:
-                        _, original_extension = os.path.splitext(file.name)
-                    # 2. 尝试从file.filename获取
-                    elif hasattr(file, 'filename') and file.filename:
-                        _, original_extension = os.path.splitext(file.filename)
-                    # 3. 如果找到了原始扩展名，使用它
-                    if original_extension:
-                        extension = original_extension
-                    # 4. 确保扩展名是小写的，并且包含点号
-                    if extension and not extension.startswith('.'):
-                        extension = '.' + extension
-                    extension = extension.lower()
-                        
-                # 根据filename_mode处理文件名
-                if filename_mode == 'filename_timestamp':
-                    # 使用年月日时分秒毫秒格式的时间戳
-                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]  # 去掉最后三位得到毫秒
-                    filename = f"{base_name}_{timestamp}{extension}" 
-                elif extension:
-                    # 确保文件名包含扩展名
-                    filename = f"{base_name}{extension}"
+            # 可选的阶段计时（读取文件、生成对象键、获取客户端、上传）
+            timer = PhaseTimer(enabled=get_bool_parameter(parameters, 'timings'))
+            
+            # 从进程级注册表获取腾讯云COS客户端（复用长连接）
+            with timer.phase('client'):
+                client = get_cos_client(credentials)
             
-            # 根据目录模式生成完整的文件路径
-            object_key = self._generate_object_key(directory, directory_mode, filename)
+            # 分块上传参数，未设置分块大小或并发数时由调优器按地域和文件大小选择
+            multipart_threshold = self._get_mb_parameter(parameters, 'multipart_threshold_mb', DEFAULT_MULTIPART_THRESHOLD)
+            part_size = self._get_mb_parameter(parameters, 'part_size_mb', None)
+            part_concurrency = None
+            if parameters.get('part_concurrency') not in (None, ''):
+                part_concurrency = max(1, min(int(parameters['part_concurrency']), self.MAX_PART_CONCURRENCY))
             
-            # 创建腾讯云COS客户端
-            config = CosConfig(
-                Region=credentials['region'],
-                SecretId=credentials['secret_id'],
-                SecretKey=credentials['secret_key']
-            )
-            client = CosS3Client(config)
+            # 读取文件内容之前预留进程级内存预算，预算不足时排队，等待超时则拒绝
+            compression = parameters.get('compression')
+            image_options = resolve_image_options(parameters.get('image_optimization'),
+                                                  parameters.get('image_max_dimension'),
+                                                  parameters.get('image_quality'))
+            with timer.phase('memory_wait'):
+                reservation = get_memory_budget().acquire(estimate_upload_memory(file, compression, image_options))
             
-            # 上传文件 - 统一处理文件对象或文件路径
+            # 上传文件 - 统一处理文件对象或文件路径，超过阈值的大文件使用并发分块上传
+            job = None
             try:
-                # 处理dify_plugin的File对象
-                if isinstance(file, File):
-                    # 获取文件内容
-                    file_content = file.blob
-                    # 获取文件内容类型
-                    content_type = getattr(file, 'content_type', 'application/octet-stream')
-                    # 上传文件内容
-                    response = client.put_object(
-                        Bucket=credentials['bucket'],
-                        Body=file_content,
-                        Key=object_key,
-                        ContentType=content_type
-                    )
-                # 尝试作为普通文件对象处理
-                elif hasattr(file, 'read'):
-                    # 重置文件指针到开头
-                    if hasattr(file, 'seek'):
-                        file.seek(0)
-                    # 获取文件内容类型
-                    content_type = getattr(file, 'content_type', 'application/octet-stream')
-                    # 上传文件流
-                    response = client.put_object(
-                        Bucket=credentials['bucket'],
-                        Body=file,
-                        Key=object_key,
-                        ContentType=content_type
-                    )
-                # 尝试作为文件路径处理
-                elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
-                    # 上传本地文件
-                    response = client.upload_file(
-                        Bucket=credentials['bucket'],
-                        LocalFilePath=str(file),
-                        Key=object_key
-                    )
-                else:
-                    raise ValueError("Unsupported file type")
+                # 一次性解析文件名、扩展名、内容类型、大小和对象键，按需优化图片
+                job = build_upload_job(file, directory, directory_mode, filename, filename_mode, timer=timer,
+                                       image_options=image_options)
+                # 元数据中没有大小的File在构建任务时才下载，按实际大小补足预留
+                with timer.phase('memory_wait'):
+                    reservation.extend(estimate_upload_memory(file, compression, image_options) - reservation.nbytes)
+                
+                upload_result = execute_upload(
+                    client,
+                    credentials['bucket'],
+                    job,
+                    multipart_threshold=multipart_threshold,
+                    part_size=part_size,
+                    part_concurrency=part_concurrency,
+                    dedup=get_bool_parameter(parameters, 'dedup'),
+                    compression=compression,
+                    retry=RetryContext(RetryBudget(self.RETRY_BUDGET)),
+                    timer=timer,
+                    region=credentials['region']
+                )
                 
                 # 构建文件URL
-                # 腾讯云COS的URL格式: https://{bucket}.cos.{region}.myqcloud.com/{object_key}
-                file_url = f"https://{credentials['bucket']}.cos.{credentials['region']}.myqcloud.com/{object_key}"
+                file_url = build_file_url(credentials['bucket'], credentials['region'], job.object_key)
                 
                 # 返回结果字典
                 return {
-                    'filename': filename,
-                    'source_filename': source_file_name,
+                    'job': job,
+                    'filename': job.filename,
+                    'source_filename': job.source_filename,
                     'file_url': file_url,
-                    'object_key': object_key,
+                    'object_key': job.object_key,
                     'bucket': credentials['bucket'],
-                    'region': credentials['region']
+                    'region': credentials['region'],
+                    'upload_mode': upload_result['upload_mode'],
+                    'part_count': upload_result['part_count'],
+                    'part_size': upload_result.get('part_size'),
+                    'part_concurrency': upload_result.get('part_concurrency'),
+                    'autotuned': upload_result.get('autotuned', False),
+                    'deduplicated': upload_result['deduplicated'],
+                    'content_encoding': upload_result['content_encoding'],
+                    'stored_size': upload_result['stored_size'],
+                    'retries': upload_result['retries'],
+                    'memory_wait_ms': reservation.wait_ms,
+                    'timer': timer
                 }
-            except CosServiceError as e:
+            except cos_sdk.CosServiceError as e:
                 error_message = f"COS service error: {str(e)}"
                 raise ValueError(error_message)
+            finally:
+                # 上传结束后释放文件内容和预留的内存预算
+                release_file_content(file, job)
+                reservation.release()
             
         except Exception as e:
             error_message = f"Failed to upload file: {str(e)}"
             raise ValueError(error_message)
     
+    def _get_mb_parameter(self, parameters: dict[str, Any], name: str, default: Optional[int]) -> Optional[int]:
+        """
+        读取以MB为单位的数值参数并转换为字节
+        
+        Args:
+            parameters: 工具参数
+            name: 参数名称
+            default: 默认值（字节）
+            
+        Returns:
+            参数值（字节）
+        """
+        value = parameters.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter {name} must be a number")
+        if value <= 0:
+            raise ValueError(f"Parameter {name} must be greater than 0")
+        return int(value * 1024 * 1024)
+    
     def _generate_object_key(self, directory: str, directory_mode: str, filename: str) -> str:
         """
         根据目录模式生成完整的对象键
@@ -386,20 +267,4 @@ class UploadFileTool(Tool):
         Returns:
             完整的对象键
         """
-        # 对directory进行前后去空格处理
-        directory = directory.strip()
-        
-        # 根据目录模式生成路径
-        if directory_mode == 'yyyy_mm_dd_hierarchy':
-            # 年/月/日 层级目录
-            date_path = datetime.now().strftime('%Y/%m/%d')
-            object_key = f"{directory}/{date_path}/{filename}"
-        elif directory_mode == 'yyyy_mm_dd_combined':
-            # 年月日 一体目录
-            date_path = datetime.now().strftime('%Y%m%d')
-            object_key = f"{directory}/{date_path}/{filename}"
-        else:
-            # 默认：无子目录
-            object_key = f"{directory}/{filename}"
-        
-        return object_key
\ No newline at end of file
+        return generate_object_key(directory, directory_mode, filename)
@@ -0,0 +1,602 @@
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from dify_plugin.file.file import File
+
+from .autotune import get_transfer_tuner, resolve_transfer_settings
+from .compression import ORIGINAL_SIZE_METADATA, compress_payload, resolve_compression
+from .dedup import compute_content_hash, compute_digest, is_duplicate, remember_upload
+from .image_optimization import ImageOptions, is_optimizable, optimize_image
+from .multipart import DEFAULT_MULTIPART_THRESHOLD, multipart_upload
+from .object_listing import get_prefix_index
+from .retry import RetryContext
+from .timing import NULL_TIMER, PhaseTimer
+from .utils import (SNIFF_BYTES, get_content_type_from_extension, get_extension_from_content_type,
+                    get_file_type_from_content_type, is_generic_content_type, resolve_content_type,
+                    sniff_content_type)
+
+# content_hash文件名模式的对象内容不会改变，CDN和浏览器可以长期缓存（默认一年）
+IMMUTABLE_MAX_AGE = int(os.environ.get('COS_IMMUTABLE_MAX_AGE', '31536000'))
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+
+
+class UploadJob:
+    """
+    单个待上传文件的元信息
+
+    文件名、扩展名、内容类型、大小和对象键在构建时只解析一次，
+    之后上传和输出（JSON/文本）都基于这条记录，不再重复读取文件内容。
+    """
+
+    __slots__ = ('file', 'index', 'source_filename', 'filename', 'extension', 'file_type',
+                 'content_type', 'size', 'object_key', 'content_hash', 'cache_control', 'optimized_data',
+                 'image_report')
+
+    def __init__(self, file: Any, index: int, source_filename: str, filename: str, extension: str,
+                 file_type: str, content_type: str, size: int, object_key: str,
+                 content_hash: Optional[str] = None, cache_control: Optional[str] = None,
+                 optimized_data: Optional[bytes] = None, image_report: Optional[Dict[str, Any]] = None):
+        self.file = file
+        self.index = index
+        self.source_filename = source_filename
+        self.filename = filename
+        self.extension = extension
+        self.file_type = file_type
+        self.content_type = content_type
+        self.size = size
+        self.object_key = object_key
+        # content_hash文件名模式下的内容摘要和随对象保存的Cache-Control
+        self.content_hash = content_hash
+        self.cache_control = cache_control
+        # 图片优化后的内容（上传结束后释放）和优化报告
+        self.optimized_data = optimized_data
+        self.image_report = image_report
+
+    @property
+    def payload(self) -> Any:
+        """待上传的内容：优化后的图片、File的blob、类文件对象或本地文件路径"""
+        if self.optimized_data is not None:
+            return self.optimized_data
+        if isinstance(self.file, File):
+            return self.file.blob
+        return self.file
+
+    @property
+    def size_mb(self) -> float:
+        return self.size / (1024 * 1024) if self.size > 0 else 0
+
+    def to_file_info(self, file_url: str = '', status: str = 'success',
+                     error_message: Optional[str] = None) -> Dict[str, Any]:
+        """
+        构建JSON响应中单个文件的信息
+
+        Args:
+            file_url: 文件访问URL，失败时为空
+            status: 上传状态，success 或 failed
+            error_message: 失败原因
+
+        Returns:
+            文件信息字典
+        """
+        file_info = {
+            "filename": self.filename,
+            "file_size_bytes": self.size,
+            "file_size_mb": round(self.size_mb, 2),
+            "file_type": self.file_type,
+            "file_url": file_url,
+            "status": status
+        }
+        if self.content_hash:
+            file_info["content_hash"] = self.content_hash
+            file_info["cache_control"] = self.cache_control
+        if self.image_report:
+            file_info["image_optimization"] = self.image_report
+        if error_message is not None:
+            file_info["error_message"] = error_message
+        return file_info
+
+
+def build_upload_job(file: Any, directory: str, directory_mode: str, filename: Optional[str] = None,
+                     filename_mode: str = 'filename', default_base_name: str = 'upload',
+                     index: int = 0, timer: PhaseTimer = NULL_TIMER,
+                     image_options: Optional[ImageOptions] = None) -> UploadJob:
+    """
+    解析文件的名称、扩展名、内容类型、大小并生成对象键
+
+    Args:
+        file: 文件对象（dify_plugin的File、类文件对象或本地文件路径）
+        directory: 一级目录
+        directory_mode: 目录模式
+        filename: 用户指定的文件名（可选）
+        filename_mode: 文件名组成方式
+        default_base_name: 无法获取原始文件名时使用的基本名称
+        index: 文件在批量上传中的序号
+        timer: 阶段计时器，记录读取文件内容、图片优化和生成对象键的耗时
+        image_options: 图片优化参数，None表示不优化
+
+    Returns:
+        UploadJob实例
+    """
+    source_filename = get_source_filename(file)
+    declared_content_type = get_declared_content_type(file)
+    # 声明的类型为octet-stream时等同于没有声明
+    specific_content_type = None if is_generic_content_type(declared_content_type) else declared_content_type
+
+    # 原始文件名的基本名称和扩展名
+    original_base_name, original_extension = ('', '')
+    if source_filename != 'unknown':
+        original_base_name, original_extension = os.path.splitext(source_filename)
+
+    # 扩展名和声明类型都无法确定具体类型时（如无扩展名或 .bin），根据文件头部的魔数识别
+    head = b''
+    if not specific_content_type and is_generic_content_type(get_content_type_from_extension(original_extension)):
+        with timer.phase('read_blob'):
+            head = read_file_head(file)
+    sniffed_content_type = sniff_content_type(head)
+    detected_content_type = specific_content_type or sniffed_content_type
+
+    if filename:
+        # 用户指定了文件名；没有扩展名时沿用原始文件的扩展名
+        base_name, extension = os.path.splitext(filename)
+        if not extension:
+            extension = original_extension
+        source_filename = filename
+    else:
+        # 使用上传文件的原始文件名
+        base_name = original_base_name or default_base_name
+        extension = original_extension
+        if not extension:
+            extension = get_extension_from_content_type(detected_content_type) if detected_content_type else '.dat'
+
+    # 确保扩展名是小写的，并且包含点号
+    if extension and not extension.startswith('.'):
+        extension = '.' + extension
+    extension = extension.lower()
+
+    # 文件类型（不带点号）
+    if original_extension:
+        file_type = original_extension.lower()[1:]
+    elif detected_content_type:
+        file_type = get_file_type_from_content_type(detected_content_type)
+    else:
+        file_type = 'unknown'
+
+    # 上传时的Content-Type：声明的具体类型 > 扩展名 > 魔数识别结果
+    content_type = resolve_content_type(specific_content_type, extension, head)
+
+    # 图片在进程池中缩放或重新编码；转换格式时同时更新内容类型和扩展名
+    optimized_data, image_report = None, None
+    if is_optimizable(image_options, content_type):
+        with timer.phase('image'):
+            optimized = optimize_image(file.blob if isinstance(file, File) else file, content_type, image_options)
+        optimized_data, image_report = optimized.data, optimized.report
+        if optimized.data is not None:
+            # 保持原格式时沿用原扩展名（如 .jpeg）
+            if optimized.content_type != content_type.split(';', 1)[0].strip().lower():
+                extension = optimized.extension
+                file_type = extension[1:]
+            content_type = optimized.content_type
+
+    # content_hash模式下对实际上传的内容（压缩前）流式计算摘要作为文件名，相同内容总是得到相同的对象键
+    content_hash = None
+    if filename_mode == 'content_hash':
+        with timer.phase('content_hash'):
+            content_hash = compute_content_hash(
+                optimized_data if optimized_data is not None else file.blob if isinstance(file, File) else file
+            )
+
+    # 根据filename_mode处理文件名
+    target_filename = compose_filename(base_name, extension, filename_mode, content_hash)
+
+    # 获取File大小时会下载并缓存blob
+    with timer.phase('read_blob'):
+        size = len(optimized_data) if optimized_data is not None else get_file_size(file)
+
+    with timer.phase('object_key'):
+        object_key = generate_object_key(directory, directory_mode, target_filename)
+
+    return UploadJob(
+        file=file,
+        index=index,
+        source_filename=source_filename,
+        filename=target_filename,
+        extension=extension,
+        file_type=file_type,
+        content_type=content_type,
+        size=size,
+        object_key=object_key,
+        content_hash=content_hash,
+        cache_control=IMMUTABLE_CACHE_CONTROL if content_hash else None,
+        optimized_data=optimized_data,
+        image_report=image_report
+    )
+
+
+def execute_upload(client: Any, bucket: str, job: UploadJob,
+                   multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+                   part_size: Optional[int] = None,
+                   part_concurrency: Optional[int] = None,
+                   dedup: bool = False, compression: Optional[str] = None,
+                   retry: Optional[RetryContext] = None, timer: PhaseTimer = NULL_TIMER,
+                   region: str = '') -> Dict[str, Any]:
+    """
+    上传单个文件，大文件自动切换为并发分块上传
+
+    Args:
+        client: CosS3Client实例
+        bucket: 存储桶名称
+        job: 已解析的上传任务
+        multipart_threshold: 分块上传阈值（字节）
+        part_size: 分块大小（字节），None表示由调优器按地域和文件大小选择
+        part_concurrency: 并发上传的分块数量，None表示由调优器选择
+        dedup: 是否在目标对象内容相同时跳过上传
+        compression: 压缩编码，'none'、'gzip' 或 'zstd'；已压缩的类型不会再压缩
+        retry: 重试上下文（共享工具调用的重试预算），默认使用不限预算的新上下文
+        timer: 阶段计时器，记录压缩、去重校验和上传的耗时、字节数及重试次数
+        region: 存储桶所在地域，调优器按地域分别记录最佳分块参数
+
+    Returns:
+        包含上传方式、分块数量、是否去重、压缩信息和重试次数的结果字典
+    """
+    # 该文件的所有请求使用同一个子上下文，单独统计重试次数
+    retry = (retry or RetryContext()).child()
+    # 随对象保存的请求头参数
+    headers = {'CacheControl': job.cache_control} if job.cache_control else {}
+
+    # 文本类内容按需压缩，压缩后没有变小时仍上传原始内容；压缩结果一旦达到原始大小即放弃，
+    # 内存中的压缩副本不超过原始大小
+    compressed = None
+    encoding = resolve_compression(compression, job.content_type, job.size)
+    if encoding:
+        with timer.phase('compress'):
+            compressed = compress_payload(job.payload, encoding, max_size=job.size)
+        if compressed is None:
+            encoding = None
+    compression_info = {
+        'content_encoding': encoding,
+        'stored_size': len(compressed) if compressed is not None else job.size
+    }
+
+    # 去重比较的是实际存储的内容，压缩时对压缩结果计算摘要
+    digest = None
+    if dedup:
+        # 流式计算内容摘要，与目标对象比较，内容相同时跳过上传
+        with timer.phase('dedup'):
+            digest = compute_digest(compressed if compressed is not None else job.payload)
+            duplicate = is_duplicate(client, bucket, job.object_key, digest, retry)
+        if duplicate:
+            # HEAD请求的重试同样计入该文件的重试次数
+            timer.add_retries(retry.retries)
+            return {'upload_mode': 'deduplicated', 'part_count': 0, 'deduplicated': True, 'retries': retry.retries,
+                    **compression_info}
+
+    with timer.phase('upload'):
+        if compressed is not None:
+            # 记录压缩前的大小，下载时据此校验大小限制
+            result = _put_bytes(client, bucket, job.object_key, compressed, job.content_type,
+                                multipart_threshold, part_size, part_concurrency, retry, region,
+                                ContentEncoding=encoding, Metadata={ORIGINAL_SIZE_METADATA: str(job.size)},
+                                **headers)
+        else:
+            result = _put_payload(client, bucket, job, multipart_threshold, part_size, part_concurrency, retry,
+                                  region, **headers)
+    timer.add_bytes(compression_info['stored_size'])
+    result['retries'] = retry.retries
+    timer.add_retries(result['retries'])
+    if digest is not None:
+        remember_upload(bucket, job.object_key, digest)
+    # 更新覆盖该对象键的本地前缀索引，之后的列举无需重新扫描即可看到新对象
+    get_prefix_index().record_put(bucket, region, job.object_key, compression_info['stored_size'])
+    result['deduplicated'] = False
+    result.update(compression_info)
+    return result
+
+
+def _put_payload(client: Any, bucket: str, job: UploadJob, multipart_threshold: int,
+                 part_size: Optional[int], part_concurrency: Optional[int], retry: RetryContext,
+                 region: str, **kwargs) -> Dict[str, Any]:
+    # kwargs为透传的请求头参数
+    file = job.file
+    # 处理优化后的图片和dify_plugin的File对象（blob已缓存，不会复制内容）
+    if job.optimized_data is not None or isinstance(file, File):
+        return _put_bytes(client, bucket, job.object_key, job.payload, job.content_type,
+                          multipart_threshold, part_size, part_concurrency, retry, region, **kwargs)
+    # 尝试作为普通文件对象处理
+    elif hasattr(file, 'read'):
+        def put_file_object():
+            # 每次（包括重试）都从文件开头上传
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            return client.put_object(
+                Bucket=bucket,
+                Body=file,
+                Key=job.object_key,
+                ContentType=job.content_type,
+                **kwargs
+            )
+        # 不可回退的流在重试时无法重新读取，不重试
+        retry.call(put_file_object, idempotent=hasattr(file, 'seek'))
+    # 尝试作为文件路径处理
+    elif isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
+        # 上传本地文件，SDK对大文件自动分块
+        settings, report = resolve_transfer_settings('upload', region, job.size, part_size, part_concurrency)
+        started = time.monotonic()
+        retry.call(
+            client.upload_file,
+            Bucket=bucket,
+            LocalFilePath=str(file),
+            Key=job.object_key,
+            PartSize=max(1, settings.part_size // (1024 * 1024)),
+            MAXThread=settings.concurrency,
+            ContentType=job.content_type,
+            **kwargs
+        )
+        if report and job.size > multipart_threshold:
+            get_transfer_tuner('upload').record(region, job.size, settings, time.monotonic() - started)
+    else:
+        raise ValueError("Unsupported file type")
+    return {'upload_mode': 'simple', 'part_count': 1}
+
+
+def _put_bytes(client: Any, bucket: str, object_key: str, data: bytes, content_type: str,
+               multipart_threshold: int, part_size: Optional[int], part_concurrency: Optional[int],
+               retry: RetryContext, region: str, **kwargs) -> Dict[str, Any]:
+    # 上传内存中的内容，超过阈值时使用并发分块上传；kwargs为透传的请求头参数
+    if len(data) > multipart_threshold:
+        # 未指定的分块参数由调优器给出，上传完成后报告吞吐量
+        settings, report = resolve_transfer_settings('upload', region, len(data), part_size, part_concurrency)
+        started = time.monotonic()
+        multipart_result = multipart_upload(
+            client, bucket, object_key, data, content_type,
+            part_size=settings.part_size, concurrency=settings.concurrency, retry=retry, **kwargs
+        )
+        if report:
+            get_transfer_tuner('upload').record(region, len(data), settings, time.monotonic() - started)
+        return {
+            'upload_mode': 'multipart',
+            'part_count': multipart_result['part_count'],
+            'part_size': multipart_result['part_size'],
+            'part_concurrency': settings.concurrency,
+            'autotuned': report
+        }
+    retry.call(
+        client.put_object,
+        Bucket=bucket,
+        Body=data,
+        Key=object_key,
+        ContentType=content_type,
+        **kwargs
+    )
+    return {'upload_mode': 'simple', 'part_count': 1}
+
+
+def build_file_url(bucket: str, region: str, object_key: str) -> str:
+    # 腾讯云COS的URL格式: https://{bucket}.cos.{region}.myqcloud.com/{object_key}
+    return f"https://{bucket}.cos.{region}.myqcloud.com/{object_key}"
+
+
+def normalize_path_component(value: Optional[str], name: str) -> str:
+    """
+    对目录或文件名参数进行前后去空格处理，并验证其不以空格、/或\开头
+
+    Args:
+        value: 参数值
+        name: 错误信息中的参数名，'Directory' 或 'Filename'
+
+    Returns:
+        去空格后的值
+    """
+    value = (value or '').strip()
+    # 禁止以空格、/或\开头
+    if value.startswith((' ', '/', '\\')):
+        raise ValueError(f"{name} cannot start with space, / or \\ ")
+    return value
+
+
+def generate_object_key(directory: str, directory_mode: str, filename: str) -> str:
+    """
+    根据目录模式生成完整的对象键
+
+    Args:
+        directory: 目录名称
+        directory_mode: 目录模式
+        filename: 文件名
+
+    Returns:
+        完整的对象键
+    """
+    # 对directory进行前后去空格处理
+    directory = directory.strip()
+
+    # 根据目录模式生成路径
+    if directory_mode == 'yyyy_mm_dd_hierarchy':
+        # 年/月/日 层级目录
+        date_path = datetime.now().strftime('%Y/%m/%d')
+        return f"{directory}/{date_path}/{filename}"
+    elif directory_mode == 'yyyy_mm_dd_combined':
+        # 年月日 一体目录
+        date_path = datetime.now().strftime('%Y%m%d')
+        return f"{directory}/{date_path}/{filename}"
+    # 默认：无子目录
+    return f"{directory}/{filename}"
+
+
+def compose_filename(base_name: str, extension: str, filename_mode: str,
+                     content_hash: Optional[str] = None) -> str:
+    """
+    根据文件名组成方式生成存储在COS上的文件名
+
+    Args:
+        base_name: 文件基本名称
+        extension: 扩展名（带点号）
+        filename_mode: 'filename'、'filename_timestamp' 或 'content_hash'
+        content_hash: 文件内容的摘要，content_hash模式下必需
+
+    Returns:
+        文件名
+    """
+    if filename_mode == 'content_hash':
+        # 内容寻址：文件名只由内容决定，同一对象键的内容不会改变
+        if not content_hash:
+            raise ValueError("Filename mode content_hash requires the file content")
+        return f"{content_hash}{extension}"
+    if filename_mode == 'filename_timestamp':
+        # 使用年月日时分秒毫秒格式的时间戳
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]  # 去掉最后三位得到毫秒
+        return f"{base_name}_{timestamp}{extension}"
+    return f"{base_name}{extension}"
+
+
+def get_source_filename(file: Any) -> str:
+    """获取文件的原始文件名，无法获取时返回 'unknown'"""
+    if isinstance(file, File):
+        return file.filename or 'unknown'
+    if getattr(file, 'name', None) and isinstance(file.name, str):
+        return os.path.basename(file.name)
+    if getattr(file, 'filename', None):
+        return file.filename
+    if isinstance(file, (str, bytes, os.PathLike)):
+        return os.path.basename(os.fsdecode(file))
+    return 'unknown'
+
+
+def get_declared_content_type(file: Any) -> Optional[str]:
+    """获取文件对象自带的内容类型（content_type 或 mime_type）"""
+    for attr in ('content_type', 'mime_type'):
+        value = getattr(file, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+def read_file_head(file: Any, size: int = SNIFF_BYTES) -> bytes:
+    """
+    读取文件开头的若干字节用于类型识别，不移动文件指针
+
+    Args:
+        file: 文件对象
+        size: 读取的字节数
+
+    Returns:
+        文件开头的字节，无法读取时返回空字节串
+    """
+    try:
+        if isinstance(file, File):
+            return file.blob[:size]
+        if hasattr(file, 'read') and hasattr(file, 'seek') and hasattr(file, 'tell'):
+            position = file.tell()
+            file.seek(0)
+            head = file.read(size)
+            file.seek(position)
+            return head if isinstance(head, bytes) else b''
+        if isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
+            with open(file, 'rb') as handle:
+                return handle.read(size)
+    except (OSError, ValueError):
+        pass
+    return b''
+
+
+def get_file_size(file: Any) -> int:
+    """
+    获取文件大小，不复制文件内容
+
+    Args:
+        file: 文件对象
+
+    Returns:
+        文件大小（字节），无法获取时返回0
+    """
+    if isinstance(file, File):
+        # blob属性会缓存内容，len不会产生复制
+        return len(file.blob)
+    if hasattr(file, 'seek') and hasattr(file, 'tell'):
+        # 通过移动文件指针获取大小，而不是读取全部内容
+        current_pos = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(current_pos)
+        return size
+    if isinstance(file, (str, bytes, os.PathLike)) and os.path.exists(file):
+        return os.path.getsize(file)
+    return 0
+
+
+def estimate_upload_memory(file: Any, compression: Optional[str] = None,
+                           image_options: Optional[ImageOptions] = None) -> int:
+    """
+    估算上传文件期间在内存中持有的字节数，在读取文件内容之前用于预留内存预算
+
+    各部分按最大可能计算：压缩结果和优化后的图片都不超过原始大小（否则被丢弃），
+    因此各按原始大小预留一份。
+
+    Args:
+        file: 文件对象
+        compression: 压缩编码，启用时为压缩结果预留一份原始大小
+        image_options: 图片优化参数，启用时为优化结果预留一份原始大小
+
+    Returns:
+        字节数
+    """
+    compressing = bool(compression) and compression != 'none'
+    if isinstance(file, File):
+        # blob已缓存时以实际大小为准，否则使用文件元数据中的大小（不会触发下载）
+        size = len(file._blob) if getattr(file, '_blob', None) is not None else (file.size or 0)
+        # 原始内容在上传结束前一直缓存，优化结果和压缩结果与其同时存在
+        return size * (1 + (image_options is not None) + compressing)
+    # 本地文件路径和类文件对象不压缩、不优化时由SDK分块读取，不在内存中持有内容
+    size = get_file_size(file)
+    if image_options is not None:
+        # 优化时整体读入原始内容，与优化结果同时存在；之后优化结果与压缩结果同时存在
+        return size * 2
+    return size if compressing else 0
+
+
+def release_file_content(file: Any, job: Optional[UploadJob] = None) -> None:
+    """释放上传任务持有的内容（文件和优化后的图片）以及dify_plugin的File对象已缓存的blob，之后再次访问File会重新下载"""
+    if job is not None:
+        job.file = None
+        job.optimized_data = None
+    if isinstance(file, File) and hasattr(file, '_blob'):
+        # dify_plugin（0.2.0至0.7.x）的File将下载的内容缓存在私有属性_blob中，没有公开的释放接口
+        file._blob = None
+
+
+def describe_file(file: Any) -> Dict[str, Any]:
+    """
+    在未能构建上传任务时（如参数校验失败）描述文件，不会发起网络请求
+
+    Args:
+        file: 文件对象
+
+    Returns:
+        标记为失败的文件信息字典
+    """
+    size = 0
+    if isinstance(file, File):
+        size = file.size or 0
+    else:
+        try:
+            size = get_file_size(file)
+        except Exception:
+            size = 0
+    source_filename = get_source_filename(file)
+    _, extension = os.path.splitext(source_filename)
+    declared_content_type = get_declared_content_type(file)
+    if extension:
+        file_type = extension.lower()[1:]
+    elif declared_content_type:
+        file_type = get_file_type_from_content_type(declared_content_type)
+    else:
+        file_type = 'unknown'
+    size_mb = size / (1024 * 1024) if size > 0 else 0
+    return {
+        "filename": source_filename,
+        "file_size_bytes": size,
+        "file_size_mb": round(size_mb, 2),
+        "file_type": file_type,
+        "file_url": "",
+        "status": "failed"
+    }
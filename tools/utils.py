@@ -1,5 +1,6 @@
+import mimetypes
 import os
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 # 内容类型到扩展名的映射表（带点号）
 CONTENT_TYPE_TO_EXTENSION_WITH_DOT = {
@@ -88,27 +89,109 @@ CONTENT_TYPE_TO_EXTENSION_WITH_DOT = {
 # 内容类型到扩展名的映射表（不带点号）
 CONTENT_TYPE_TO_EXTENSION = {k: v[1:] for k, v in CONTENT_TYPE_TO_EXTENSION_WITH_DOT.items()}
 
+# 扩展名到内容类型的反向索引（首个匹配优先）
+EXTENSION_TO_CONTENT_TYPE: Dict[str, str] = {}
+for _content_type, _extension in CONTENT_TYPE_TO_EXTENSION_WITH_DOT.items():
+    EXTENSION_TO_CONTENT_TYPE.setdefault(_extension, _content_type)
+
+# 多个内容类型对应同一扩展名时，按扩展名推断使用标准的内容类型
+EXTENSION_TO_CONTENT_TYPE.update({
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo'
+})
+
+# 常见的非标准内容类型别名
+CONTENT_TYPE_ALIASES = {
+    'image/jpg': 'image/jpeg',
+    'image/pjpeg': 'image/jpeg',
+    'image/x-png': 'image/png',
+    'image/x-ms-bmp': 'image/bmp',
+    'image/vnd.microsoft.icon': 'image/x-icon',
+    'audio/mp3': 'audio/mpeg',
+    'audio/x-wav': 'audio/wav',
+    'audio/wave': 'audio/wav',
+    'audio/x-flac': 'audio/flac',
+    'audio/x-m4a': 'audio/m4a',
+    'text/javascript': 'application/javascript',
+    'application/x-javascript': 'application/javascript',
+    'application/x-zip-compressed': 'application/zip',
+    'application/x-gzip': 'application/gzip',
+    'application/vnd.rar': 'application/x-rar-compressed',
+    'text/x-markdown': 'text/markdown'
+}
+
+# 不携带具体类型信息的内容类型
+GENERIC_CONTENT_TYPES = frozenset(('', 'application/octet-stream', 'binary/octet-stream', 'application/unknown'))
+
+# 嗅探时读取的文件头字节数
+SNIFF_BYTES = 512
+
+# 内容本身已经压缩过的类型，再次压缩几乎没有收益
+COMPRESSED_CONTENT_TYPES = frozenset((
+    'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/heic',
+    'audio/mpeg', 'audio/ogg', 'audio/flac', 'audio/aac', 'audio/m4a', 'audio/mp4',
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/vnd.oasis.opendocument.text',
+    'application/vnd.oasis.opendocument.spreadsheet',
+    'application/vnd.oasis.opendocument.presentation',
+    'application/zip', 'application/gzip', 'application/x-rar-compressed', 'application/x-7z-compressed',
+    'application/x-bzip2', 'application/vnd.android.package-archive', 'application/java-archive',
+    'application/x-shockwave-flash'
+))
+
+
+def parse_content_type(content_type: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    解析内容类型，拆分出小写的媒体类型和参数
+    
+    Args:
+        content_type: 内容类型，如 'text/csv; charset=utf-8'
+        
+    Returns:
+        (媒体类型, 参数字典)，如 ('text/csv', {'charset': 'utf-8'})
+    """
+    if not content_type:
+        return '', {}
+    media_type, _, raw_params = content_type.partition(';')
+    params = {}
+    for item in raw_params.split(';'):
+        name, sep, value = item.partition('=')
+        if sep and name.strip():
+            params[name.strip().lower()] = value.strip().strip('"')
+    return media_type.strip().lower(), params
+
+
+def _lookup_content_type(content_type: Optional[str], table: Dict[str, str]) -> Optional[str]:
+    # 依次尝试：精确匹配、别名、在 '.' 或 '+' 处截断的父类型
+    # （如 application/vnd.ms-excel.sheet.macroenabled.12 -> application/vnd.ms-excel），
+    # 查找次数只与类型字符串的分段数有关，与映射表大小无关
+    media_type, _ = parse_content_type(content_type)
+    media_type = CONTENT_TYPE_ALIASES.get(media_type, media_type)
+    while media_type:
+        if media_type in table:
+            return table[media_type]
+        cut = max(media_type.rfind('.'), media_type.rfind('+'))
+        if cut <= media_type.find('/'):
+            return None
+        media_type = media_type[:cut]
+    return None
+
 
 def get_file_type_from_content_type(content_type: str) -> str:
     """
     根据内容类型获取文件类型（不带点号）
     
     Args:
-        content_type: 文件内容类型，如 'image/jpeg'
+        content_type: 文件内容类型，如 'image/jpeg' 或 'text/csv; charset=utf-8'
         
     Returns:
         文件类型，如 'jpg'，如果无法匹配则返回 'unknown'
     """
-    # 直接匹配内容类型
-    if content_type in CONTENT_TYPE_TO_EXTENSION:
-        return CONTENT_TYPE_TO_EXTENSION[content_type]
-    
-    # 尝试匹配内容类型的前缀（例如 'application/vnd.openxmlformats-officedocument.'）
-    for ct, ext in CONTENT_TYPE_TO_EXTENSION.items():
-        if content_type.startswith(ct):
-            return ext
-    
-    return "unknown"
+    return _lookup_content_type(content_type, CONTENT_TYPE_TO_EXTENSION) or "unknown"
 
 
 def get_extension_from_content_type(content_type: str) -> str:
@@ -116,76 +199,280 @@ def get_extension_from_content_type(content_type: str) -> str:
     根据内容类型获取文件扩展名（带点号）
     
     Args:
-        content_type: 文件内容类型，如 'image/jpeg'
+        content_type: 文件内容类型，如 'image/jpeg' 或 'text/csv; charset=utf-8'
         
     Returns:
         文件扩展名，如 '.jpg'，如果无法匹配则返回 '.dat'
     """
-    # 直接匹配内容类型
-    if content_type in CONTENT_TYPE_TO_EXTENSION_WITH_DOT:
-        return CONTENT_TYPE_TO_EXTENSION_WITH_DOT[content_type]
-    
-    # 尝试匹配内容类型的前缀（例如 'application/vnd.openxmlformats-officedocument.'）
-    for ct, ext in CONTENT_TYPE_TO_EXTENSION_WITH_DOT.items():
-        if content_type.startswith(ct):
-            return ext
-    
-    return ".dat"
+    return _lookup_content_type(content_type, CONTENT_TYPE_TO_EXTENSION_WITH_DOT) or ".dat"
+
+
+def is_generic_content_type(content_type: Optional[str]) -> bool:
+    """判断内容类型是否缺失或为不携带类型信息的 octet-stream"""
+    return parse_content_type(content_type)[0] in GENERIC_CONTENT_TYPES
+
+
+def is_compressed_content_type(content_type: Optional[str]) -> bool:
+    """判断内容类型是否本身已经压缩（压缩包、大多数图片/音视频、OOXML文档等）"""
+    media_type = parse_content_type(content_type)[0]
+    media_type = CONTENT_TYPE_ALIASES.get(media_type, media_type)
+    return media_type in COMPRESSED_CONTENT_TYPES or media_type.startswith('video/')
+
+
+def get_bool_parameter(parameters: Dict[str, Any], name: str) -> bool:
+    """
+    读取布尔类型的工具参数，字符串 'true'、'1'、'yes' 视为True
+
+    Args:
+        parameters: 工具参数
+        name: 参数名称
+
+    Returns:
+        参数值，未设置时为False
+    """
+    value = parameters.get(name, False)
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def get_int_parameter(parameters: Dict[str, Any], name: str, default: Optional[int] = None) -> Optional[int]:
+    """
+    读取整数类型的工具参数
+
+    Args:
+        parameters: 工具参数
+        name: 参数名称
+        default: 未设置时的默认值
+
+    Returns:
+        参数值，未设置时为default
+    """
+    value = parameters.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parameter {name} must be an integer")
+
+
+def get_size_parameter(parameters: Dict[str, Any], name: str) -> int:
+    """
+    读取以MB为单位的大小限制参数并转换为字节
+
+    Args:
+        parameters: 工具参数
+        name: 参数名称
+
+    Returns:
+        字节数，0或未设置时返回0（表示不限制）
+    """
+    try:
+        size_mb = float(parameters.get(name) or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parameter {name} must be a number")
+    return int(size_mb * 1024 * 1024) if size_mb > 0 else 0
 
 
-def get_file_type(file: Any) -> str:
+def get_header(headers: Dict[str, Any], name: str) -> Optional[str]:
     """
-    获取文件类型（不带点号）
+    大小写不敏感地查找响应头
+
+    Args:
+        headers: COS响应头字典
+        name: 响应头名称
+
+    Returns:
+        响应头的值，不存在时返回None
+    """
+    lower_name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lower_name:
+            return value
+    return None
+
+
+def get_content_type_from_extension(extension: str) -> str:
+    """
+    根据扩展名推断内容类型
     
     Args:
-        file: 文件对象
+        extension: 扩展名，如 '.png'
         
     Returns:
-        文件类型，如 'jpg'，如果无法匹配则返回 'unknown'
+        内容类型，无法推断时返回 'application/octet-stream'
     """
-    # 1. 首先尝试从文件名获取扩展名
-    if hasattr(file, 'name') and file.name:
-        _, extension = os.path.splitext(file.name)
-        if extension:
-            return extension.lower()[1:]  # 移除点号
-    
-    # 2. 如果无法从文件名获取，尝试从file.filename获取
-    if hasattr(file, 'filename') and file.filename:
-        _, extension = os.path.splitext(file.filename)
-        if extension:
-            return extension.lower()[1:]  # 移除点号
-    
-    # 3. 如果仍然无法获取，尝试从文件内容类型推断
-    if hasattr(file, 'content_type') and file.content_type:
-        return get_file_type_from_content_type(file.content_type)
-    
-    return "unknown"
+    extension = (extension or '').lower()
+    if extension and not extension.startswith('.'):
+        extension = '.' + extension
+    # 以显式的映射表为准，保证不同系统上结果一致；表中没有的扩展名才使用系统的mimetypes
+    guessed = EXTENSION_TO_CONTENT_TYPE.get(extension) or mimetypes.types_map.get(extension)
+    return guessed or 'application/octet-stream'
+
+
+def _sniff_iso_media(head: bytes) -> Optional[str]:
+    # ISO基础媒体格式（MP4/MOV/M4A/HEIC），按ftyp中的主品牌区分
+    brand = head[8:12]
+    if brand == b'qt  ':
+        return 'video/quicktime'
+    if brand in (b'M4A ', b'M4B '):
+        return 'audio/m4a'
+    if brand in (b'heic', b'heix', b'hevc', b'mif1', b'msf1'):
+        return 'image/heic'
+    return 'video/mp4'
+
+
+def _sniff_riff(head: bytes) -> Optional[str]:
+    form = head[8:12]
+    return {b'WEBP': 'image/webp', b'WAVE': 'audio/wav', b'AVI ': 'video/x-msvideo'}.get(form)
 
 
-def get_file_extension(file: Any) -> str:
+def _sniff_ebml(head: bytes) -> Optional[str]:
+    return 'video/webm' if b'webm' in head else 'video/x-matroska'
+
+
+# 魔数签名表：(偏移, 签名, 内容类型或进一步判断的函数)
+MAGIC_SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'RIFF', _sniff_riff),
+    (0, b'II*\x00', 'image/tiff'),
+    (0, b'MM\x00*', 'image/tiff'),
+    (0, b'\x00\x00\x01\x00', 'image/x-icon'),
+    (0, b'BM', 'image/bmp'),
+    (4, b'ftyp', _sniff_iso_media),
+    (0, b'\x1aE\xdf\xa3', _sniff_ebml),
+    (0, b'ID3', 'audio/mpeg'),
+    (0, b'\xff\xfb', 'audio/mpeg'),
+    (0, b'\xff\xf3', 'audio/mpeg'),
+    (0, b'\xff\xf2', 'audio/mpeg'),
+    (0, b'OggS', 'audio/ogg'),
+    (0, b'fLaC', 'audio/flac'),
+    (0, b'%PDF-', 'application/pdf'),
+    (0, b'{\\rtf', 'application/rtf'),
+    (0, b'PK\x03\x04', 'application/zip'),
+    (0, b'\x1f\x8b', 'application/gzip'),
+    (0, b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (0, b'Rar!\x1a\x07', 'application/x-rar-compressed'),
+    (0, b'BZh', 'application/x-bzip2'),
+    (257, b'ustar', 'application/x-tar'),
+    (0, b'MZ', 'application/x-msdownload'),
+)
+
+
+def sniff_content_type(head: Optional[bytes]) -> Optional[str]:
     """
-    获取文件扩展名（带点号）
+    根据文件头部的魔数识别内容类型
     
     Args:
-        file: 文件对象
+        head: 文件开头的若干字节（建议 SNIFF_BYTES 字节）
         
     Returns:
-        文件扩展名，如 '.jpg'，如果无法匹配则返回 '.dat'
+        识别出的内容类型，无法识别时返回None
     """
-    # 1. 首先尝试从文件名获取扩展名
-    if hasattr(file, 'name') and file.name:
-        _, extension = os.path.splitext(file.name)
-        if extension:
-            return extension.lower()  # 确保是小写
+    if not head:
+        return None
+    head = bytes(head[:SNIFF_BYTES])
+    for offset, signature, result in MAGIC_SIGNATURES:
+        if head.startswith(signature, offset):
+            return result(head) if callable(result) else result
     
-    # 2. 如果无法从文件名获取，尝试从file.filename获取
-    if hasattr(file, 'filename') and file.filename:
-        _, extension = os.path.splitext(file.filename)
-        if extension:
-            return extension.lower()  # 确保是小写
+    # 文本类内容：去掉BOM和前导空白后判断标记
+    text = head.lstrip(b'\xef\xbb\xbf').lstrip()
+    lowered = text[:256].lower()
+    if lowered.startswith(b'<?xml') or lowered.startswith(b'<svg'):
+        return 'image/svg+xml' if b'<svg' in head.lower() else 'application/xml'
+    if lowered.startswith(b'<!doctype html') or lowered.startswith(b'<html'):
+        return 'text/html'
+    if b'\x00' in head:
+        return None
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # 截断在多字节字符中间时仍视为文本
+        if e.start < len(head) - 3:
+            return None
+    return 'text/plain'
+
+
+def resolve_content_type(declared: Optional[str] = None, extension: Optional[str] = None,
+                         head: Optional[bytes] = None) -> str:
+    """
+    确定上传时使用的Content-Type
     
-    # 3. 如果仍然无法获取，尝试从文件内容类型推断
-    if hasattr(file, 'content_type') and file.content_type:
-        return get_extension_from_content_type(file.content_type)
+    依次使用：声明的具体类型（保留charset等参数）、扩展名、文件头魔数，
+    都无法确定时返回 'application/octet-stream'。
     
-    return ".dat"
\ No newline at end of file
+    Args:
+        declared: 文件对象声明的内容类型
+        extension: 文件扩展名（带点号）
+        head: 文件开头的字节，仅在前两者都无法确定类型时使用
+        
+    Returns:
+        内容类型
+    """
+    if not is_generic_content_type(declared):
+        return declared.strip()
+    if extension:
+        content_type = get_content_type_from_extension(extension)
+        if content_type != 'application/octet-stream':
+            return content_type
+    return sniff_content_type(head) or 'application/octet-stream'
+
+
+def build_blob_metadata(filename: str, content_type: Optional[str], size: int,
+                        head: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    构建下载文件的blob消息元数据
+
+    对象没有扩展名时，根据内容类型（类型为octet-stream时先根据文件头魔数识别）
+    推断扩展名并追加到文件名；内容类型为octet-stream时再根据文件名推断。
+
+    Args:
+        filename: 对象文件名
+        content_type: 响应头中的内容类型
+        size: 文件大小（字节）
+        head: 文件开头的字节，流式下载时为None
+
+    Returns:
+        文件元数据，其中filename和content_type为推断后的值
+    """
+    _, extension = os.path.splitext(filename)
+
+    # 对象没有扩展名且类型为octet-stream时，根据已下载内容的魔数识别类型
+    if not extension and is_generic_content_type(content_type) and head:
+        content_type = sniff_content_type(head) or content_type
+
+    if not extension:
+        # 如果没有扩展名，根据content_type尝试推断
+        extension = get_extension_from_content_type(content_type)
+
+        # 如果推断出了扩展名，添加到文件名中
+        if extension:
+            filename = filename + extension
+
+    # 规范化 content_type：若为 application/octet-stream，则根据文件名推断
+    content_type = content_type or 'application/octet-stream'
+    if is_generic_content_type(content_type):
+        guessed = get_content_type_from_extension(os.path.splitext(filename)[1])
+        if guessed != 'application/octet-stream':
+            content_type = guessed
+
+    # 构建文件元数据，确保包含支持图片显示的所有必要属性
+    file_metadata = {
+        'filename': filename,
+        'content_type': content_type,
+        'size': size,
+        'mime_type': content_type,
+        'extension': extension
+    }
+
+    # 如果是图片类型，添加特定标志以确保在Dify页面正常显示
+    if content_type.startswith('image/'):
+        file_metadata['is_image'] = True
+        file_metadata['display_as_image'] = True
+        file_metadata['type'] = 'image'
+    return file_metadata